@@ -1,14 +1,10 @@
 import customtkinter as ctk
+import gc
 import threading
 import queue
-import time
 import os
 import json
-import numpy as np
-import sounddevice as sd
 import pyaudio
-import webrtcvad
-import collections
 from datetime import datetime
 from tkinter import filedialog, messagebox
 
@@ -18,10 +14,27 @@ try:
 except ImportError:
     vosk = None
 
+from audio_pipeline import (CaptureSource, FairSegmentScheduler, WhisperWorker, ConfidenceGate, LanguageTracker,
+                            RecordingSession, DRAINING, STOPPED)
+from resource_budget import CoreBudget
+from model_manager import ModelManager
+from whisper_backends import BACKENDS, create_backend, language_name
+from streaming_features import LogMelStream
+from settings import Settings
+from pipeline_metrics import MetricsRegistry, MetricsServer, PipelineCollector, process_collector
+
 try:
-    import whisper
+    from study_assistant import LectureNoteGenerator
 except ImportError:
-    whisper = None
+    LectureNoteGenerator = None
+
+try:
+    from transcript_index import TranscriptIndex
+except ImportError:
+    TranscriptIndex = None
+
+# One JSON line per mic per recording: rate, channels, frames, overflows, dropped frames
+CAPTURE_LOG = os.environ.get("NOTEFORGE_CAPTURE_LOG", os.path.join(os.path.expanduser("~"), ".noteforge", "capture.log"))
 
 class HybridTranscriberApp(ctk.CTkToplevel):
     def __init__(self, master=None):
@@ -34,39 +47,56 @@ class HybridTranscriberApp(ctk.CTkToplevel):
         ctk.set_default_color_theme("green")
 
         # --- Configuration ---
-        self.SAMPLE_RATE = 16000
-        self.FRAME_DURATION_MS = 20
-        self.FRAME_SIZE = int(self.SAMPLE_RATE * self.FRAME_DURATION_MS / 1000)
-        self.VOSK_MODEL_PATH = "model"
-        self.WHISPER_MODEL_SIZE = "base"
+        # Per-machine profile from ~/.noteforge/settings.json, edited in the Settings window
+        self.use_settings(Settings.load())
 
         # --- State ---
         self.is_recording = False
-        self.audio_queue = queue.Queue()       # Raw audio chunks (bytes)
-        self.whisper_queue = queue.Queue()     # Completed sentences (numpy array)
-        self.display_queue = queue.Queue()     # UI updates (type, text)
+        self.session = None                    # RecordingSession of the current (or last) recording
+        self.display_queue = queue.Queue()     # UI updates (type, text, source)
         self.meter_queue = queue.Queue()       # Audio level updates
 
         self.vosk_model = None
         self.whisper_model = None
-        self.vad = webrtcvad.Vad(2) # Mode 2: Aggressive
+        self.whisper_lock = threading.Lock()
 
-        # Load Vosk Model immediately (fast)
-        if vosk and os.path.exists(self.VOSK_MODEL_PATH):
-            try:
-                self.vosk_model = vosk.Model(self.VOSK_MODEL_PATH)
-            except Exception as e:
-                print(f"Vosk Load Error: {e}")
+        # Models are fetched ahead of time with `python model_manager.py prefetch`,
+        # never while recording
+        self.models = ModelManager()
+        self.whisper_model_path = None
+        self.whisper_model_key = None      # (backend, size) of the loaded Whisper model
+        self.vosk_model_path = None        # path the loaded Vosk model came from
 
-        # Threads
-        self.capture_thread = None
-        self.vosk_thread = None
-        self.whisper_thread = None
+        # Load Vosk Model immediately (fast)
+        self.load_vosk_model()
+
+        # Live study notes built from Whisper final results
+        self.live_notes = None
+        if LectureNoteGenerator:
+            self.live_notes = LectureNoteGenerator()
+            self.live_notes.start_live_session()
+        self.notes_window = None
+        self.saved_transcript = None       # file last saved from this textbox; late corrections update it
+
+        # Pipelines: one CaptureSource per mic, one shared Whisper worker (owned by self.session)
+        self.sources = []
+        self.scheduler = None
+        self.core_budget = CoreBudget.load()   # tuned per machine with `python resource_budget.py tune`
+        self.whisper_worker = None
+
+        # Live metrics on http://127.0.0.1:<port>/metrics plus ~/.noteforge/metrics.json
+        self.metrics = MetricsRegistry()
+        self.metrics.register(process_collector)
+        self.metrics.register(PipelineCollector(lambda: (self.sources, self.scheduler, self.whisper_worker)))
+        self.metrics_server = None
+        self.start_metrics()
         
         # Audio Devices
         self.devices_list = []
         self.get_available_devices()
         self.selected_mic_index = None
+        self.second_mic_index = None   # Optional room mic; None = single-mic mode
+        self.second_mic_enabled = False
 
         # --- UI Layout ---
         self.create_widgets()
@@ -74,8 +104,86 @@ class HybridTranscriberApp(ctk.CTkToplevel):
         # --- Start Main Loop ---
         self.update_ui_loop()
 
+    def use_settings(self, settings):
+        """Copy settings into the config attributes read when a recording starts"""
+        self.settings = settings
+        self.SAMPLE_RATE = settings.audio.sample_rate
+        self.FRAME_DURATION_MS = settings.audio.frame_ms
+        self.FRAME_SIZE = int(self.SAMPLE_RATE * self.FRAME_DURATION_MS / 1000)
+        self.VOSK_MODEL_PATH = settings.models.vosk_model_path
+        self.WHISPER_MODEL_SIZE = settings.models.whisper_model_size
+        self.WHISPER_BACKEND = settings.models.whisper_backend   # "openai-whisper" or "faster-whisper" (int8)
+        # Compute Whisper's log-mel features during speech (openai-whisper backend only)
+        self.STREAM_FEATURES = settings.models.stream_features
+        # Skip Whisper when every Vosk word is at least this confident (None = always run Whisper);
+        # skipped segments are re-decoded once the pipeline is idle
+        self.WHISPER_SKIP_CONFIDENCE = settings.whisper.skip_confidence
+        self.WHISPER_SKIP_AVG_CONFIDENCE = settings.whisper.skip_avg_confidence
+        # "auto": detect the lecture language once (among WHISPER_LANGUAGES) and re-check it periodically
+        self.WHISPER_LANGUAGE = settings.whisper.language
+        self.WHISPER_LANGUAGES = settings.whisper.languages
+
+    def apply_settings(self, settings):
+        """Adopt edited settings; returns the changed names that wait for the next recording.
+
+        Thresholds and queue limits are pushed into the running pipeline
+        straight away; models, frame size and the like are picked up by
+        start_recording.
+        """
+        changed = self.settings.changes(settings)
+        self.use_settings(settings)
+        if any(name.startswith("metrics.") for name in changed):
+            self.start_metrics()
+        if not self.is_recording:
+            return []
+
+        for source in self.sources:
+            source.configure(max_queued_frames=settings.audio.max_queued_frames,
+                             **settings.segmenter_options(frame_ms=source.frame_ms))
+        gate = self.whisper_worker.gate if self.whisper_worker else None
+        if gate and settings.whisper.skip_confidence is not None:
+            gate.min_word_conf = settings.whisper.skip_confidence
+            gate.min_avg_conf = settings.whisper.skip_avg_confidence
+
+        # Switching the gate itself on or off needs a new worker
+        toggled = (gate is None) != (settings.whisper.skip_confidence is None)
+        return [name for name in changed
+                if not Settings.is_live(name) or (toggled and name == 'whisper.skip_confidence')]
+
+    def start_metrics(self):
+        """(Re)start the metrics endpoint and snapshot writer per the current settings"""
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        config = self.settings.metrics
+        if not config.enabled:
+            return
+        try:
+            self.metrics_server = MetricsServer(self.metrics, config.port, snapshot_every=config.snapshot_s).start()
+            print(f"Metrics: {self.metrics_server.url}")
+        except OSError as e:
+            print(f"Metrics endpoint unavailable on port {config.port}: {e}")
+
+    def open_settings(self):
+        from settings_gui import SettingsWindow
+        SettingsWindow(self, self.settings, on_apply=self.apply_settings)
+
+    def load_vosk_model(self):
+        path = self.VOSK_MODEL_PATH
+        if not os.path.exists(path):
+            path = self.models.local_path("vosk") or path
+        if path == self.vosk_model_path:
+            return
+        if vosk and os.path.exists(path):
+            try:
+                self.vosk_model = vosk.Model(path)
+                self.vosk_model_path = path
+            except Exception as e:
+                print(f"Vosk Load Error: {e}")
+
     def get_available_devices(self):
         self.devices_list = []
+        p = None
         try:
             p = pyaudio.PyAudio()
             info = p.get_host_api_info_by_index(0)
@@ -88,9 +196,11 @@ class HybridTranscriberApp(ctk.CTkToplevel):
                     name = dev.get('name')
                     is_def = " (Default)" if i == default_input else ""
                     self.devices_list.append((i, f"{i}: {name}{is_def}"))
-            p.terminate()
         except:
              self.devices_list = [(None, "Default Device")]
+        finally:
+            if p is not None:
+                p.terminate()
 
     def create_widgets(self):
         self.grid_columnconfigure(0, weight=1)
@@ -106,6 +216,11 @@ class HybridTranscriberApp(ctk.CTkToplevel):
         self.status_label = ctk.CTkLabel(top_frame, text="Ready", font=("Arial", 14))
         self.status_label.pack(side="left", padx=10)
 
+        # Shown only once a mic starts losing audio
+        self.audio_loss_label = ctk.CTkLabel(top_frame, text="", text_color="orange", font=("Arial", 12))
+        self.audio_loss_label.pack(side="left", padx=5)
+        self.audio_loss_text = ""
+
         # Mic Selector
         mic_vals = [x[1] for x in self.devices_list]
         self.mic_menu = ctk.CTkOptionMenu(top_frame, values=mic_vals, command=self.change_mic, width=250)
@@ -113,6 +228,12 @@ class HybridTranscriberApp(ctk.CTkToplevel):
         self.mic_menu.pack(side="right", padx=10)
         ctk.CTkLabel(top_frame, text="Mic:").pack(side="right")
 
+        # Optional second mic (e.g. room mic for audience questions)
+        self.second_mic_menu = ctk.CTkOptionMenu(top_frame, values=["None"] + mic_vals, command=self.change_second_mic, width=200)
+        self.second_mic_menu.set("None")
+        self.second_mic_menu.pack(side="right", padx=10)
+        ctk.CTkLabel(top_frame, text="Room Mic:").pack(side="right")
+
         # 2. Level Meter
         self.level_bar = ctk.CTkProgressBar(self, height=15)
         self.level_bar.grid(row=1, column=0, padx=10, pady=(0, 10), sticky="ew")
@@ -130,6 +251,11 @@ class HybridTranscriberApp(ctk.CTkToplevel):
         
         ctk.CTkButton(bot_frame, text="Clear", command=self.clear_text, width=80).pack(side="left", padx=5)
         ctk.CTkButton(bot_frame, text="Save", command=self.save_text, width=80).pack(side="left", padx=5)
+        ctk.CTkButton(bot_frame, text="Live Notes", command=self.show_live_notes, width=100,
+                      state="normal" if self.live_notes else "disabled").pack(side="left", padx=5)
+        ctk.CTkButton(bot_frame, text="Settings", command=self.open_settings, width=90).pack(side="left", padx=5)
+        self.crosstalk_var = ctk.BooleanVar(value=True)
+        ctk.CTkCheckBox(bot_frame, text="Suppress cross-talk between mics", variable=self.crosstalk_var).pack(side="left", padx=10)
         ctk.CTkLabel(bot_frame, text="Mode: Hybrid (Vosk Real-time -> Whisper Correction)", text_color="gray").pack(side="right", padx=10)
 
     def change_mic(self, choice):
@@ -138,6 +264,14 @@ class HybridTranscriberApp(ctk.CTkToplevel):
                 self.selected_mic_index = idx
                 print(f"Selected Mic Index: {idx}")
 
+    def change_second_mic(self, choice):
+        self.second_mic_enabled = choice != "None"
+        self.second_mic_index = None
+        for idx, name in self.devices_list:
+            if name == choice:
+                self.second_mic_index = idx
+        print(f"Room Mic: {choice}")
+
     def toggle_recording(self):
         if self.is_recording:
             self.stop_recording()
@@ -145,195 +279,186 @@ class HybridTranscriberApp(ctk.CTkToplevel):
             self.start_recording()
 
     def start_recording(self):
+        # The last recording's threads must be gone before new ones share the model and devices
+        if self.session and self.session.busy():
+            self.status_label.configure(text="Still finishing the last recording...")
+            return
+        # Pick up model changes made in Settings since the last recording
+        self.load_vosk_model()
+        if self.whisper_model_key not in (None, (self.WHISPER_BACKEND, self.WHISPER_MODEL_SIZE)):
+            with self.whisper_lock:
+                self.whisper_model = None
         if not self.vosk_model:
-            messagebox.showerror("Error", "Vosk model not found! Please run download_models.py")
+            messagebox.showerror("Error", "Vosk model not found! Please run: python model_manager.py prefetch")
             return
+        if self.whisper_model is None:
+            backend = BACKENDS.get(self.WHISPER_BACKEND)
+            self.whisper_model_path = backend and self.models.local_path(backend.model_kind, self.WHISPER_MODEL_SIZE)
+            if not self.whisper_model_path:
+                messagebox.showerror("Error", f"Whisper model '{self.WHISPER_MODEL_SIZE}' ({self.WHISPER_BACKEND}) is not downloaded.\n"
+                                              "Please run: python model_manager.py prefetch")
+                return
 
         self.is_recording = True
         self.record_btn.configure(text="Stop Recording", fg_color="red")
         self.status_label.configure(text="Initializing Whisper...")
-        
-        # Clear queues
-        with self.audio_queue.mutex: self.audio_queue.queue.clear()
-        with self.whisper_queue.mutex: self.whisper_queue.queue.clear()
-
-        # Start Threads
-        self.capture_thread = threading.Thread(target=self.audio_capture_loop)
-        self.vosk_thread = threading.Thread(target=self.vosk_processing_loop)
-        self.whisper_thread = threading.Thread(target=self.whisper_processing_loop)
-        
-        self.capture_thread.start()
-        self.vosk_thread.start()
-        self.whisper_thread.start()
+
+        # One capture + VAD/Vosk pipeline per mic, all feeding one Whisper worker
+        self.scheduler = FairSegmentScheduler(suppress_crosstalk=self.crosstalk_var.get())
+        self.session = RecordingSession(self.scheduler, self.emit)
+        devices = [(self.selected_mic_index, "Main")]
+        if self.second_mic_enabled:
+            devices.append((self.second_mic_index, "Room"))
+
+        feature_stream = self.new_feature_stream if self.STREAM_FEATURES else None
+
+        self.sources = [
+            CaptureSource(index, label, self.vosk_model, self.scheduler, self.emit, self.session.capturing,
+                          self.SAMPLE_RATE, self.FRAME_DURATION_MS,
+                          meter=self.meter_queue.put if i == 0 else None, budget=self.core_budget,
+                          feature_stream=feature_stream, segmenter_options=self.settings.segmenter_options(),
+                          max_queued_frames=self.settings.audio.max_queued_frames)
+            for i, (index, label) in enumerate(devices)
+        ]
+        gate = None
+        if self.WHISPER_SKIP_CONFIDENCE is not None:
+            gate = ConfidenceGate(self.WHISPER_SKIP_CONFIDENCE, self.WHISPER_SKIP_AVG_CONFIDENCE)
+        language, tracker = self.WHISPER_LANGUAGE, None
+        if language == "auto":
+            language, tracker = None, (lambda: LanguageTracker(self.WHISPER_LANGUAGES))
+        self.whisper_worker = WhisperWorker(self.load_whisper_model, self.scheduler, self.emit,
+                                            self.session.transcribing, language=language, gate=gate,
+                                            budget=self.core_budget, language_tracker=tracker)
+
+        self.session.start(self.sources, self.whisper_worker)
 
     def stop_recording(self):
+        """Stop capture now; queued sentences finish in the background (see session_stopped)"""
         self.is_recording = False
-        self.record_btn.configure(text="Start Recording", fg_color="#2CC985") # Default green-ish
-        self.status_label.configure(text="Stopped")
+        self.record_btn.configure(text="Stopping...", state="disabled")
         self.level_bar.set(0)
+        threading.Thread(target=self.session.stop, daemon=True).start()
+
+    def session_stopped(self):
+        self.record_btn.configure(text="Start Recording", fg_color="#2CC985", state="normal") # Default green-ish
+        status = "Stopped"
+        if self.whisper_worker and self.whisper_worker.gate:
+            stats = self.whisper_worker.stats
+            total = stats['skipped'] + stats['whisper_calls'] - stats['deferred_decoded']
+            if total:
+                status += f" (Whisper skipped for {stats['skipped']}/{total} segments)"
+        if self.session.abandoned:
+            status += f" - {self.session.abandoned} queued sentences not transcribed"
+        if self.session.busy():
+            print("Warning: a pipeline thread did not exit in time")
+        self.status_label.configure(text=status)
+
+    def release_models(self):
+        """Free Whisper and Vosk now rather than leaving them to the garbage collector"""
+        with self.whisper_lock:
+            if self.whisper_model is not None:
+                self.whisper_model.release()
+            self.whisper_model = None
+            self.whisper_model_key = None
+        self.vosk_model = None
+        self.vosk_model_path = None
+        gc.collect()
 
-    def audio_capture_loop(self):
-        """Captures raw audio from PyAudio"""
-        try:
-            p = pyaudio.PyAudio()
-            stream = p.open(format=pyaudio.paInt16,
-                            channels=1,
-                            rate=self.SAMPLE_RATE,
-                            input=True,
-                            input_device_index=self.selected_mic_index,
-                            frames_per_buffer=self.FRAME_SIZE)
-            
-            self.display_queue.put(("status", "Listening..."))
-            
-            while self.is_recording:
-                data = stream.read(self.FRAME_SIZE, exception_on_overflow=False)
-                self.audio_queue.put(data)
-                
-                # Update Meter
-                try:
-                    # Simple RMS
-                    audio_np = np.frombuffer(data, dtype=np.int16)
-                    volume = np.linalg.norm(audio_np) / 1000
-                    self.meter_queue.put(min(volume / 50, 1.0))
-                except:
-                    pass
-
-            stream.stop_stream()
-            stream.close()
-            p.terminate()
-        except Exception as e:
-            self.display_queue.put(("error", f"Mic Error: {e}"))
-            self.stop_recording()
-
-    def vosk_processing_loop(self):
-        """Processes buffer for Real-time (Vosk) + VAD segmentation"""
-        rec = vosk.KaldiRecognizer(self.vosk_model, self.SAMPLE_RATE)
-        
-        # Audio buffer for the current sentence
-        sentence_buffer = collections.deque()
-        silence_frames = 0
-        is_speech = False
-        
-        while self.is_recording or not self.audio_queue.empty():
-            try:
-                data = self.audio_queue.get(timeout=1)
-            except queue.Empty:
-                continue
-
-            # 1. VAD Check
-            try:
-                is_active = self.vad.is_speech(data, self.SAMPLE_RATE)
-            except:
-                is_active = False # Frame size mismatch safety
-
-            # 2. Vosk Recognition (Streaming)
-            if rec.AcceptWaveform(data):
-                result = json.loads(rec.Result())
-                text = result.get("text", "")
-                if text:
-                    # Final result from Vosk -> Send to display as "Draft"
-                    # But we actually rely on VAD for true sentence end to trigger Whisper
-                    # So we show this as gray text
-                    self.display_queue.put(("draft", text))
-            else:
-                partial = json.loads(rec.PartialResult())
-                p_text = partial.get("partial", "")
-                if p_text:
-                    self.display_queue.put(("partial", p_text))
-
-            # 3. Buffer Management for Whisper
-            if is_active:
-                if not is_speech:
-                    is_speech = True # Speech started
-                    # Potential logic: Start new buffer, maybe rewind a bit?
-                silence_frames = 0
-                sentence_buffer.append(data)
-            else:
-                if is_speech:
-                    silence_frames += 1
-                    sentence_buffer.append(data) # Keep trailing silence
-                    
-                    # Sentence End Detection logic
-                    # 25 frames * 20ms = 500ms silence
-                    if silence_frames > 25: 
-                        is_speech = False
-                        
-                        # Package up for Whisper
-                        full_audio = b"".join(sentence_buffer)
-                        # Only transcribe if decent length (>0.5s)
-                        if len(full_audio) > self.SAMPLE_RATE * 1: # 1 sec bytes (2 bytes per sample)
-                            self.whisper_queue.put(full_audio)
-                            self.display_queue.put(("status", "Improving accuracy..."))
-                        
-                        sentence_buffer.clear()
-                else: 
-                     # Keeping a ring buffer of silence before speech could be good, 
-                     # but for simplicity we ignore pure silence.
-                     pass
-
-    def whisper_processing_loop(self):
-        """Loads Whisper (once) and processes sentences for accuracy"""
-        if not whisper:
-            self.display_queue.put(("error", "Whisper module not found."))
-            return
-
-        try:
+    def close(self):
+        """Window close: stop without draining in the background, release models once unused, then destroy"""
+        self.is_recording = False
+        if self.session and self.session.busy():
+            # A decode in progress can outlast stop(); the worker then frees the models as its loop exits
+            self.whisper_worker.on_exit = self.release_models
+            threading.Thread(target=self.close_session, args=(self.session,), daemon=True).start()
+        else:
+            self.release_models()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        self.destroy()
+
+    def close_session(self, session):
+        """Background half of close(): stop, then free the models unless the worker still holds them"""
+        if session.stop(drain_timeout=0) or session.worker.join(0):
+            self.release_models()
+
+    def emit(self, msg_type, content, source=None):
+        """Thread-safe hand-off of pipeline events to the UI loop"""
+        self.display_queue.put((msg_type, content, source))
+
+    def load_whisper_model(self):
+        """Load Whisper once and share it between recordings and mics"""
+        with self.whisper_lock:
             if self.whisper_model is None:
-                self.display_queue.put(("status", "Loading Whisper Model (takes time)..."))
-                self.whisper_model = whisper.load_model(self.WHISPER_MODEL_SIZE)
-                self.display_queue.put(("status", "Whisper Ready. Listening..."))
-        except Exception as e:
-            self.display_queue.put(("error", f"Whisper Load Error: {e}"))
-            return
-
-        while self.is_recording or not self.whisper_queue.empty():
-            try:
-                audio_bytes = self.whisper_queue.get(timeout=1)
-            except queue.Empty:
-                continue
-
-            try:
-                # Convert bytes to float32 numpy array for Whisper
-                audio_np = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
-                
-                # Transcribe
-                result = self.whisper_model.transcribe(audio_np, fp16=False, language="english")
-                text = result.get("text", "").strip()
-                
-                if text:
-                    self.display_queue.put(("final", text))
-                    
-            except Exception as e:
-                 print(f"Whisper Error: {e}")
+                try:
+                    backend = create_backend(self.WHISPER_BACKEND, self.whisper_model_path,
+                                             threads=self.core_budget.whisper)
+                except (ImportError, ValueError) as e:
+                    self.emit("error", f"Whisper backend unavailable: {e}")
+                    return None
+                self.emit("status", "Loading Whisper Model (takes time)...")
+                self.whisper_model = backend.load()
+                self.whisper_model_key = (self.WHISPER_BACKEND, self.WHISPER_MODEL_SIZE)
+                self.emit("status", "Whisper Ready. Listening...")
+        return self.whisper_model
+
+    def new_feature_stream(self):
+        """LogMelStream shaped for the loaded model; None (decode from audio) until it loads or if it takes none"""
+        model = self.whisper_model
+        n_mels = model.n_mels if model is not None else None
+        return LogMelStream(n_mels) if n_mels else None
+
+    def source_tag(self, source):
+        """Label prefix for transcript lines, only when more than one mic is live"""
+        return f"[{source}] " if source and len(self.sources) > 1 else ""
 
     def update_ui_loop(self):
         # 1. Handle Display Updates
         try:
             while not self.display_queue.empty():
-                msg_type, content = self.display_queue.get_nowait()
+                msg_type, content, source = self.display_queue.get_nowait()
                 
                 if msg_type == "status":
                     self.status_label.configure(text=content)
                 elif msg_type == "error":
                     messagebox.showerror("Error", content)
+                    # A mic failure, or Whisper failing to load (nothing would drain the segment
+                    # queue), stops every pipeline; reset the controls to match
+                    if self.is_recording:
+                        self.stop_recording()
                 elif msg_type == "partial":
                     # For partial, we might want to update a "preview" line
                     # For now, let's just log or ignoring to avoid cluttering if we have draft
                     pass 
                 elif msg_type == "draft":
                     # Vosk final result (Gray)
-                    self.insert_text(f"[Draft] {content}\n", "gray")
+                    self.insert_text(f"[Draft] {self.source_tag(source)}{content}\n", "gray")
                 elif msg_type == "final":
-                    # Whisper result (Black/White - Final)
-                    # Ideally, we would replace the "Draft" line. 
-                    # For simplicity, we append "Final".
-                    # A better UI would replace the last line if it was draft.
-                    self.replace_last_draft_with_final(content)
+                    # Whisper result (Black/White - Final) replaces that mic's last draft
+                    self.replace_last_draft_with_final(content, source)
+                    if self.live_notes:
+                        self.live_notes.add_segment(content)
+                elif msg_type == "correction":
+                    # Whisper re-decoded a segment we had finalized from Vosk's draft
+                    self.correct_final(*content)
+                elif msg_type == "language":
+                    code, probability = content
+                    self.status_label.configure(text=f"Language: {language_name(code)} ({probability:.0%})")
+                elif msg_type == "capture_stats":
+                    self.log_capture_session(content, source)
+                elif msg_type == "session":
+                    if content == DRAINING:
+                        self.status_label.configure(text="Finishing the last sentences...")
+                    elif content == STOPPED:
+                        self.session_stopped()
 
         except queue.Empty:
             pass
 
-        # 2. Handle Meter
+        # 2. Lost audio counters
+        self.update_audio_loss()
+
+        # 3. Handle Meter
         try:
             if not self.meter_queue.empty():
                 level = self.meter_queue.get_nowait()
@@ -343,21 +468,42 @@ class HybridTranscriberApp(ctk.CTkToplevel):
 
         self.after(50, self.update_ui_loop)
 
+    def update_audio_loss(self):
+        overflows = sum(source.stats['overflows'] for source in self.sources)
+        dropped = sum(source.stats['dropped_frames'] for source in self.sources)
+        text = f"⚠ Audio lost: {overflows} overflows, {dropped} frames dropped" if overflows or dropped else ""
+        if text != self.audio_loss_text:
+            self.audio_loss_text = text
+            self.audio_loss_label.configure(text=text)
+
+    def log_capture_session(self, summary, source):
+        """Append one line per mic and recording to the capture log"""
+        record = dict(summary, source=source, ended=datetime.now().isoformat(timespec='seconds'))
+        print(f"Capture ({source}): {summary['frames']} frames at {summary['rate']} Hz x{summary['channels']}, "
+              f"{summary['overflows']} overflows, {summary['dropped_frames']} dropped")
+        try:
+            os.makedirs(os.path.dirname(CAPTURE_LOG), exist_ok=True)
+            with open(CAPTURE_LOG, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"Could not write capture log: {e}")
+
     def insert_text(self, text, tag):
         self.textbox.configure(state="normal")
         self.textbox.insert(ctk.END, text, tag)
         self.textbox.see(ctk.END)
         self.textbox.configure(state="disabled")
 
-    def replace_last_draft_with_final(self, text):
+    def replace_last_draft_with_final(self, text, source=None):
         self.textbox.configure(state="normal")
         
         # Check if last line is draft
         # This is tricky in Tkinter without strict line management
         # Simplified: Just append Final with a timestamp like a chat
         
+        tag = self.source_tag(source)
         timestamp = datetime.now().strftime("%H:%M:%S")
-        final_line = f"[{timestamp}] {text}\n"
+        final_line = f"[{timestamp}] {tag}{text}\n"
         
         # Delete the last "Draft" line if possible? 
         # A simple approach: Just print Final text clearly.
@@ -365,7 +511,7 @@ class HybridTranscriberApp(ctk.CTkToplevel):
         
         # Search for last [Draft] and delete it?
         # Let's search back from end
-        last_index = self.textbox.search("[Draft]", "end-1c", backwards=True)
+        last_index = self.textbox.search(f"[Draft] {tag}", "end-1c", backwards=True)
         if last_index:
             line_end = self.textbox.index(f"{last_index} lineend + 1c")
             self.textbox.delete(last_index, line_end)
@@ -374,17 +520,79 @@ class HybridTranscriberApp(ctk.CTkToplevel):
         self.textbox.see(ctk.END)
         self.textbox.configure(state="disabled")
 
+    def correct_final(self, old_text, new_text):
+        """Swap a finalized line for Whisper's re-decode in the textbox, live notes and saved transcript"""
+        self.textbox.configure(state="normal")
+        index = self.textbox.search(old_text, "end-1c", backwards=True)
+        if index:
+            self.textbox.delete(index, f"{index} + {len(old_text)}c")
+            self.textbox.insert(index, new_text, "black")
+        self.textbox.configure(state="disabled")
+        if not index:
+            return
+        if self.live_notes:
+            self.live_notes.correct_segment(old_text, new_text)
+        if self.saved_transcript:
+            # Saved before Whisper caught up: keep the file and its index entry in step
+            self.write_transcript(self.saved_transcript)
+
     def clear_text(self):
         self.textbox.configure(state="normal")
         self.textbox.delete("1.0", ctk.END)
         self.textbox.configure(state="disabled")
+        self.saved_transcript = None
+        if self.live_notes:
+            self.live_notes.start_live_session()
+
+    def show_live_notes(self):
+        """Open (or refresh) a window with the study guide built so far"""
+        if not self.live_notes:
+            return
+
+        if self.notes_window is None or not self.notes_window.winfo_exists():
+            self.notes_window = ctk.CTkToplevel(self)
+            self.notes_window.title("NoteForge - Live Notes")
+            self.notes_window.geometry("800x700")
+            self.notes_window.grid_columnconfigure(0, weight=1)
+            self.notes_window.grid_rowconfigure(0, weight=1)
+
+            self.notes_textbox = ctk.CTkTextbox(self.notes_window, font=("Consolas", 12), wrap="word")
+            self.notes_textbox.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+            ctk.CTkButton(self.notes_window, text="Refresh", command=self.show_live_notes, width=100).grid(row=1, column=0, pady=(0, 10))
+
+        notes = self.live_notes.render_live_notes()
+        self.notes_textbox.configure(state="normal")
+        self.notes_textbox.delete("1.0", ctk.END)
+        self.notes_textbox.insert("1.0", notes)
+        self.notes_textbox.configure(state="disabled")
+        self.notes_window.focus()
 
     def save_text(self):
-        text = self.textbox.get("1.0", ctk.END)
         filename = filedialog.asksaveasfilename(defaultextension=".txt")
         if filename:
+            self.write_transcript(filename)
+            self.saved_transcript = filename
+
+    def write_transcript(self, filename):
+        text = self.textbox.get("1.0", ctk.END)
+        try:
             with open(filename, "w") as f:
                 f.write(text)
+        except OSError as e:
+            print(f"Save Error: {e}")
+            return
+        self.index_transcript(filename, text)
+
+    def index_transcript(self, filename, text):
+        """Add the saved transcript to the local search index"""
+        if not TranscriptIndex:
+            return
+        try:
+            topic_for = self.live_notes.topic_of if self.live_notes else None
+            with TranscriptIndex() as index:
+                index.index_transcript(filename, text, topic_for=topic_for)
+        except Exception as e:
+            print(f"Index Error: {e}")
 
 if __name__ == "__main__":
     # Create a dummy root for standalone execution
@@ -395,7 +603,7 @@ if __name__ == "__main__":
     
     # Ensure closing the app closes the script
     def on_close():
-        app.destroy()
+        app.close()
         root.destroy()
         os._exit(0) # Force exit threads
         
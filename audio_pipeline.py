@@ -0,0 +1,957 @@
+import json
+import time
+import queue
+import threading
+import collections
+import numpy as np
+
+from whisper_backends import pcm_to_float, language_code, SAMPLE_RATE
+from audio_resample import CaptureConverter
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
+
+try:
+    import webrtcvad
+except ImportError:
+    webrtcvad = None
+
+try:
+    import vosk
+except ImportError:
+    vosk = None
+
+
+# Devices with more inputs are opened with this many channels and downmixed
+MAX_CAPTURE_CHANNELS = 2
+# Frames buffered between capture and Vosk before new audio is dropped (10 s)
+MAX_QUEUED_FRAMES = 500
+
+# RecordingSession states, in order
+IDLE, WARMING, RECORDING, DRAINING, STOPPED = "idle", "warming", "recording", "draining", "stopped"
+
+
+class Segment:
+    """A closed stretch of speech from one source, ready for Whisper"""
+    __slots__ = ('source', 'audio', 'start', 'end', 'energy', 'draft', 'words', 'features')
+
+    def __init__(self, source, audio, start, end, draft="", words=None, features=None):
+        self.source = source
+        self.audio = audio          # int16 mono PCM bytes at the pipeline sample rate
+        self.start = start          # time.monotonic() of the first frame
+        self.end = end              # time.monotonic() of the last frame
+        self.draft = draft          # Vosk text for the same audio
+        self.words = words or []    # Vosk (word, confidence) pairs
+        self.features = features    # Whisper log-mel computed during speech, if streamed
+        samples = np.frombuffer(audio, dtype=np.int16).astype(np.float32)
+        self.energy = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    @property
+    def min_confidence(self):
+        return min((conf for _, conf in self.words), default=0.0)
+
+    @property
+    def avg_confidence(self):
+        return sum(conf for _, conf in self.words) / len(self.words) if self.words else 0.0
+
+    def overlap(self, other):
+        """Seconds during which both segments were open"""
+        return max(0.0, min(self.end, other.end) - max(self.start, other.start))
+
+
+class SpeechSegmenter:
+    """VAD + streaming Vosk over 20 ms frames from one source.
+
+    process_frame returns display events ("partial"/"draft", text) and
+    closes a Segment once the speaker has been silent long enough.
+
+    After `vosk_idle_frames` non-speech frames in a row Vosk stops being
+    fed (and is reset); the last `preroll_frames` frames are replayed into
+    it when speech returns so the first word isn't clipped. Set
+    `vosk_idle_frames=None` to feed every frame.
+
+    `feature_stream`, if given, is called at the start of each utterance
+    to create a LogMelStream that is fed every buffered frame, so Whisper's
+    features are ready when the segment closes.
+
+    The tuning parameters can be changed between frames with `configure`.
+    """
+
+    def __init__(self, vosk_model, source="Mic", sample_rate=16000, frame_ms=20,
+                 vad_mode=2, silence_frames=25, min_segment_s=1.0,
+                 vosk_idle_frames=50, preroll_frames=15, feature_stream=None):
+        self.source = source
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.silence_frames_limit = silence_frames  # 25 frames * 20ms = 500ms silence
+        self.min_segment_bytes = int(sample_rate * 2 * min_segment_s)
+
+        self.vad = webrtcvad.Vad(vad_mode)
+        self.rec = vosk.KaldiRecognizer(vosk_model, sample_rate) if vosk_model else None
+        if self.rec:
+            # Word-level confidences drive the Whisper skip policy
+            self.rec.SetWords(True)
+
+        # Vosk output for the current sentence
+        self.segment_words = []
+        self.segment_text = []
+
+        # Silence gating: Vosk sleeps through long pauses
+        self.vosk_idle_frames = vosk_idle_frames
+        self.preroll = collections.deque(maxlen=preroll_frames)
+        self.nonspeech_run = 0
+        self.vosk_gated = False
+        self.frames_seen = 0
+        self.frames_to_vosk = 0
+
+        # Audio buffer (and streamed features) for the current sentence
+        self.feature_stream = feature_stream
+        self.features = None
+        self.sentence_buffer = collections.deque()
+        self.silence_frames = 0
+        self.is_speech = False
+        self.speech_start = None
+        self.last_frame_time = None
+
+    def configure(self, vad_mode=None, silence_frames=None, min_segment_s=None, preroll_frames=None,
+                  **options):
+        """Change tuning parameters (same names as __init__); `vosk_idle_frames` may be set to None"""
+        if vad_mode is not None:
+            self.vad.set_mode(vad_mode)
+        if silence_frames is not None:
+            self.silence_frames_limit = silence_frames
+        if min_segment_s is not None:
+            self.min_segment_bytes = int(self.sample_rate * 2 * min_segment_s)
+        if preroll_frames is not None and preroll_frames != self.preroll.maxlen:
+            self.preroll = collections.deque(self.preroll, maxlen=preroll_frames)
+        if 'vosk_idle_frames' in options:
+            self.vosk_idle_frames = options['vosk_idle_frames']
+
+    def process_frame(self, data, timestamp=None):
+        """Feed one frame of int16 PCM; returns (events, segment or None)"""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        self.last_frame_time = timestamp
+        events = []
+
+        # 1. VAD Check
+        try:
+            is_active = self.vad.is_speech(data, self.sample_rate)
+        except Exception:
+            is_active = False  # Frame size mismatch safety
+
+        # 2. Vosk Recognition (Streaming), skipped during long pauses
+        self.frames_seen += 1
+        self.nonspeech_run = 0 if is_active else self.nonspeech_run + 1
+        if self.rec:
+            if self.vosk_gated:
+                if is_active:
+                    # Speech is back: wake Vosk up with the pre-roll first
+                    self.vosk_gated = False
+                    for frame in self.preroll:
+                        self._feed_vosk(frame, events)
+                    self.preroll.clear()
+                    self._feed_vosk(data, events)
+                else:
+                    self.preroll.append(data)
+            else:
+                self._feed_vosk(data, events)
+                if (self.vosk_idle_frames is not None and not self.is_speech
+                        and self.nonspeech_run >= self.vosk_idle_frames):
+                    # The segment has long been closed and finalized; drop whatever
+                    # Vosk made of the silence since
+                    self.rec.Reset()
+                    self.vosk_gated = True
+
+        # 3. Buffer Management for Whisper
+        segment = None
+        if is_active:
+            if not self.is_speech:
+                self.is_speech = True  # Speech started
+                self.speech_start = timestamp
+                # Anything Vosk finalized before this belongs to earlier audio
+                self.segment_words = []
+                self.segment_text = []
+                self.features = self.feature_stream() if self.feature_stream else None
+            self.silence_frames = 0
+            self._buffer(data)
+        elif self.is_speech:
+            self.silence_frames += 1
+            self._buffer(data)  # Keep trailing silence
+
+            # Sentence End Detection
+            if self.silence_frames > self.silence_frames_limit:
+                segment = self._close_segment(timestamp, events)
+
+        return events, segment
+
+    def flush(self):
+        """Close whatever speech is buffered (e.g. when recording stops); returns (events, segment)"""
+        events = []
+        if self.is_speech and self.sentence_buffer:
+            return events, self._close_segment(self.last_frame_time or time.monotonic(), events)
+        return events, None
+
+    def _buffer(self, data):
+        self.sentence_buffer.append(data)
+        if self.features is not None:
+            self.features.feed(data)
+
+    def _feed_vosk(self, data, events):
+        self.frames_to_vosk += 1
+        if self.rec.AcceptWaveform(data):
+            # Final result from Vosk -> shown as "Draft" until Whisper finishes;
+            # the true sentence end comes from VAD
+            self._take_vosk_result(self.rec.Result(), events)
+        else:
+            partial = json.loads(self.rec.PartialResult())
+            p_text = partial.get("partial", "")
+            if p_text:
+                events.append(("partial", p_text))
+
+    def _take_vosk_result(self, result_json, events):
+        result = json.loads(result_json)
+        text = result.get("text", "")
+        if text:
+            events.append(("draft", text))
+            self.segment_text.append(text)
+            self.segment_words.extend((w.get("word", ""), w.get("conf", 0.0)) for w in result.get("result", []))
+
+    def _close_segment(self, timestamp, events):
+        self.is_speech = False
+        full_audio = b"".join(self.sentence_buffer)
+        self.sentence_buffer.clear()
+        self.silence_frames = 0
+
+        # Make Vosk finish the utterance so its words line up with this segment
+        if self.rec:
+            self._take_vosk_result(self.rec.FinalResult(), events)
+        draft, words = " ".join(self.segment_text), self.segment_words
+        self.segment_text, self.segment_words = [], []
+        features, self.features = self.features, None
+
+        # Only transcribe if decent length
+        if len(full_audio) > self.min_segment_bytes:
+            return Segment(self.source, full_audio, self.speech_start, timestamp, draft, words,
+                           features.finish() if features is not None else None)
+        return None
+
+
+class FairSegmentScheduler:
+    """Hands segments from several sources to one Whisper worker, round-robin.
+
+    With `suppress_crosstalk`, segments from different sources that overlap
+    in time are treated as the same utterance picked up by two mics: only
+    the loudest is transcribed. To see both copies, a segment is held for
+    `crosstalk_hold` seconds after it closes before it becomes eligible.
+    """
+
+    def __init__(self, suppress_crosstalk=False, overlap_ratio=0.5, crosstalk_hold=0.4):
+        self.suppress_crosstalk = suppress_crosstalk
+        self.overlap_ratio = overlap_ratio
+        self.crosstalk_hold = crosstalk_hold
+
+        self._queues = collections.OrderedDict()    # source -> deque of segments
+        self._cond = threading.Condition()
+        self._recent = collections.deque(maxlen=16) # recently dispatched segments
+        self._woken = False
+        self.suppressed = 0
+
+    def add_source(self, source):
+        with self._cond:
+            self._queues.setdefault(source, collections.deque())
+
+    def remove_source(self, source):
+        """Forget a source and drop anything it still had queued"""
+        with self._cond:
+            self._queues.pop(source, None)
+
+    def put(self, segment):
+        with self._cond:
+            self._queues.setdefault(segment.source, collections.deque()).append(segment)
+            self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return sum(len(q) for q in self._queues.values())
+
+    def clear(self):
+        with self._cond:
+            for q in self._queues.values():
+                q.clear()
+            self._recent.clear()
+
+    def wake(self):
+        """Make the waiting (or next) get() return None at once if nothing is ready"""
+        with self._cond:
+            self._woken = True
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Next segment to transcribe, or None on timeout or wake()"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                segment, wait = self._next_ready()
+                if segment is not None:
+                    return segment
+                if self._woken:
+                    self._woken = False
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                if wait is not None:
+                    remaining = wait if remaining is None else min(wait, remaining)
+                self._cond.wait(remaining)
+
+    def _is_crosstalk(self, a, b):
+        if a.source == b.source:
+            return False
+        shorter = min(a.duration, b.duration)
+        return shorter > 0 and a.overlap(b) >= self.overlap_ratio * shorter
+
+    def _next_ready(self):
+        """(segment, None) if one is ready, else (None, seconds until one might be)"""
+        now = time.monotonic()
+        wait = None
+        multi = self.suppress_crosstalk and len(self._queues) > 1
+
+        for _ in range(len(self._queues)):
+            source, q = next(iter(self._queues.items()))
+            # Rotate so the next call starts with the following source
+            self._queues.move_to_end(source)
+            if not q:
+                continue
+
+            segment = q[0]
+            if multi:
+                hold = segment.end + self.crosstalk_hold - now
+                if hold > 0:
+                    wait = hold if wait is None else min(wait, hold)
+                    continue
+                q.popleft()
+
+                # Already transcribed a louder copy from another mic
+                if any(self._is_crosstalk(segment, r) and r.energy >= segment.energy for r in self._recent):
+                    self.suppressed += 1
+                    return self._next_ready()
+
+                # Drop quieter copies still waiting in other queues
+                for other_source, other_q in self._queues.items():
+                    for other in list(other_q):
+                        if self._is_crosstalk(segment, other):
+                            if other.energy > segment.energy:
+                                self.suppressed += 1
+                                return self._next_ready()
+                            other_q.remove(other)
+                            self.suppressed += 1
+            else:
+                q.popleft()
+
+            self._recent.append(segment)
+            return segment, None
+
+        return None, wait
+
+
+class CaptureSource:
+    """One input device: a PyAudio capture thread feeding a VAD/Vosk thread.
+
+    Display events are reported through `emit(msg_type, content, source)`;
+    closed segments go to the shared scheduler. An optional CoreBudget
+    places the two threads on their share of the CPU.
+
+    The device is opened at its native rate and channel count and
+    converted to 16 kHz mono here. PortAudio hands each buffer to a
+    callback, whose status flags report host overflows without losing the
+    buffer that carried them. `stats` counts frames delivered, host
+    overflows and frames dropped; a ("capture_stats", summary, label)
+    event is emitted when capture ends.
+
+    `segmenter_options` are passed to SpeechSegmenter; `configure` changes
+    them, or the queue limit, while the source is running.
+
+    Clearing `running` stops capture within one frame: the device is
+    closed, PortAudio terminated and an end marker queued, so the Vosk
+    thread blocks on the queue instead of polling it and exits once it has
+    flushed the last segment. `join` waits for both threads.
+    """
+
+    def __init__(self, device_index, label, vosk_model, scheduler, emit, running,
+                 sample_rate=16000, frame_ms=20, meter=None, budget=None, feature_stream=None,
+                 segmenter_options=None, max_queued_frames=MAX_QUEUED_FRAMES):
+        self.device_index = device_index
+        self.label = label
+        self.vosk_model = vosk_model
+        self.scheduler = scheduler
+        self.emit = emit
+        self.running = running          # threading.Event, cleared to stop
+        self.meter = meter              # optional callable(level 0..1)
+        self.budget = budget
+        self.feature_stream = feature_stream    # optional LogMelStream factory for SpeechSegmenter
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+
+        self.segmenter_options = dict(segmenter_options or {})
+        self.options_version = 0        # bumped by configure(); the Vosk thread re-applies on change
+
+        self.audio_queue = queue.Queue(maxsize=max_queued_frames)    # (timestamp, raw frame bytes)
+        self.native_rate = None
+        self.native_channels = None
+        self.stats = {'frames': 0, 'overflows': 0, 'dropped_frames': 0}
+        self.capture_thread = None
+        self.vosk_thread = None
+
+        scheduler.add_source(label)
+
+    def start(self):
+        # Named so per-thread CPU shows up per mic in the metrics
+        self.capture_thread = threading.Thread(target=self.audio_capture_loop, name=f"capture-{self.label}",
+                                               daemon=True)
+        self.vosk_thread = threading.Thread(target=self.vosk_processing_loop, name=f"vosk-{self.label}", daemon=True)
+        self.capture_thread.start()
+        self.vosk_thread.start()
+
+    def join(self, timeout=None):
+        """Wait (in total at most `timeout` seconds) for both threads; True if they finished"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self.threads():
+            thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+        return not any(thread.is_alive() for thread in self.threads())
+
+    def threads(self):
+        return [t for t in (self.capture_thread, self.vosk_thread) if t is not None]
+
+    def open_stream(self, p, callback):
+        """Open a callback stream at the device's native rate and channel count, falling back to 16 kHz mono"""
+        try:
+            if self.device_index is None:
+                info = p.get_default_input_device_info()
+            else:
+                info = p.get_device_info_by_index(self.device_index)
+            rate = int(info.get('defaultSampleRate') or self.sample_rate)
+            channels = max(1, min(int(info.get('maxInputChannels') or 1), MAX_CAPTURE_CHANNELS))
+        except (IOError, OSError):
+            rate, channels = self.sample_rate, 1
+
+        attempts = [(rate, channels)]
+        if (rate, channels) != (self.sample_rate, 1):
+            attempts.append((self.sample_rate, 1))
+        for attempt, (rate, channels) in enumerate(attempts):
+            frames_per_buffer = int(rate * self.frame_ms / 1000)
+            try:
+                stream = p.open(format=pyaudio.paInt16,
+                                channels=channels,
+                                rate=rate,
+                                input=True,
+                                input_device_index=self.device_index,
+                                frames_per_buffer=frames_per_buffer,
+                                stream_callback=callback)
+                break
+            except (IOError, OSError):
+                if attempt == len(attempts) - 1:
+                    raise
+        self.native_rate, self.native_channels = rate, channels
+        return stream
+
+    def audio_capture_loop(self):
+        """Captures raw audio from PyAudio at the device's native format and converts it to 16 kHz mono"""
+        if self.budget:
+            self.budget.enter("capture")
+        # Host buffers from the PortAudio callback; each holds one frame's worth of audio
+        buffers = queue.Queue(maxsize=self.audio_queue.maxsize)
+
+        def on_audio(data, frame_count, time_info, status):
+            if status & pyaudio.paInputOverflow:
+                # Audio before this buffer was lost by the host; the buffer itself is intact
+                self.stats['overflows'] += 1
+            try:
+                buffers.put_nowait(data)
+            except queue.Full:
+                self.stats['dropped_frames'] += 1
+            return None, pyaudio.paContinue
+
+        p = stream = None
+        try:
+            p = pyaudio.PyAudio()
+            stream = self.open_stream(p, on_audio)
+            converter = CaptureConverter(self.native_rate, self.native_channels, self.sample_rate, self.frame_size)
+
+            self.emit("status", "Listening...", self.label)
+
+            while self.running.is_set():
+                try:
+                    data = buffers.get(timeout=self.frame_ms / 1000)
+                except queue.Empty:
+                    continue
+
+                for frame in converter.feed(data):
+                    self.stats['frames'] += 1
+                    try:
+                        self.audio_queue.put_nowait((time.monotonic(), frame))
+                    except queue.Full:
+                        # Vosk has fallen too far behind; lose audio rather than memory
+                        self.stats['dropped_frames'] += 1
+
+                # Update Meter
+                if self.meter:
+                    try:
+                        # Simple RMS
+                        audio_np = np.frombuffer(data, dtype=np.int16)
+                        volume = np.linalg.norm(audio_np) / 1000 * np.sqrt(self.frame_size / max(1, len(audio_np)))
+                        self.meter(min(volume / 50, 1.0))
+                    except Exception:
+                        pass
+        except Exception as e:
+            self.emit("error", f"Mic Error ({self.label}): {e}", self.label)
+            self.running.clear()
+        finally:
+            # Release the device now, on every path, rather than when the objects are collected
+            try:
+                if stream is not None:
+                    stream.stop_stream()
+                    stream.close()
+            except Exception:
+                pass
+            if p is not None:
+                p.terminate()
+            self.end_of_audio()
+            self.emit("capture_stats", self.capture_summary(), self.label)
+
+    def end_of_audio(self):
+        """Queue the end marker for the Vosk thread, even past a full queue"""
+        with self.audio_queue.mutex:
+            self.audio_queue.queue.append(None)
+            self.audio_queue.unfinished_tasks += 1
+            self.audio_queue.not_empty.notify()
+
+    def configure(self, max_queued_frames=None, **segmenter_options):
+        """Apply new limits/thresholds to the running pipeline"""
+        if max_queued_frames is not None:
+            with self.audio_queue.mutex:
+                self.audio_queue.maxsize = max_queued_frames
+        if segmenter_options:
+            self.segmenter_options.update(segmenter_options)
+            self.options_version += 1
+
+    def capture_summary(self):
+        return dict(self.stats, device=self.device_index, rate=self.native_rate, channels=self.native_channels)
+
+    def vosk_processing_loop(self):
+        """Processes buffer for Real-time (Vosk) + VAD segmentation"""
+        if self.budget:
+            self.budget.enter("vosk")
+        segmenter = SpeechSegmenter(self.vosk_model, self.label, self.sample_rate, self.frame_ms,
+                                    feature_stream=self.feature_stream, **self.segmenter_options)
+        applied = self.options_version
+
+        while True:
+            item = self.audio_queue.get()
+            if item is None:
+                break   # capture has ended
+            timestamp, data = item
+
+            if applied != self.options_version:
+                applied = self.options_version
+                segmenter.configure(**self.segmenter_options)
+
+            events, segment = segmenter.process_frame(data, timestamp)
+            for msg_type, text in events:
+                self.emit(msg_type, text, self.label)
+            if segment:
+                self.scheduler.put(segment)
+                self.emit("status", "Improving accuracy...", self.label)
+
+        events, segment = segmenter.flush()
+        for msg_type, text in events:
+            self.emit(msg_type, text, self.label)
+        if segment:
+            self.scheduler.put(segment)
+
+
+class ConfidenceGate:
+    """Decides when Vosk's draft is good enough to skip the Whisper pass.
+
+    A segment is confident when it has at least `min_words` words, none
+    below `min_word_conf` and an average of at least `min_avg_conf`. With
+    `defer`, confident segments are still re-decoded by Whisper later,
+    once no new segment has arrived for `idle_after` seconds. `language`
+    is the Vosk model's language; in multilingual sessions the gate is
+    bypassed while another language is being spoken.
+    """
+
+    def __init__(self, min_word_conf=0.85, min_avg_conf=0.93, min_words=3, defer=True,
+                 idle_after=2.0, max_deferred=50, language="en"):
+        self.language = language_code(language)
+        self.min_word_conf = min_word_conf
+        self.min_avg_conf = min_avg_conf
+        self.min_words = min_words
+        self.defer = defer
+        self.idle_after = idle_after
+        self.max_deferred = max_deferred
+
+    def is_confident(self, segment):
+        return (
+            len(segment.words) >= self.min_words
+            and segment.min_confidence >= self.min_word_conf
+            and segment.avg_confidence >= self.min_avg_conf
+        )
+
+
+class LanguageTracker:
+    """Session language for bilingual (e.g. Vietnamese/English) lectures.
+
+    Segments are decoded in `default` (the first candidate unless given)
+    until `detect_after_s` seconds of speech have been heard; language ID
+    then runs once on that speech and the result is cached for the session
+    and passed to every decode. It is re-checked after `recheck_every_s`
+    seconds of further speech, or when Whisper's average log-probability
+    over the last `window` segments drops below `low_confidence`.
+    Probabilities are restricted to `candidates`, so a short aside cannot
+    switch the session to a third language. `per_segment` runs language
+    ID on every segment instead, for comparison.
+    """
+
+    def __init__(self, candidates=("english", "vietnamese"), detect_after_s=6.0, recheck_every_s=120.0,
+                 low_confidence=-0.9, window=3, min_recheck_s=2.0, per_segment=False, sample_rate=16000,
+                 default=None):
+        self.candidates = tuple(language_code(c) for c in candidates)
+        self.default = language_code(default) if default else self.candidates[0]
+        self.detect_after_s = detect_after_s
+        self.recheck_every_s = recheck_every_s
+        self.low_confidence = low_confidence
+        self.min_recheck_s = min_recheck_s
+        self.per_segment = per_segment
+        self.sample_rate = sample_rate
+
+        self.language = None        # cached session language (ISO code)
+        self.probability = 0.0
+        self.detections = 0
+        self._heard = []            # speech before the session language is settled
+        self._heard_s = 0.0
+        self._since_check = 0.0
+        self._recent = collections.deque(maxlen=window)
+        self._recheck = False
+
+    def language_for(self, model, audio, features=None):
+        """Language to decode this segment with, running language ID only when due"""
+        duration = len(audio) / self.sample_rate
+        if self.per_segment:
+            return self._detect(model, audio, features)
+
+        if self.language is None:
+            self._heard.append(audio)
+            self._heard_s += duration
+            if self._heard_s < self.detect_after_s:
+                return self.default
+            heard, self._heard = np.concatenate(self._heard)[:30 * self.sample_rate], []
+            return self._detect(model, heard, None)
+
+        self._since_check += duration
+        if (self._recheck or self._since_check >= self.recheck_every_s) and duration >= self.min_recheck_s:
+            self._detect(model, audio, features)
+        return self.language
+
+    def report(self, confidence):
+        """Feed back Whisper's average log-probability for the segment just decoded"""
+        if confidence is None or self.language is None:
+            return
+        self._recent.append(confidence)
+        if len(self._recent) == self._recent.maxlen and sum(self._recent) / len(self._recent) < self.low_confidence:
+            self._recheck = True
+
+    def _detect(self, model, audio, features):
+        probs = model.detect_language(audio, features)
+        self.detections += 1
+        scores = {code: probs.get(code, 0.0) for code in self.candidates}
+        total = sum(scores.values())
+        if not total:
+            # Backend without language ID: settle on the first candidate
+            scores, total = {self.language or self.candidates[0]: 0.0}, 1.0
+        best = max(scores, key=scores.get)
+        self.language, self.probability = best, scores[best] / total
+        self._since_check = 0.0
+        self._recheck = False
+        self._recent.clear()
+        return best
+
+
+def normalize_text(text):
+    return " ".join("".join(c for c in text.lower() if c.isalnum() or c.isspace() or c == "'").split())
+
+
+class WhisperWorker:
+    """Single Whisper thread shared by every source.
+
+    `load_model()` returns the (cached, loaded) WhisperBackend; results are reported
+    as ("final", text, source) through `emit`. `on_done(segment, text)`, if
+    given, is called after every segment, including ones that produced no
+    text.
+
+    With a ConfidenceGate, confident segments are promoted from draft to
+    final without Whisper. Deferred ones are re-decoded when idle and, if
+    Whisper disagrees, reported as ("correction", (draft, text), source).
+
+    With `language_tracker` (a factory such as `LanguageTracker`, for
+    multilingual mode) each source gets its own tracker, which supplies the
+    decode language instead of `language`; changes are reported as status.
+
+    The thread sleeps in `scheduler.get` until a segment arrives; whoever
+    clears `running` calls `scheduler.wake()`. Segments still queued are
+    then transcribed until `drain_deadline` (time.monotonic(), None = no
+    limit) passes. `on_ready()` is called once the model has loaded and
+    `on_exit()` when the thread is done with it, even after a failed load.
+    """
+
+    def __init__(self, load_model, scheduler, emit, running, language="english", on_done=None, gate=None,
+                 budget=None, language_tracker=None):
+        self.load_model = load_model
+        self.scheduler = scheduler
+        self.emit = emit
+        self.running = running
+        self.language = language
+        self.on_done = on_done
+        self.gate = gate
+        self.budget = budget
+        self.language_tracker = language_tracker
+        self.trackers = {}
+        self.thread = None
+        self.on_ready = None
+        self.on_exit = None
+        self.drain_deadline = None
+
+        self.deferred = collections.deque(maxlen=gate.max_deferred if gate else None)
+        self.stats = {'whisper_calls': 0, 'skipped': 0, 'deferred_decoded': 0, 'corrections': 0,
+                      'streamed_features': 0, 'segments': 0, 'audio_seconds': 0.0, 'decode_seconds': 0.0}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.whisper_processing_loop, name="whisper", daemon=True)
+        self.thread.start()
+
+    def join(self, timeout=None):
+        """True once the thread has finished (or never started)"""
+        if self.thread is not None:
+            self.thread.join(timeout)
+        return self.thread is None or not self.thread.is_alive()
+
+    def draining(self):
+        """Still transcribing segments queued before `running` was cleared"""
+        if self.drain_deadline is not None and time.monotonic() >= self.drain_deadline:
+            return False
+        return self.scheduler.pending() > 0
+
+    def whisper_processing_loop(self):
+        """Loads Whisper (once) and processes sentences for accuracy"""
+        try:
+            if self.budget:
+                self.budget.enter("whisper")
+            try:
+                model = self.load_model()
+            except Exception as e:
+                self.emit("error", f"Whisper Load Error: {e}", None)
+                return
+            if model is None:
+                return
+            if self.on_ready:
+                self.on_ready()
+
+            while self.running.is_set() or self.draining():
+                # Wait for work; only the deferred backlog needs an idle timer
+                timeout = self.gate.idle_after if self.deferred and self.running.is_set() else None
+                segment = self.scheduler.get(timeout=timeout)
+                if segment is None:
+                    # Idle: catch up on one deferred segment at a time
+                    if self.deferred and self.running.is_set():
+                        self.decode_deferred(model, self.deferred.popleft())
+                    continue
+
+                self.stats['segments'] += 1
+                if self.gate and self.gate_applies(segment.source) and self.gate.is_confident(segment):
+                    self.promote_draft(segment)
+                else:
+                    self.transcribe(model, segment)
+        finally:
+            if self.on_exit:
+                self.on_exit()
+
+    def tracker(self, source):
+        if self.language_tracker is None:
+            return None
+        if source not in self.trackers:
+            self.trackers[source] = self.language_tracker()
+        return self.trackers[source]
+
+    def forget(self, source):
+        self.trackers.pop(source, None)
+
+    def gate_applies(self, source):
+        # Vosk only understands its own language
+        tracker = self.tracker(source)
+        if tracker is None:
+            return language_code(self.language) in (None, self.gate.language)
+        return tracker.language == self.gate.language
+
+    def promote_draft(self, segment):
+        """Use Vosk's confident draft as the final text"""
+        self.stats['skipped'] += 1
+        self.emit("final", segment.draft, segment.source)
+        if self.gate.defer:
+            self.deferred.append(segment)
+        if self.on_done:
+            self.on_done(segment, segment.draft)
+
+    def decode_deferred(self, model, segment):
+        text = self.run_whisper(model, segment)
+        self.stats['deferred_decoded'] += 1
+        if text and normalize_text(text) != normalize_text(segment.draft):
+            self.stats['corrections'] += 1
+            self.emit("correction", (segment.draft, text), segment.source)
+
+    def run_whisper(self, model, segment):
+        start = time.perf_counter()
+        try:
+            audio = pcm_to_float(segment.audio)
+            features = segment.features
+            if features is not None and features.shape[0] != model.n_mels:
+                features = None
+            tracker = self.tracker(segment.source)
+            language = self.decode_language(model, tracker, audio, features, segment.source)
+
+            self.stats['whisper_calls'] += 1
+            if features is not None:
+                # Features were computed while the speaker talked; only encode/decode is left
+                self.stats['streamed_features'] += 1
+                text = model.transcribe_features(features, audio, language)
+            else:
+                text = model.transcribe(audio, language)
+            if tracker:
+                tracker.report(model.last_confidence)
+            return text
+        except Exception as e:
+            print(f"Whisper Error: {e}")
+            return ""
+        finally:
+            # Real-time factor for the metrics: time in Whisper (language ID included) per second of audio
+            self.stats['decode_seconds'] += time.perf_counter() - start
+            self.stats['audio_seconds'] += len(segment.audio) / 2 / SAMPLE_RATE
+
+    def decode_language(self, model, tracker, audio, features, source):
+        if tracker is None:
+            return self.language
+        before = tracker.language
+        language = tracker.language_for(model, audio, features)
+        if tracker.language != before:
+            self.emit("language", (tracker.language, tracker.probability), source)
+        return language
+
+    def transcribe(self, model, segment):
+        text = self.run_whisper(model, segment)
+        if text:
+            self.emit("final", text, segment.source)
+        if self.on_done:
+            self.on_done(segment, text)
+
+
+class RecordingSession:
+    """One recording's capture sources and Whisper worker, started and stopped as a unit.
+
+    States go idle -> warming (threads started, Whisper loading) ->
+    recording (Whisper ready) -> draining (capture stopped, queued
+    segments finishing) -> stopped (threads joined), and are reported as
+    ("session", state, None) through `emit`.
+
+    Sources must be built with `capturing` as their running event and the
+    worker with `transcribing`. `stop` ends capture first so every Vosk
+    thread can flush its last segment, gives Whisper at most
+    `drain_timeout` seconds for what is queued, drops the rest and joins
+    every thread; until `busy()` is False no new session should start.
+    """
+
+    def __init__(self, scheduler, emit):
+        self.scheduler = scheduler
+        self.emit = emit
+        self.capturing = threading.Event()
+        self.transcribing = threading.Event()
+        self.sources = []
+        self.worker = None
+        self.state = IDLE
+        self.abandoned = 0      # segments still queued when the drain timed out
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def _set_state(self, state):
+        self.state = state
+        self.emit("session", state, None)
+
+    def start(self, sources, worker):
+        with self._lock:
+            if self.state != IDLE:
+                raise RuntimeError(f"Session already {self.state}")
+            self.sources, self.worker = sources, worker
+            self._set_state(WARMING)
+        worker.on_ready = self._ready
+        self.capturing.set()
+        self.transcribing.set()
+        for source in sources:
+            source.start()
+        worker.start()
+
+    def _ready(self):
+        with self._lock:
+            if self.state == WARMING:
+                self._set_state(RECORDING)
+
+    def stop(self, drain_timeout=5.0, join_timeout=2.0):
+        """Stop and release everything; returns True if every thread has exited.
+
+        Safe to call from several threads: later callers wait for the
+        first one to finish.
+        """
+        with self._lock:
+            stopping = self.state in (DRAINING, STOPPED)
+            if self.state == IDLE:
+                self._set_state(STOPPED)
+                self._stopped.set()
+                return True
+            if not stopping:
+                self._set_state(DRAINING)
+        if stopping:
+            self._stopped.wait(drain_timeout + 2 * join_timeout)
+            return not self.busy()
+
+        deadline = time.monotonic() + drain_timeout
+        self.worker.drain_deadline = deadline
+        self.capturing.clear()
+        # Capture notices within a frame; each Vosk thread then flushes its last segment
+        for source in self.sources:
+            source.join(join_timeout)
+
+        self.transcribing.clear()
+        self.scheduler.wake()
+        self.worker.join(max(0.0, deadline - time.monotonic()) + join_timeout)
+
+        self.abandoned = self.scheduler.pending()
+        self.scheduler.clear()
+        for source in self.sources:
+            self.scheduler.remove_source(source.label)
+        with self._lock:
+            self._set_state(STOPPED)
+        self._stopped.set()
+        return not self.busy()
+
+    def threads(self):
+        threads = [t for source in self.sources for t in source.threads()]
+        if self.worker and self.worker.thread:
+            threads.append(self.worker.thread)
+        return threads
+
+    def busy(self):
+        """True while any of this session's threads is still alive"""
+        return any(thread.is_alive() for thread in self.threads())
@@ -0,0 +1,130 @@
+import wave
+from math import gcd
+
+import numpy as np
+
+SAMPLE_RATE = 16000     # what Vosk and Whisper expect
+
+
+def downmix(pcm, channels):
+    """Interleaved int16 PCM bytes -> float32 mono samples (channel average)"""
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def design_lowpass(up, down, zero_crossings=16, cutoff=0.9, beta=8.6):
+    """Kaiser-windowed sinc prototype for resampling by up/down, at the upsampled rate.
+
+    The passband ends at `cutoff` of the lower Nyquist frequency; the
+    filter has `zero_crossings` sinc lobes on each side.
+    """
+    factor = max(up, down)
+    fc = 0.5 * cutoff / factor                      # cycles per upsampled sample
+    taps_per_phase = int(np.ceil(2 * zero_crossings * factor / cutoff / up))
+    length = taps_per_phase * up
+    t = np.arange(length) - (length - 1) / 2
+    h = np.sinc(2 * fc * t) * np.kaiser(length, beta)
+    # Unity DC gain after zero-stuffing by `up`
+    h *= up / h.sum()
+    return h, taps_per_phase
+
+
+class StreamingResampler:
+    """Polyphase FIR resampler for a continuous stream of float32 mono samples.
+
+    Chunks of any size can be fed to `process`; output is continuous across
+    chunk boundaries (history is carried over) and delayed by half the
+    filter length.
+    """
+
+    def __init__(self, in_rate, out_rate=SAMPLE_RATE, zero_crossings=16, cutoff=0.9):
+        g = gcd(int(in_rate), int(out_rate))
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.up = self.out_rate // g
+        self.down = self.in_rate // g
+
+        h, self.taps = design_lowpass(self.up, self.down, zero_crossings, cutoff)
+        # phases[p, j] = h[p + j*up]: the taps applied to x[i - j] for output phase p
+        self.phases = h.reshape(self.taps, self.up).T.astype(np.float32).copy()
+        self.offsets = np.arange(self.taps)
+
+        self.history = np.zeros(self.taps - 1, dtype=np.float32)
+        self.consumed = 0       # input samples seen before the current chunk
+        self.next_m = 0         # upsampled index of the next output sample
+
+    def process(self, samples):
+        samples = np.asarray(samples, dtype=np.float32)
+        if not len(samples):
+            return np.zeros(0, dtype=np.float32)
+        buf = np.concatenate((self.history, samples))
+        end = self.consumed + len(samples)          # one past the last available input index
+
+        ms = np.arange(self.next_m, end * self.up, self.down)
+        if len(ms):
+            inputs = ms // self.up
+            phase = ms % self.up
+            # buf index of x[i] is i - consumed + taps - 1
+            index = (inputs - self.consumed + self.taps - 1)[:, None] - self.offsets[None, :]
+            out = np.einsum('kj,kj->k', self.phases[phase], buf[index])
+            self.next_m = int(ms[-1]) + self.down
+        else:
+            out = np.zeros(0, dtype=np.float32)
+
+        self.history = buf[len(buf) - (self.taps - 1):] if self.taps > 1 else buf[:0]
+        self.consumed = end
+        return out
+
+
+class CaptureConverter:
+    """Native device PCM (any rate, any channel count) -> 16 kHz mono int16 frames"""
+
+    def __init__(self, in_rate, channels, out_rate=SAMPLE_RATE, frame_samples=320):
+        self.channels = channels
+        self.passthrough = int(in_rate) == out_rate and channels == 1
+        self.resampler = None if int(in_rate) == out_rate else StreamingResampler(in_rate, out_rate)
+        self.frame_bytes = frame_samples * 2
+        self.pending = bytearray()
+
+    def feed(self, pcm):
+        """Convert one device buffer; returns a list of complete frames (bytes)"""
+        if self.passthrough:
+            self.pending.extend(pcm)
+        else:
+            samples = downmix(pcm, self.channels)
+            if self.resampler:
+                samples = self.resampler.process(samples)
+            self.pending.extend(np.clip(np.round(samples), -32768, 32767).astype(np.int16).tobytes())
+
+        frames = []
+        offset = 0
+        while len(self.pending) - offset >= self.frame_bytes:
+            frames.append(bytes(self.pending[offset:offset + self.frame_bytes]))
+            offset += self.frame_bytes
+        del self.pending[:offset]
+        return frames
+
+
+def load_wav(path, rate=SAMPLE_RATE, chunk_s=10.0):
+    """Read a 16-bit PCM WAV file as mono int16 PCM bytes at `rate`"""
+    with wave.open(path, 'rb') as wf:
+        channels = wf.getnchannels()
+        width = wf.getsampwidth()
+        in_rate = wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+
+    if width != 2:
+        raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+    if in_rate == rate and channels == 1:
+        return frames
+
+    samples = downmix(frames, channels)
+    if in_rate != rate:
+        # In chunks: one call indexes (outputs x taps), too much for a whole lecture at once
+        resampler = StreamingResampler(in_rate, rate)
+        step = int(chunk_s * in_rate)
+        samples = np.concatenate([resampler.process(samples[i:i + step]) for i in range(0, len(samples), step)]
+                                 or [np.zeros(0, dtype=np.float32)])
+    return np.clip(np.round(samples), -32768, 32767).astype(np.int16).tobytes()
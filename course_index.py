@@ -0,0 +1,316 @@
+import os
+import json
+import sqlite3
+import hashlib
+import argparse
+from datetime import datetime
+
+from note_export import SECTION_LIMITS, build_note_document, export_document, render_text
+from sentence_ranking import SentenceRanker
+from study_assistant import LectureNoteGenerator
+
+COURSE_DIR = os.environ.get(
+    "NOTEFORGE_COURSES", os.path.join(os.path.expanduser("~"), ".noteforge", "courses")
+)
+LECTURE_EXTENSIONS = ('.txt', '.pptx')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS lectures (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL,
+    size INTEGER,
+    content_hash TEXT,
+    indexed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS sentences (
+    id INTEGER PRIMARY KEY,
+    lecture_id INTEGER NOT NULL REFERENCES lectures(id) ON DELETE CASCADE,
+    position INTEGER,
+    offset INTEGER,
+    topic TEXT NOT NULL,
+    section TEXT NOT NULL,
+    keywords TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sentences_section ON sentences(topic, section);
+CREATE INDEX IF NOT EXISTS sentences_lecture ON sentences(lecture_id);
+CREATE TABLE IF NOT EXISTS selections (
+    topic TEXT NOT NULL,
+    section TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (topic, section, rank)
+);
+CREATE TABLE IF NOT EXISTS dirty (
+    topic TEXT NOT NULL,
+    section TEXT NOT NULL,
+    PRIMARY KEY (topic, section)
+);
+"""
+
+
+class CourseIndex:
+    """Persistent index of classified sentences for every lecture of a course.
+
+    Each lecture is extracted and classified once; its sentences are
+    stored per topic/section in SQLite and only re-processed when the
+    file's content changes. The sentences each topic/section keeps in the
+    study guide are stored too, and only the sections touched by a changed
+    lecture are re-ranked, so rendering the course guide reads just the
+    selected sentences however many lectures the course has.
+    """
+
+    def __init__(self, db_path, generator=None, rank_sentences=True):
+        self.db_path = db_path
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.generator = generator or LectureNoteGenerator(rank_sentences=rank_sentences)
+        self.rank_sentences = rank_sentences
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        self._check_classifier()
+
+    @classmethod
+    def for_course(cls, name, **options):
+        return cls(os.path.join(COURSE_DIR, f"{name}.db"), **options)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def name(self):
+        return os.path.splitext(os.path.basename(self.db_path))[0]
+
+    def _check_classifier(self):
+        # Sentences classified with other topic keywords are stale: re-process everything
+        fingerprint = hashlib.sha256(json.dumps(self.generator.topic_keywords, sort_keys=True).encode('utf-8')).hexdigest()
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'classifier'").fetchone()
+        if row and row[0] == fingerprint:
+            return
+        with self.conn:
+            self.conn.execute("DELETE FROM selections")
+            self.conn.execute("DELETE FROM dirty")
+            self.conn.execute("DELETE FROM sentences")
+            self.conn.execute("UPDATE lectures SET content_hash = NULL")
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('classifier', ?)", (fingerprint,))
+
+    # --- Updating ---
+
+    def add_lecture(self, path, cancel_token=None):
+        """Index one lecture file; returns False if it has not changed since it was last indexed"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.conn.execute("SELECT id, mtime, size, content_hash FROM lectures WHERE path = ?", (path,)).fetchone()
+        if row and row[3] and row[1] == stat.st_mtime and row[2] == stat.st_size:
+            return False
+
+        content_hash = file_hash(path)
+        if row and row[3] == content_hash:
+            # Touched but unchanged
+            with self.conn:
+                self.conn.execute("UPDATE lectures SET mtime = ?, size = ? WHERE id = ?", (stat.st_mtime, stat.st_size, row[0]))
+            return False
+
+        store = self.generator.classify_file(path, cancel_token=cancel_token)
+        rows = []
+        for topic, section, ids in store.entries():
+            for sentence_id in ids:
+                record = store.record(sentence_id)
+                rows.append((sentence_id, record.offset, topic, section, ",".join(record.keywords),
+                             store.sentence(sentence_id)))
+
+        with self.conn:
+            if row:
+                lecture_id = row[0]
+                self._mark_dirty(lecture_id)
+                self.conn.execute("DELETE FROM sentences WHERE lecture_id = ?", (lecture_id,))
+                self.conn.execute(
+                    "UPDATE lectures SET mtime = ?, size = ?, content_hash = ?, indexed_at = ? WHERE id = ?",
+                    (stat.st_mtime, stat.st_size, content_hash, datetime.now().isoformat(timespec='seconds'), lecture_id)
+                )
+            else:
+                lecture_id = self.conn.execute(
+                    "INSERT INTO lectures (path, mtime, size, content_hash, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                    (path, stat.st_mtime, stat.st_size, content_hash, datetime.now().isoformat(timespec='seconds'))
+                ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO sentences (lecture_id, position, offset, topic, section, keywords, text) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((lecture_id,) + r for r in rows)
+            )
+            self._mark_dirty(lecture_id)
+        return True
+
+    def remove_lecture(self, path):
+        path = os.path.abspath(path)
+        row = self.conn.execute("SELECT id FROM lectures WHERE path = ?", (path,)).fetchone()
+        if not row:
+            return False
+        with self.conn:
+            self._mark_dirty(row[0])
+            self.conn.execute("DELETE FROM lectures WHERE id = ?", (row[0],))
+        return True
+
+    def sync(self, paths, progress_callback=None, cancel_token=None):
+        """Index the given files and folders; lectures under a synced folder that are gone are dropped.
+
+        Returns (changed, unchanged, removed) counts.
+        """
+        files, folders = collect_lectures(paths)
+        changed = 0
+        for i, path in enumerate(files):
+            if cancel_token:
+                cancel_token.check()
+            if progress_callback:
+                progress_callback(f"Indexing {os.path.basename(path)}...", i / max(len(files), 1))
+            changed += self.add_lecture(path, cancel_token=cancel_token)
+
+        present = set(files)
+        removed = 0
+        for (path,) in self.conn.execute("SELECT path FROM lectures").fetchall():
+            if path not in present and any(path.startswith(folder + os.sep) for folder in folders):
+                removed += self.remove_lecture(path)
+
+        self.refresh()
+        if progress_callback:
+            progress_callback("Complete!", 1.0)
+        return changed, len(files) - changed, removed
+
+    def _mark_dirty(self, lecture_id):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO dirty (topic, section) SELECT DISTINCT topic, section FROM sentences WHERE lecture_id = ?",
+            (lecture_id,)
+        )
+
+    def refresh(self):
+        """Re-select the sentences of every topic/section touched since the last refresh"""
+        keys = self.conn.execute("SELECT topic, section FROM dirty").fetchall()
+        for topic, section in keys:
+            sentences = [text for (text,) in self.conn.execute(
+                "SELECT s.text FROM sentences s JOIN lectures l ON l.id = s.lecture_id "
+                "WHERE s.topic = ? AND s.section = ? ORDER BY l.path, s.position",
+                (topic, section)
+            )]
+            limit = SECTION_LIMITS[section]
+            if self.rank_sentences:
+                chosen = SentenceRanker().select(sentences, limit)
+            else:
+                chosen = sentences[:limit]
+            with self.conn:
+                self.conn.execute("DELETE FROM selections WHERE topic = ? AND section = ?", (topic, section))
+                self.conn.executemany(
+                    "INSERT INTO selections (topic, section, rank, text) VALUES (?, ?, ?, ?)",
+                    ((topic, section, rank, text) for rank, text in enumerate(chosen))
+                )
+                self.conn.execute("DELETE FROM dirty WHERE topic = ? AND section = ?", (topic, section))
+        return len(keys)
+
+    # --- Rendering ---
+
+    def build_document(self):
+        """Render tree for the whole course, read from the stored selections"""
+        self.refresh()
+        selected = {}
+        for topic, section, text in self.conn.execute("SELECT topic, section, text FROM selections ORDER BY topic, section, rank"):
+            selected.setdefault(topic, {}).setdefault(section, []).append(text)
+
+        # Topics in the generator's keyword order, like a single lecture's notes
+        order = {topic: i for i, topic in enumerate(self.generator.topic_keywords)}
+        topics = {topic: selected[topic] for topic in sorted(selected, key=lambda t: order.get(t, len(order)))}
+        document = build_note_document(topics, self.name)
+        document.title = "COURSE NOTES - STUDY GUIDE"
+        lectures = self.conn.execute("SELECT COUNT(*) FROM lectures").fetchone()[0]
+        document.source = f"{self.name} ({lectures} lectures)"
+        return document
+
+    def render_notes(self):
+        return render_text(self.build_document())
+
+    def export(self, *filenames):
+        """Export the course guide to one or more files (.pdf, .md, .html, .docx, .txt)"""
+        export_document(self.build_document(), *filenames)
+
+    def lectures(self):
+        return [path for (path,) in self.conn.execute("SELECT path FROM lectures ORDER BY path")]
+
+    def stats(self):
+        lectures = self.conn.execute("SELECT COUNT(*) FROM lectures").fetchone()[0]
+        sentences = self.conn.execute("SELECT COUNT(DISTINCT lecture_id || ':' || position) FROM sentences").fetchone()[0]
+        return {'lectures': lectures, 'sentences': sentences}
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 ** 2), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def collect_lectures(paths):
+    """(lecture files, synced folders) for a mix of files and folders"""
+    files, folders = [], []
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            folders.append(path)
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in names if n.lower().endswith(LECTURE_EXTENSIONS))
+        else:
+            files.append(path)
+    return sorted(set(files)), folders
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build one study guide from every lecture of a course")
+    parser.add_argument("--course", default="default", help=f"Course name (index stored in {COURSE_DIR})")
+    parser.add_argument("--db", help="Index database path (overrides --course)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="Index lecture files or folders; only changed files are re-processed")
+    add.add_argument("paths", nargs="+")
+
+    remove = sub.add_parser("remove", help="Drop lectures from the course")
+    remove.add_argument("paths", nargs="+")
+
+    render = sub.add_parser("render", help="Write the course study guide")
+    render.add_argument("outputs", nargs="*", help=".pdf/.md/.html/.docx/.txt files (default: print text)")
+
+    sub.add_parser("list", help="Show indexed lectures")
+    args = parser.parse_args()
+
+    index = CourseIndex(args.db) if args.db else CourseIndex.for_course(args.course)
+    with index:
+        if args.command == "add":
+            changed, unchanged, removed = index.sync(args.paths)
+            print(f"Indexed {changed} changed lecture(s), {unchanged} unchanged, {removed} removed.")
+        elif args.command == "remove":
+            removed = sum(1 for path in args.paths if index.remove_lecture(path))
+            index.refresh()
+            print(f"Removed {removed} lecture(s).")
+        elif args.command == "render":
+            if args.outputs:
+                index.export(*args.outputs)
+            else:
+                print(index.render_notes())
+        elif args.command == "list":
+            for path in index.lectures():
+                print(path)
+            stats = index.stats()
+            print(f"{stats['lectures']} lectures, {stats['sentences']} sentences")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,12 @@ except ImportError as e:
     print(f"Error importing study gui: {e}")
     StudyAssistantGUI = None
 
+try:
+    from settings_gui import SettingsWindow
+except ImportError as e:
+    print(f"Error importing settings: {e}")
+    SettingsWindow = None
+
 class MainMenuApp(ctk.CTk): 
     def __init__(self):
         super().__init__()
@@ -157,7 +163,8 @@ class MainMenuApp(ctk.CTk):
         self.current_child = HybridTranscriberApp(self)
         
         def on_child_close():
-            self.current_child.destroy()
+            # Stops recording and frees the mic and the models before the window goes
+            self.current_child.close()
             self.current_child = None
             self.deiconify()
             
@@ -180,13 +187,16 @@ class MainMenuApp(ctk.CTk):
         self.current_child.focus()
 
     def open_settings(self):
-        toplevel = ctk.CTkToplevel(self)
-        toplevel.geometry("300x200")
-        toplevel.title("Settings")
-        toplevel.focus()
-        toplevel.attributes("-topmost", True) # Đảm bảo hiện lên trên ảnh nền
-        ctk.CTkLabel(toplevel, text="Settings", font=("Bold", 20)).pack(pady=20)
-        ctk.CTkLabel(toplevel, text="Global config coming soon...").pack(pady=10)
+        if SettingsWindow is None:
+            print("Settings module not found")
+            return
+        # Saved as this machine's profile, and pushed into the transcriber if it is open
+        SettingsWindow(self, on_apply=self.apply_settings)
+
+    def apply_settings(self, settings):
+        if HybridTranscriberApp is not None and isinstance(self.current_child, HybridTranscriberApp):
+            return self.current_child.apply_settings(settings)
+        return []
 
     def exit_app(self):
         self.quit()
@@ -0,0 +1,333 @@
+import os
+import json
+import shutil
+import hashlib
+import zipfile
+import argparse
+import tempfile
+from urllib.parse import urljoin, urlparse
+
+import requests
+from tqdm import tqdm
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_PATH = os.path.join(ROOT, "models.json")
+MIRROR = os.environ.get("NOTEFORGE_MODEL_MIRROR")   # directory or base URL holding the archives
+
+CHUNK_SIZE = 1024 ** 2
+MARKER = ".noteforge-model.json"
+
+
+class ModelError(Exception):
+    pass
+
+
+class ModelEntry:
+    """One manifest entry: where to fetch it, its checksum and where it is installed"""
+
+    def __init__(self, name, spec, root=ROOT):
+        self.name = name
+        self.kind = spec['kind']
+        self.model = spec.get('model')
+        self.url = spec.get('url')
+        self.sha256 = spec.get('sha256')
+        self.path = os.path.join(root, spec['path'])
+        self.default = spec.get('default', False)
+
+    @property
+    def filename(self):
+        return os.path.basename(urlparse(self.url).path) if self.url else os.path.basename(self.path)
+
+    @property
+    def marker_path(self):
+        return os.path.join(self.path, MARKER) if self.kind != 'whisper' else self.path + ".json"
+
+    def installed(self):
+        return os.path.exists(self.path) and os.path.exists(self.marker_path)
+
+
+class ModelManager:
+    """Downloads, verifies and locates the models listed in models.json.
+
+    Archives are fetched in 1 MB chunks into a .part file that is resumed
+    with an HTTP Range request after an interruption, checked against the
+    manifest's SHA-256 and only then unpacked into place. faster-whisper
+    folders are checked with `sha256_tree`. Entries without a pinned
+    SHA-256 are refused unless they are defaults or `allow_unverified` is
+    set (see `check_digest`). With a mirror
+    (a directory or base URL holding the same file names) nothing is
+    fetched from the internet.
+    """
+
+    def __init__(self, manifest_path=MANIFEST_PATH, mirror=MIRROR, root=ROOT, allow_unverified=False):
+        with open(manifest_path, encoding='utf-8') as f:
+            self.entries = {name: ModelEntry(name, spec, root) for name, spec in json.load(f)['models'].items()}
+        self.mirror = mirror
+        self.root = root
+        self.allow_unverified = allow_unverified
+        self.download_dir = os.path.join(root, "models", ".downloads")
+
+    def entry(self, name):
+        try:
+            return self.entries[name]
+        except KeyError:
+            raise ModelError(f"Unknown model '{name}' (see models.json)") from None
+
+    def defaults(self):
+        return [e for e in self.entries.values() if e.default]
+
+    def find(self, kind, model=None):
+        """Installed entry of `kind` (and Whisper size), or None"""
+        for entry in self.entries.values():
+            if entry.kind == kind and (model is None or entry.model == model) and entry.installed():
+                return entry
+        return None
+
+    def local_path(self, kind, model=None):
+        """Path to hand to the loader, or None if it still needs to be prefetched"""
+        entry = self.find(kind, model)
+        return entry.path if entry else None
+
+    # --- Fetching ---
+
+    def source_for(self, entry):
+        if not self.mirror:
+            if not entry.url:
+                raise ModelError(f"{entry.name}: no download URL in models.json")
+            return entry.url
+        if os.path.isdir(self.mirror):
+            path = os.path.join(self.mirror, entry.filename)
+            if not os.path.exists(path):
+                raise ModelError(f"{entry.name}: '{entry.filename}' not found in mirror {self.mirror}")
+            return path
+        return urljoin(self.mirror.rstrip("/") + "/", entry.filename)
+
+    def fetch(self, entry, progress=True):
+        """Download (or copy) the archive for `entry`; returns its local path once verified"""
+        os.makedirs(self.download_dir, exist_ok=True)
+        target = os.path.join(self.download_dir, entry.filename)
+        if os.path.exists(target) and self.verify_file(entry, target):
+            return target
+
+        source = self.source_for(entry)
+        partial = target + ".part"
+        if os.path.exists(source):
+            shutil.copyfile(source, partial)
+        else:
+            self._download(source, partial, progress)
+
+        if not self.verify_file(entry, partial):
+            os.remove(partial)
+            raise ModelError(f"{entry.name}: SHA-256 mismatch for {source}")
+        os.replace(partial, target)
+        return target
+
+    def _download(self, url, partial, progress):
+        done = os.path.getsize(partial) if os.path.exists(partial) else 0
+        headers = {'Range': f"bytes={done}-"} if done else {}
+        with requests.get(url, stream=True, headers=headers, timeout=30) as response:
+            if response.status_code == 416:
+                return  # already complete
+            response.raise_for_status()
+            if done and response.status_code != 206:
+                done = 0  # server ignored the range; start over
+            total = int(response.headers.get('content-length', 0)) + done
+
+            with open(partial, 'ab' if done else 'wb') as file, tqdm(
+                desc=os.path.basename(url), total=total or None, initial=done,
+                unit='iB', unit_scale=True, unit_divisor=1024, disable=not progress,
+            ) as bar:
+                for data in response.iter_content(chunk_size=CHUNK_SIZE):
+                    bar.update(file.write(data))
+
+    def verify_file(self, entry, path):
+        return self.check_digest(entry, sha256_file(path))
+
+    def check_digest(self, entry, digest):
+        """True if `digest` matches the pinned SHA-256.
+
+        Without a pinned digest, default models (which `prefetch` installs
+        on a clean checkout) are installed with a warning; any other entry
+        raises ModelError unless `allow_unverified` is set.
+        """
+        if entry.sha256:
+            return digest == entry.sha256
+        if not (entry.default or self.allow_unverified):
+            raise ModelError(f"{entry.name}: no pinned SHA-256 in models.json (got {digest}); "
+                             f"pin it or pass --allow-unverified")
+        print(f"Warning: {entry.name} is unverified; pin \"sha256\": \"{digest}\" in models.json")
+        return True
+
+    # --- Installing ---
+
+    def install(self, entry, progress=True):
+        """Fetch, verify and unpack one model; a no-op when already installed"""
+        if entry.installed():
+            return entry.path
+        if os.path.exists(entry.path):
+            # e.g. a 'model' folder from the old download script
+            print(f"{entry.name}: {entry.path} exists but is not managed; delete it to re-download")
+            return entry.path
+
+        if entry.kind == 'faster-whisper':
+            return self._install_faster_whisper(entry)
+
+        archive = self.fetch(entry, progress)
+        if entry.kind == 'whisper':
+            os.makedirs(os.path.dirname(entry.path), exist_ok=True)
+            shutil.copyfile(archive, entry.path + ".tmp")
+            os.replace(entry.path + ".tmp", entry.path)
+        else:
+            self._unpack(archive, entry.path)
+        self._write_marker(entry, sha256_file(archive))
+        return entry.path
+
+    def _unpack(self, archive, destination):
+        parent = os.path.dirname(os.path.abspath(destination))
+        os.makedirs(parent, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=parent) as tmp:
+            with zipfile.ZipFile(archive) as zf:
+                zf.extractall(tmp)
+            # Use the archive's single top-level folder as the model, whatever it is called
+            contents = os.listdir(tmp)
+            source = os.path.join(tmp, contents[0]) if len(contents) == 1 and os.path.isdir(os.path.join(tmp, contents[0])) else tmp
+            if os.path.exists(destination):
+                shutil.rmtree(destination)
+            shutil.move(source, destination)
+
+    def _install_faster_whisper(self, entry):
+        try:
+            from faster_whisper.utils import download_model
+        except ImportError:
+            raise ModelError(f"{entry.name}: faster-whisper is not installed") from None
+        # Fetched into a scratch folder and only moved into place once it matches the manifest
+        staging = entry.path + ".part"
+        if os.path.exists(staging):
+            shutil.rmtree(staging)
+        if self.mirror:
+            source = os.path.join(self.mirror, os.path.basename(entry.path))
+            if not os.path.isdir(source):
+                raise ModelError(f"{entry.name}: expected a folder '{source}' in the mirror")
+            shutil.copytree(source, staging)
+        else:
+            download_model(entry.model, output_dir=staging)
+
+        digest = sha256_tree(staging)
+        try:
+            verified = self.check_digest(entry, digest)
+        except ModelError:
+            shutil.rmtree(staging)
+            raise
+        if not verified:
+            shutil.rmtree(staging)
+            raise ModelError(f"{entry.name}: SHA-256 mismatch for the downloaded folder")
+        os.replace(staging, entry.path)
+        self._write_marker(entry, digest)
+        return entry.path
+
+    def _write_marker(self, entry, digest):
+        with open(entry.marker_path, 'w', encoding='utf-8') as f:
+            json.dump({'name': entry.name, 'url': entry.url, 'sha256': digest}, f, indent=2)
+
+    def prefetch(self, names=None, progress=True):
+        """Install the named models (default: the ones marked default); returns failures"""
+        entries = [self.entry(n) for n in names] if names else self.defaults()
+        failures = {}
+        for entry in entries:
+            try:
+                state = "present" if entry.installed() else "installed"
+                self.install(entry, progress)
+                print(f"{entry.name}: {state} ({os.path.relpath(entry.path, self.root)})")
+            except (ModelError, OSError, requests.RequestException, zipfile.BadZipFile) as e:
+                failures[entry.name] = str(e)
+                print(f"{entry.name}: FAILED - {e}")
+        return failures
+
+    def export(self, names, directory, progress=True):
+        """Copy verified archives into `directory` so it can serve as a mirror"""
+        os.makedirs(directory, exist_ok=True)
+        for name in names:
+            entry = self.entry(name)
+            if entry.kind == 'faster-whisper':
+                self.install(entry, progress)
+                shutil.copytree(entry.path, os.path.join(directory, os.path.basename(entry.path)), dirs_exist_ok=True)
+            else:
+                shutil.copyfile(self.fetch(entry, progress), os.path.join(directory, entry.filename))
+            print(f"{name}: exported")
+
+    def verify(self, entry):
+        """Re-check an installed Whisper checkpoint or faster-whisper folder against its checksum"""
+        if not entry.installed() or not entry.sha256:
+            return entry.installed()
+        if entry.kind == 'whisper':
+            return sha256_file(entry.path) == entry.sha256
+        if entry.kind == 'faster-whisper':
+            return sha256_tree(entry.path) == entry.sha256
+        return True
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def sha256_tree(path):
+    """SHA-256 over every file in a folder (relative path and contents), skipping hidden entries"""
+    digest = hashlib.sha256()
+    for folder, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(f for f in files if not f.startswith(".")):
+            full = os.path.join(folder, name)
+            relative = os.path.relpath(full, path).replace(os.sep, "/")
+            digest.update(f"{relative}\0{sha256_file(full)}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage NoteForge's Vosk and Whisper models")
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--mirror", default=MIRROR, help="Local directory or base URL holding the model archives")
+    parser.add_argument("--allow-unverified", action="store_true",
+                        help="Install models without a pinned SHA-256 in the manifest (the digest is printed)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="Show manifest entries and what is installed")
+
+    prefetch = sub.add_parser("prefetch", help="Download and verify models before recording")
+    prefetch.add_argument("names", nargs="*", help="Manifest names (default: the default models)")
+    prefetch.add_argument("--all", action="store_true")
+
+    verify = sub.add_parser("verify", help="Re-check installed models")
+    verify.add_argument("names", nargs="*")
+
+    export = sub.add_parser("export", help="Write verified archives to a folder usable as --mirror")
+    export.add_argument("directory")
+    export.add_argument("names", nargs="*")
+
+    args = parser.parse_args()
+    manager = ModelManager(args.manifest, args.mirror, allow_unverified=args.allow_unverified)
+
+    if args.command == "list":
+        for entry in manager.entries.values():
+            state = "installed" if entry.installed() else "missing"
+            print(f"{entry.name:<22} {entry.kind:<15} {state:<10} {'default ' if entry.default else ''}{os.path.relpath(entry.path, manager.root)}")
+    elif args.command == "prefetch":
+        names = list(manager.entries) if args.all else args.names
+        if manager.prefetch(names):
+            raise SystemExit(1)
+    elif args.command == "verify":
+        entries = [manager.entry(n) for n in args.names] if args.names else [e for e in manager.entries.values() if e.installed()]
+        bad = [e.name for e in entries if not manager.verify(e)]
+        for entry in entries:
+            print(f"{entry.name}: {'FAILED' if entry.name in bad else 'ok'}")
+        if bad:
+            raise SystemExit(1)
+    elif args.command == "export":
+        manager.export(args.names or [e.name for e in manager.defaults()], args.directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+import os
+import re
+import html
+from datetime import datetime
+from xml.sax.saxutils import escape as xml_escape
+
+# Section key, heading and how many items the study guide keeps
+SECTION_LAYOUT = [
+    ('definitions', 'DEFINITIONS', 5),
+    ('rules', 'LEGAL RULES & PRINCIPLES', 10),
+    ('cases', 'KEY CASES', 8),
+    ('exceptions', 'EXCEPTIONS & SPECIAL RULES', 5),
+    ('examples', 'PRACTICAL EXAMPLES', 5),
+]
+SECTION_LIMITS = {key: limit for key, _, limit in SECTION_LAYOUT}
+
+STUDY_TIPS = [
+    "Review each topic's definitions first",
+    "Memorize key case names and principles",
+    "Understand exceptions to general rules",
+    "Practice applying rules to examples",
+]
+
+CASE_NAME_PATTERN = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+v\.?\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)')
+CASE_YEAR_PATTERN = re.compile(r'\((\d{4})\)')
+
+
+class NoteItem:
+    """One bullet point, stored as (text, bold) runs"""
+
+    def __init__(self, runs):
+        self.runs = runs
+
+    @property
+    def text(self):
+        return ''.join(text for text, _ in self.runs)
+
+
+class NoteSection:
+    """A titled group of bullets inside a topic (definitions, rules, ...)"""
+
+    def __init__(self, key, heading, items):
+        self.key = key
+        self.heading = heading
+        self.items = items
+
+
+class NoteTopic:
+    def __init__(self, name, sections):
+        self.name = name
+        self.sections = sections
+
+
+class NoteDocument:
+    """Render tree shared by every export format"""
+
+    def __init__(self, source, topics, generated=None):
+        self.title = "LECTURE NOTES - STUDY GUIDE"
+        self.source = source
+        self.generated = generated or datetime.now()
+        self.intro = "Organized by legal topics for effective studying."
+        self.topics = topics
+        self.tips = list(STUDY_TIPS)
+
+
+def case_citation_runs(text):
+    """Split a sentence into runs with the case name (and year) in bold"""
+    match = CASE_NAME_PATTERN.search(text)
+    if not match:
+        return [(text, False)]
+
+    case_name = f"{match.group(1)} v {match.group(2)}"
+    year_match = CASE_YEAR_PATTERN.search(text)
+    if year_match:
+        case_name += f" ({year_match.group(1)})"
+
+    # Same semantics as str.replace: every occurrence is emphasised
+    runs = []
+    for i, part in enumerate(text.split(match.group(0))):
+        if i:
+            runs.append((case_name, True))
+        if part:
+            runs.append((part, False))
+    return runs
+
+
+def build_note_document(topics, source, generated=None, select=None):
+    """Build the render tree straight from the topics dict.
+
+    `select(sentences, limit)` picks which sentences survive for a section;
+    by default the first `limit` are kept.
+    """
+    if select is None:
+        select = lambda sentences, limit: sentences[:limit]
+
+    note_topics = []
+    for topic_name, content in topics.items():
+        sections = []
+        for key, heading, limit in SECTION_LAYOUT:
+            sentences = content.get(key)
+            if not sentences:
+                continue
+            chosen = select(sentences, limit)
+            if key == 'cases':
+                items = [NoteItem(case_citation_runs(s)) for s in chosen]
+            else:
+                items = [NoteItem([(s, False)]) for s in chosen]
+            sections.append(NoteSection(key, heading, items))
+        note_topics.append(NoteTopic(topic_name, sections))
+
+    return NoteDocument(os.path.basename(source) if source else '', note_topics, generated)
+
+
+# --- Renderers ---
+# Each renderer walks the tree once and writes as it goes, so large
+# documents never have to exist as a single string in memory.
+
+def iter_text_lines(doc):
+    """Yield the plain-text study guide line by line"""
+    rule = "=" * 70
+    yield rule
+    yield doc.title
+    yield rule
+    yield f"Source: {doc.source}"
+    yield f"Generated: {doc.generated.strftime('%Y-%m-%d %H:%M')}"
+    yield ""
+    yield doc.intro
+    yield ""
+
+    for topic in doc.topics:
+        yield ""
+        yield rule
+        yield f"TOPIC: {topic.name.upper()}"
+        yield rule
+        yield ""
+        for section in topic.sections:
+            yield f"{section.heading}:"
+            yield "-" * 40
+            for item in section.items:
+                text = ''.join(f"**{t}**" if bold else t for t, bold in item.runs)
+                yield f"• {text}"
+            yield ""
+
+    yield ""
+    yield rule
+    yield "STUDY TIPS"
+    yield rule
+    for tip in doc.tips:
+        yield f"• {tip}"
+    yield ""
+
+
+def render_text(doc):
+    return '\n'.join(iter_text_lines(doc))
+
+
+def write_text(doc, filename):
+    with open(filename, 'w', encoding='utf-8') as f:
+        first = True
+        for line in iter_text_lines(doc):
+            if not first:
+                f.write('\n')
+            f.write(line)
+            first = False
+
+
+def _markdown_runs(runs):
+    return ''.join(f"**{t}**" if bold else t for t, bold in runs)
+
+
+def write_markdown(doc, filename):
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(f"# {doc.title}\n\n")
+        f.write(f"*Source: {doc.source} — Generated: {doc.generated.strftime('%Y-%m-%d %H:%M')}*\n\n")
+        f.write(f"{doc.intro}\n")
+        for topic in doc.topics:
+            f.write(f"\n## {topic.name}\n")
+            for section in topic.sections:
+                f.write(f"\n### {section.heading.title()}\n\n")
+                for item in section.items:
+                    f.write(f"- {_markdown_runs(item.runs)}\n")
+        f.write("\n## Study Tips\n\n")
+        for tip in doc.tips:
+            f.write(f"- {tip}\n")
+
+
+def _html_runs(runs):
+    return ''.join(f"<strong>{html.escape(t)}</strong>" if bold else html.escape(t) for t, bold in runs)
+
+
+def write_html(doc, filename):
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n")
+        f.write(f"<title>{html.escape(doc.title)}</title>\n</head>\n<body>\n")
+        f.write(f"<h1>{html.escape(doc.title)}</h1>\n")
+        f.write(f"<p><em>Source: {html.escape(doc.source)} — Generated: "
+                f"{doc.generated.strftime('%Y-%m-%d %H:%M')}</em></p>\n")
+        f.write(f"<p>{html.escape(doc.intro)}</p>\n")
+        for topic in doc.topics:
+            f.write(f"<h2>{html.escape(topic.name)}</h2>\n")
+            for section in topic.sections:
+                f.write(f"<h3>{html.escape(section.heading.title())}</h3>\n<ul>\n")
+                for item in section.items:
+                    f.write(f"<li>{_html_runs(item.runs)}</li>\n")
+                f.write("</ul>\n")
+        f.write("<h2>Study Tips</h2>\n<ul>\n")
+        for tip in doc.tips:
+            f.write(f"<li>{html.escape(tip)}</li>\n")
+        f.write("</ul>\n</body>\n</html>\n")
+
+
+def write_docx(doc, filename):
+    from docx import Document
+
+    document = Document()
+    document.add_heading(doc.title, level=0)
+    document.add_paragraph(f"Source: {doc.source} — Generated: {doc.generated.strftime('%Y-%m-%d %H:%M')}")
+    document.add_paragraph(doc.intro)
+
+    for topic in doc.topics:
+        document.add_heading(topic.name, level=1)
+        for section in topic.sections:
+            document.add_heading(section.heading.title(), level=2)
+            for item in section.items:
+                paragraph = document.add_paragraph(style='List Bullet')
+                for text, bold in item.runs:
+                    paragraph.add_run(text).bold = bold
+
+    document.add_heading("Study Tips", level=1)
+    for tip in doc.tips:
+        document.add_paragraph(tip, style='List Bullet')
+
+    document.save(filename)
+
+
+class _FlowableStream(list):
+    """List that tops itself up from a generator as ReportLab consumes it.
+
+    `BaseDocTemplate.build` checks `len(flowables)` before laying out each
+    flowable, so the story is produced a few items at a time instead of
+    being materialised up front.
+    """
+
+    def __init__(self, source, low_water=32):
+        super().__init__()
+        self._source = iter(source)
+        self._low_water = low_water
+
+    def __len__(self):
+        while self._source is not None and list.__len__(self) < self._low_water:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+        return list.__len__(self)
+
+
+def _pdf_runs(runs):
+    return ''.join(f"<b>{xml_escape(t)}</b>" if bold else xml_escape(t) for t, bold in runs)
+
+
+def iter_pdf_flowables(doc, styles):
+    from reportlab.platypus import Paragraph, Spacer
+
+    yield Paragraph(xml_escape(doc.title), styles['Title'])
+    yield Paragraph(xml_escape(f"Source: {doc.source} — Generated: {doc.generated.strftime('%Y-%m-%d %H:%M')}"), styles['Normal'])
+    yield Spacer(1, 8)
+    yield Paragraph(xml_escape(doc.intro), styles['Normal'])
+
+    for topic in doc.topics:
+        yield Spacer(1, 12)
+        yield Paragraph(xml_escape(f"TOPIC: {topic.name.upper()}"), styles['Heading1'])
+        for section in topic.sections:
+            yield Paragraph(f"<b>{xml_escape(section.heading)}</b>", styles['Heading2'])
+            for item in section.items:
+                yield Paragraph(f"• {_pdf_runs(item.runs)}", styles['Normal'])
+                yield Spacer(1, 4)
+
+    yield Spacer(1, 12)
+    yield Paragraph("STUDY TIPS", styles['Heading1'])
+    for tip in doc.tips:
+        yield Paragraph(f"• {xml_escape(tip)}", styles['Normal'])
+
+
+def write_pdf(doc, filename):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate
+
+    pdf = SimpleDocTemplate(filename, pagesize=letter)
+    pdf.build(_FlowableStream(iter_pdf_flowables(doc, getSampleStyleSheet())))
+
+
+WRITERS = {
+    '.pdf': write_pdf,
+    '.md': write_markdown,
+    '.html': write_html,
+    '.htm': write_html,
+    '.docx': write_docx,
+    '.txt': write_text,
+}
+
+
+def export_document(doc, *filenames):
+    """Write the same tree to every filename, choosing the format by extension"""
+    for filename in filenames:
+        ext = os.path.splitext(filename)[1].lower()
+        writer = WRITERS.get(ext)
+        if writer is None:
+            raise ValueError(f"Unsupported export format: {ext or filename}")
+        writer(doc, filename)
@@ -0,0 +1,325 @@
+import os
+import json
+import time
+import argparse
+import threading
+import collections
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from resource_budget import machine_key
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Latest JSON snapshot, rewritten every few seconds while the transcriber runs
+METRICS_PATH = os.environ.get("NOTEFORGE_METRICS", os.path.join(os.path.expanduser("~"), ".noteforge", "metrics.json"))
+DEFAULT_PORT = 9464
+
+# name -> (Prometheus type, help)
+METRICS = {
+    'noteforge_queue_depth': ('gauge', "Items waiting in a pipeline queue (audio frames per source, whisper segments)"),
+    'noteforge_frames_captured_total': ('counter', "16 kHz frames delivered by capture"),
+    'noteforge_frames_dropped_total': ('counter', "Frames lost to a full capture or Vosk queue"),
+    'noteforge_capture_overflows_total': ('counter', "Host input buffer overruns"),
+    'noteforge_segments_total': ('counter', "Segments handed to the Whisper worker"),
+    'noteforge_segments_per_minute': ('gauge', "Segments handed to the Whisper worker over the last window"),
+    'noteforge_whisper_calls_total': ('counter', "Whisper transcriptions, including deferred re-decodes"),
+    'noteforge_whisper_skipped_total': ('counter', "Segments finalized from Vosk's draft without Whisper"),
+    'noteforge_whisper_audio_seconds_total': ('counter', "Audio transcribed by Whisper"),
+    'noteforge_whisper_decode_seconds_total': ('counter', "Time spent in Whisper"),
+    'noteforge_whisper_rtf': ('gauge', "Whisper real-time factor (decode time / audio time) over the last window"),
+    'noteforge_process_resident_memory_bytes': ('gauge', "Resident set size of the process"),
+    'noteforge_thread_cpu_seconds_total': ('counter', "CPU time (user + system) per thread"),
+}
+
+
+class MetricsRegistry:
+    """Pull-based metrics: collectors are only called when someone reads them.
+
+    A collector is a callable yielding (name, labels, value) for names in
+    METRICS. Nothing is recorded on the audio path; collectors read the
+    counters the pipeline already keeps (CaptureSource.stats,
+    WhisperWorker.stats, queue sizes), so the cost is paid per scrape.
+    """
+
+    def __init__(self):
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def unregister(self, collector):
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def collect(self):
+        """{name: [(labels, value), ...]} in METRICS order"""
+        samples = collections.defaultdict(list)
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                for name, labels, value in collector():
+                    if value is not None:
+                        samples[name].append((labels, value))
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        return {name: samples[name] for name in METRICS if name in samples}
+
+    def prometheus(self):
+        """Prometheus text exposition format (0.0.4)"""
+        lines = []
+        for name, samples in self.collect().items():
+            kind, text = METRICS[name]
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        return {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'machine': machine_key(),
+            'metrics': {name: [dict(labels=labels, value=value) for labels, value in samples]
+                        for name, samples in self.collect().items()},
+        }
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if psutil:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+def thread_cpu_seconds():
+    """{native thread id: CPU seconds} from /proc (Linux) or psutil, else empty"""
+    if os.path.isdir('/proc/self/task'):
+        tick = os.sysconf('SC_CLK_TCK')
+        times = {}
+        for tid in os.listdir('/proc/self/task'):
+            try:
+                with open(f'/proc/self/task/{tid}/stat') as f:
+                    # Fields after the ")" of the command name start at field 3 (state); utime, stime are 14, 15
+                    fields = f.read().rpartition(')')[2].split()
+                times[int(tid)] = (int(fields[11]) + int(fields[12])) / tick
+            except (OSError, ValueError, IndexError):
+                continue
+        return times
+    if psutil:
+        return {t.id: t.user_time + t.system_time for t in psutil.Process().threads()}
+    return {}
+
+
+def process_collector():
+    """Resident memory and CPU time of every named Python thread"""
+    yield 'noteforge_process_resident_memory_bytes', {}, rss_bytes()
+    cpu = thread_cpu_seconds()
+    per_name = collections.Counter()
+    for thread in threading.enumerate():
+        if thread.native_id in cpu:
+            per_name[thread.name] += cpu[thread.native_id]
+    for name, seconds in sorted(per_name.items()):
+        yield 'noteforge_thread_cpu_seconds_total', {'thread': name}, round(seconds, 3)
+
+
+class PipelineCollector:
+    """Queue depths, capture counters, Whisper RTF and segment rate of the live pipeline.
+
+    `pipeline()` is called on every collection and returns (sources,
+    scheduler, worker) - any of them may be empty or None - so one
+    collector follows the transcriber across recordings. Rates are
+    computed over the last `window` seconds of collections.
+    """
+
+    def __init__(self, pipeline, window=60.0):
+        self.pipeline = pipeline
+        self.window = window
+        self._worker = None
+        self._history = collections.deque()     # (time, segments, audio_s, decode_s)
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        sources, scheduler, worker = self.pipeline()
+        for source in sources or ():
+            labels = {'source': source.label}
+            yield 'noteforge_queue_depth', dict(labels, queue="audio"), source.audio_queue.qsize()
+            yield 'noteforge_frames_captured_total', labels, source.stats['frames']
+            yield 'noteforge_frames_dropped_total', labels, source.stats['dropped_frames']
+            yield 'noteforge_capture_overflows_total', labels, source.stats['overflows']
+        if scheduler is not None:
+            yield 'noteforge_queue_depth', {'queue': "whisper"}, scheduler.pending()
+        if worker is None:
+            return
+
+        stats = worker.stats
+        yield 'noteforge_segments_total', {}, stats['segments']
+        yield 'noteforge_whisper_calls_total', {}, stats['whisper_calls']
+        yield 'noteforge_whisper_skipped_total', {}, stats['skipped']
+        yield 'noteforge_whisper_audio_seconds_total', {}, round(stats['audio_seconds'], 3)
+        yield 'noteforge_whisper_decode_seconds_total', {}, round(stats['decode_seconds'], 3)
+
+        per_minute, rtf = self.rates(worker)
+        yield 'noteforge_segments_per_minute', {}, per_minute
+        yield 'noteforge_whisper_rtf', {}, rtf
+
+    def rates(self, worker):
+        """(segments per minute, real-time factor) since the oldest collection in the window"""
+        now = time.monotonic()
+        stats = worker.stats
+        sample = (now, stats['segments'], stats['audio_seconds'], stats['decode_seconds'])
+        with self._lock:
+            if worker is not self._worker:
+                # New recording: its counters start from zero
+                self._worker = worker
+                self._history.clear()
+            self._history.append(sample)
+            while len(self._history) > 2 and now - self._history[1][0] >= self.window:
+                self._history.popleft()
+            first = self._history[0]
+
+        elapsed = now - first[0]
+        per_minute = round((sample[1] - first[1]) * 60 / elapsed, 2) if elapsed > 0 else None
+        audio, decode = sample[2] - first[2], sample[3] - first[3]
+        if audio <= 0:
+            # Nothing transcribed in the window: fall back to the recording's average
+            audio, decode = sample[2], sample[3]
+        rtf = round(decode / audio, 3) if audio > 0 else None
+        return per_minute, rtf
+
+
+class MetricsServer:
+    """Serves a registry on http://<host>:<port>/metrics (and /metrics.json) and writes JSON snapshots.
+
+    Binds to localhost by default. Snapshots are written atomically to
+    `snapshot_path` every `snapshot_every` seconds (None = never).
+    """
+
+    def __init__(self, registry, port=DEFAULT_PORT, host="127.0.0.1", snapshot_path=METRICS_PATH,
+                 snapshot_every=15.0):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.snapshot_path = snapshot_path
+        self.snapshot_every = snapshot_every
+        self.httpd = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Start serving; raises OSError if the port is taken"""
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                threading.current_thread().name = "metrics-request"    # one CPU series for all scrapes
+                if self.path == "/metrics":
+                    body, content_type = registry.prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps(registry.snapshot(), indent=2), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass    # one line per scrape would drown the console
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)]
+        if self.snapshot_path and self.snapshot_every:
+            self._threads.append(threading.Thread(target=self.snapshot_loop, name="metrics-snapshot", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._threads = []
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_every):
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+            tmp = self.snapshot_path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.registry.snapshot(), f, indent=2)
+            os.replace(tmp, self.snapshot_path)
+        except OSError as e:
+            print(f"Could not write metrics snapshot: {e}")
+
+
+def print_snapshot(snapshot):
+    print(f"# {snapshot['machine']} at {snapshot['time']}")
+    for name, samples in snapshot['metrics'].items():
+        for sample in samples:
+            print(f"{name}{format_labels(sample['labels'])} {format_value(sample['value'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the transcriber's latest metrics")
+    parser.add_argument("--path", default=METRICS_PATH, help="JSON snapshot written by the transcriber")
+    parser.add_argument("--port", type=int, help="Read the live endpoint on this localhost port instead")
+    args = parser.parse_args()
+
+    if args.port:
+        from urllib.request import urlopen
+        with urlopen(f"http://127.0.0.1:{args.port}/metrics.json", timeout=5) as response:
+            snapshot = json.load(response)
+    else:
+        try:
+            with open(args.path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"No metrics snapshot at {args.path}: {e}")
+    print_snapshot(snapshot)
+
+
+if __name__ == "__main__":
+    main()
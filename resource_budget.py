@@ -0,0 +1,268 @@
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+
+PROFILE_PATH = os.environ.get("NOTEFORGE_CORE_BUDGET", os.path.join(os.path.expanduser("~"), ".noteforge", "core_budget.json"))
+
+ROLES = ('capture', 'vosk', 'whisper')
+
+# Windows thread priorities (SetThreadPriority)
+_WIN_PRIORITY = {'capture': 2, 'vosk': 0, 'whisper': -1}   # HIGHEST, NORMAL, BELOW_NORMAL
+# POSIX niceness per role; raising priority (negative) needs privileges and is skipped otherwise
+_NICENESS = {'capture': -5, 'vosk': 0, 'whisper': 5}
+
+
+def machine_key():
+    return f"{socket.gethostname()}/{os.cpu_count()}"
+
+
+def available_cores():
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class CoreBudget:
+    """Splits a core budget between the capture, Vosk and Whisper threads.
+
+    `whisper` becomes the backend's intra-op thread count (torch or
+    CTranslate2) so it stops defaulting to every core. With `affinity`,
+    each thread is pinned to its share: capture and Vosk on the first
+    cores, Whisper on the rest. With `prioritize_capture`, capture threads
+    ask for a higher scheduling priority and Whisper runs at a lower one.
+    Threads call `enter(role)` when they start.
+    """
+
+    def __init__(self, total=None, capture=1, vosk=1, whisper=None, affinity=False, prioritize_capture=True):
+        self.total = min(total or len(available_cores()), len(available_cores()))
+        self.capture = capture
+        self.vosk = vosk
+        self.whisper = whisper or max(1, self.total - capture - vosk)
+        self.affinity = affinity
+        self.prioritize_capture = prioritize_capture
+
+    def cores(self, role):
+        """Core ids a role's threads are pinned to"""
+        cores = available_cores()[:self.total]
+        front = self.capture + self.vosk
+        if role == 'capture':
+            share = cores[:self.capture]
+        elif role == 'vosk':
+            share = cores[self.capture:front]
+        else:
+            share = cores[front:front + self.whisper]
+        return share or cores
+
+    def enter(self, role):
+        """Apply affinity and priority to the calling thread"""
+        if role not in ROLES:
+            raise ValueError(f"Unknown role '{role}'")
+        if self.affinity and hasattr(os, 'sched_setaffinity'):
+            try:
+                # pid 0 is the calling thread on Linux
+                os.sched_setaffinity(0, self.cores(role))
+            except OSError:
+                pass
+        if self.prioritize_capture:
+            set_thread_priority(role)
+
+    def to_dict(self):
+        return {'total': self.total, 'capture': self.capture, 'vosk': self.vosk, 'whisper': self.whisper,
+                'affinity': self.affinity, 'prioritize_capture': self.prioritize_capture}
+
+    def __repr__(self):
+        return f"CoreBudget({', '.join(f'{k}={v}' for k, v in self.to_dict().items())})"
+
+    @classmethod
+    def load(cls, path=PROFILE_PATH):
+        """The tuned budget for this machine, or the default split"""
+        try:
+            with open(path) as f:
+                profile = json.load(f).get(machine_key())
+        except (OSError, ValueError):
+            profile = None
+        if profile:
+            return cls(**{k: v for k, v in profile.items() if k in cls().to_dict()})
+        return cls()
+
+    def save(self, path=PROFILE_PATH, **extra):
+        try:
+            with open(path) as f:
+                profiles = json.load(f)
+        except (OSError, ValueError):
+            profiles = {}
+        profiles[machine_key()] = dict(self.to_dict(), **extra)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(profiles, f, indent=2)
+
+
+def set_thread_priority(role):
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _WIN_PRIORITY[role])
+        elif hasattr(os, 'setpriority'):
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), _NICENESS[role])
+    except (OSError, AttributeError):
+        pass
+
+
+def candidate_splits(total):
+    """Whisper thread counts worth trying; capture and Vosk share what is left"""
+    counts = sorted({max(1, c) for c in (1, total // 2, total - 2, total - 1, total)})
+    splits = []
+    for whisper in counts:
+        rest = total - whisper
+        splits.append({'capture': 1, 'vosk': max(1, rest - 1), 'whisper': whisper})
+    return splits
+
+
+def measure_split(budget, backend, vosk_model, pcm, segment, seconds, frame_ms=20, sample_rate=16000):
+    """Run capture pacing, Vosk and Whisper together for `seconds`.
+
+    Returns Whisper throughput (audio seconds transcribed per wall second),
+    the share of capture ticks that woke more than a frame late, and the
+    largest Vosk backlog in frames.
+    """
+    from audio_pipeline import SpeechSegmenter
+    from whisper_backends import pcm_to_float
+
+    frame_bytes = int(sample_rate * frame_ms / 1000) * 2
+    frame_s = frame_ms / 1000
+    frames = queue.Queue()
+    stop = threading.Event()
+    stats = {'ticks': 0, 'late': 0, 'backlog': 0, 'audio_s': 0.0}
+
+    def capture():
+        budget.enter('capture')
+        deadline = time.perf_counter()
+        offset = 0
+        while not stop.is_set():
+            deadline += frame_s
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif -delay > frame_s:
+                stats['late'] += 1
+            stats['ticks'] += 1
+            frames.put(pcm[offset:offset + frame_bytes])
+            offset = (offset + frame_bytes) % (len(pcm) - frame_bytes)
+
+    def vosk_loop():
+        budget.enter('vosk')
+        segmenter = SpeechSegmenter(vosk_model, "tune", sample_rate, frame_ms)
+        while not stop.is_set():
+            stats['backlog'] = max(stats['backlog'], frames.qsize())
+            try:
+                segmenter.process_frame(frames.get(timeout=0.1))
+            except queue.Empty:
+                pass
+
+    def whisper_loop():
+        budget.enter('whisper')
+        audio = pcm_to_float(segment)
+        while not stop.is_set():
+            backend.transcribe(audio, "english")
+            stats['audio_s'] += len(audio) / sample_rate
+
+    threads = [threading.Thread(target=target, daemon=True) for target in (capture, vosk_loop, whisper_loop)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'whisper_x_realtime': round(stats['audio_s'] / elapsed, 3),
+        'late_ticks': round(stats['late'] / max(1, stats['ticks']), 4),
+        'max_vosk_backlog': stats['backlog'],
+    }
+
+
+def autotune(make_backend, vosk_model, pcm, seconds=20.0, affinity=False, max_late=0.01, max_backlog=50,
+             segment_s=8.0, sample_rate=16000, report=print):
+    """Try each candidate split and return the best CoreBudget with its measurements.
+
+    A split is acceptable when capture stays on time (at most `max_late`
+    late ticks) and Vosk keeps up (backlog under `max_backlog` frames);
+    among those the one with the highest Whisper throughput wins.
+    """
+    segment = pcm[:int(segment_s * sample_rate) * 2]
+    total = len(available_cores())
+    best = None
+    for split in candidate_splits(total):
+        budget = CoreBudget(total, affinity=affinity, **split)
+        backend = make_backend(budget.whisper)
+        result = measure_split(budget, backend, vosk_model, pcm, segment, seconds)
+        ok = result['late_ticks'] <= max_late and result['max_vosk_backlog'] < max_backlog
+        report(f"  whisper={budget.whisper:<3} capture={budget.capture} vosk={budget.vosk}  "
+               f"{result['whisper_x_realtime']:>6.2f}x realtime  late {result['late_ticks']:.1%}  "
+               f"backlog {result['max_vosk_backlog']}{'' if ok else '  (rejected)'}")
+        key = (ok, result['whisper_x_realtime'] if ok else -result['late_ticks'])
+        if best is None or key > best[0]:
+            best = (key, budget, result)
+    return best[1], best[2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NoteForge CPU core budget")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("show", help="Print the budget used on this machine")
+
+    tune = sub.add_parser("tune", help="Measure a few core splits and save the best for this machine")
+    tune.add_argument("wav", help="Speech recording used as the workload")
+    tune.add_argument("--vosk-model", default="model")
+    tune.add_argument("--whisper-model", default="base")
+    tune.add_argument("--backend", default=None, help="Whisper backend (default: openai-whisper)")
+    tune.add_argument("--seconds", type=float, default=20.0, help="Measurement time per split")
+    tune.add_argument("--affinity", action="store_true", help="Pin threads to their cores")
+    tune.add_argument("--dry-run", action="store_true", help="Do not save the result")
+
+    args = parser.parse_args()
+
+    if args.command == "show":
+        print(f"{machine_key()}: {CoreBudget.load()}")
+        return
+
+    import vosk
+    from audio_resample import load_wav
+    from model_manager import ModelManager
+    from whisper_backends import BACKENDS, DEFAULT_BACKEND, create_backend
+
+    backend_name = args.backend or DEFAULT_BACKEND
+    if backend_name not in BACKENDS:
+        raise SystemExit(f"Unknown Whisper backend '{backend_name}' (choose from {', '.join(BACKENDS)})")
+    # Only verified models from `model_manager.py prefetch`; never download while tuning
+    models = ModelManager()
+    vosk_path = args.vosk_model if os.path.exists(args.vosk_model) else models.local_path("vosk")
+    whisper_path = models.local_path(BACKENDS[backend_name].model_kind, args.whisper_model)
+    if not vosk_path or not whisper_path:
+        raise SystemExit(f"Models not downloaded (Vosk '{args.vosk_model}', Whisper '{args.whisper_model}' "
+                         f"for {backend_name}). Please run: python model_manager.py prefetch")
+
+    vosk.SetLogLevel(-1)
+    vosk_model = vosk.Model(vosk_path)
+    pcm = load_wav(args.wav)
+
+    print(f"Tuning on {machine_key()} ({len(available_cores())} cores)")
+    budget, result = autotune(lambda threads: create_backend(backend_name, whisper_path, threads=threads).load(),
+                              vosk_model, pcm, args.seconds, args.affinity)
+    print(f"Best: {budget}")
+    if not args.dry_run:
+        budget.save(measured=result, backend=backend_name)
+        print(f"Saved to {PROFILE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import re
+import numpy as np
+from scipy import sparse
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z']+")
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further
+had has have having he her here hers him his how i if in into is it its itself me more most
+my no nor not of off on once only or other our ours out over own same she should so some such
+than that the their theirs them then there these they this those through to too under until
+up we were what when where which while who whom why will with would you your yours
+""".split())
+
+
+class SentenceRanker:
+    """TF-IDF + continuous LexRank over the sentences of a lecture.
+
+    Sentences are registered once with `add`/`add_many`; document
+    frequencies are shared across the whole lecture, while centrality is
+    computed per section with matrix-free power iteration, so a section
+    of n sentences costs O(nnz) per iteration instead of O(n^2).
+
+    Rows are keyed by the sentence itself unless a key is given. Sections
+    read from a SentenceStore (anything with `.ids`) are keyed by sentence
+    id, so the ranker holds no copy of their text, and get each sentence's
+    centrality written back onto its record.
+    """
+
+    def __init__(self, damping=0.15, duplicate_threshold=0.8, max_iter=100, tol=1e-6):
+        self.damping = damping
+        self.duplicate_threshold = duplicate_threshold
+        self.max_iter = max_iter
+        self.tol = tol
+
+        self._vocab = {}        # term -> column
+        self._df = []           # column -> number of sentences containing it
+        self._rows = {}         # key -> (columns, counts)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, sentence, key=None):
+        """Register a sentence under `key` (default: the sentence); repeated keys are only counted once"""
+        if key is None:
+            key = sentence
+        if key in self._rows:
+            return
+
+        counts = {}
+        for token in TOKEN_PATTERN.findall(sentence.lower()):
+            if token in STOPWORDS:
+                continue
+            col = self._vocab.get(token)
+            if col is None:
+                col = self._vocab[token] = len(self._df)
+                self._df.append(0)
+            counts[col] = counts.get(col, 0) + 1
+
+        for col in counts:
+            self._df[col] += 1
+
+        self._rows[key] = (
+            np.fromiter(counts.keys(), dtype=np.int32, count=len(counts)),
+            np.fromiter(counts.values(), dtype=np.float32, count=len(counts)),
+        )
+
+    def remove(self, key):
+        """Forget a registered sentence, e.g. one replaced by a correction"""
+        cols, _ = self._rows.pop(key)
+        for col in cols.tolist():
+            self._df[col] -= 1
+
+    def idf(self, cols):
+        """IDF of the given columns, computed from the current corpus"""
+        df = np.fromiter((self._df[col] for col in cols.tolist()), dtype=np.float32, count=len(cols))
+        return np.log((1.0 + len(self._rows)) / (1.0 + df)) + 1.0
+
+    def unit_tf(self, key):
+        """Columns and L2-normalised sublinear TF of a registered sentence"""
+        cols, counts = self._rows[key]
+        tf = 1.0 + np.log(counts)
+        norm = np.sqrt((tf * tf).sum())
+        return cols, tf / norm if norm else tf
+
+    def add_many(self, sentences, keys=None):
+        if keys is None:
+            keys = _keys_of(sentences)
+        for i, key in enumerate(keys):
+            if key not in self._rows:
+                self.add(sentences[i], key)
+
+    def matrix(self, sentences, keys=None):
+        """L2-normalised TF-IDF rows (CSR) for the given sentences, over the terms they use"""
+        if keys is None:
+            keys = _keys_of(sentences)
+        self.add_many(sentences, keys)
+
+        rows = [self._rows[key] for key in keys]
+        lengths = np.fromiter((len(cols) for cols, _ in rows), dtype=np.int64, count=len(rows))
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        if rows:
+            indices = np.concatenate([cols for cols, _ in rows])
+            tf = np.concatenate([counts for _, counts in rows])
+        else:
+            indices = np.zeros(0, dtype=np.int32)
+            tf = np.zeros(0, dtype=np.float32)
+
+        # Only the terms these rows use, renumbered densely, so cost does
+        # not grow with the vocabulary of the whole lecture
+        terms, indices = np.unique(indices, return_inverse=True)
+        data = (1.0 + np.log(tf)) * self.idf(terms)[indices]
+
+        # Row-wise L2 normalisation without leaving sparse form
+        squares = np.bincount(np.repeat(np.arange(len(rows)), lengths), weights=data * data, minlength=len(rows))
+        row_norms = np.sqrt(squares)
+        row_norms[row_norms == 0] = 1.0
+        data = data / np.repeat(row_norms, lengths)
+
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), len(terms)))
+
+    def scores(self, sentences, matrix=None):
+        """LexRank centrality of each sentence within this group"""
+        n = len(sentences)
+        if n == 0:
+            return np.zeros(0)
+        if n == 1:
+            return np.ones(1)
+
+        X = self.matrix(sentences) if matrix is None else matrix
+        XT = X.T.tocsr()
+
+        # Similarity S = X X^T with the self-similarity removed; never formed explicitly
+        self_sim = np.asarray(X.multiply(X).sum(axis=1)).ravel()
+        degree = X @ (XT @ np.ones(n)) - self_sim
+        dangling = degree <= 1e-12
+        inv_degree = np.where(dangling, 0.0, 1.0 / np.where(dangling, 1.0, degree))
+
+        p = np.full(n, 1.0 / n)
+        for _ in range(self.max_iter):
+            weighted = p * inv_degree
+            spread = X @ (XT @ weighted) - self_sim * weighted
+            spread += p[dangling].sum() / n
+            new_p = self.damping / n + (1.0 - self.damping) * spread
+            new_p /= new_p.sum()
+            if np.abs(new_p - p).sum() < self.tol:
+                p = new_p
+                break
+            p = new_p
+        return p
+
+    def select(self, sentences, limit):
+        """Best `limit` sentences, near-duplicates removed, in original order"""
+        record_scores = getattr(sentences, 'set_scores', None)
+        if len(sentences) <= 1:
+            if record_scores:
+                record_scores(np.ones(len(sentences)))
+            return list(sentences[:limit])
+
+        X = self.matrix(sentences)
+        scores = self.scores(sentences, matrix=X)
+        if record_scores:
+            record_scores(scores)
+        order = np.argsort(-scores, kind='stable')
+
+        # Greedy pick: each chosen sentence knocks out everything too similar
+        # to it with one sparse mat-vec, so cost is O(limit * nnz)
+        excluded = np.zeros(len(sentences), dtype=bool)
+        chosen = []
+        for idx in order:
+            if excluded[idx]:
+                continue
+            chosen.append(int(idx))
+            if len(chosen) >= limit:
+                break
+            similarity = (X @ X[idx].T).toarray().ravel()
+            excluded |= similarity >= self.duplicate_threshold
+
+        return [sentences[i] for i in sorted(chosen)]
+
+
+class CandidatePool:
+    """Bounded shortlist of the most central sentences of one growing section.
+
+    Each sentence is scored once, on arrival, by its IDF-weighted
+    similarity to the rest of the section, read off a running centroid in
+    O(terms in the sentence). The pool keeps the best `capacity`, so a
+    newcomer only has to beat the weakest member and LexRank only ever
+    runs over the pool, however long the lecture gets. Members' scores go
+    stale as the section and IDF drift; `rescore` refreshes them in
+    O(capacity).
+    """
+
+    def __init__(self, ranker, capacity):
+        self.ranker = ranker
+        self.capacity = capacity
+        self.keys = []
+        self.scores = []
+        self._centroid = {}     # column -> summed unit TF of every sentence in the section
+        self._size = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def offer(self, key):
+        """Add a registered sentence to the section; returns True if it made the pool"""
+        cols, unit = self.ranker.unit_tf(key)
+        score = self._score(cols, unit, include_self=False)
+        centroid = self._centroid
+        for col, weight in zip(cols.tolist(), unit.tolist()):
+            centroid[col] = centroid.get(col, 0.0) + weight
+        self._size += 1
+
+        if len(self.keys) < self.capacity:
+            self.keys.append(key)
+            self.scores.append(score)
+            return True
+        weakest = min(range(len(self.scores)), key=self.scores.__getitem__)
+        if score <= self.scores[weakest]:
+            return False
+        self.keys[weakest] = key
+        self.scores[weakest] = score
+        return True
+
+    def discard(self, key):
+        """Take a sentence back out of the section; call before `ranker.remove(key)`"""
+        cols, unit = self.ranker.unit_tf(key)
+        centroid = self._centroid
+        for col, weight in zip(cols.tolist(), unit.tolist()):
+            remaining = centroid[col] - weight
+            if remaining > 1e-6:
+                centroid[col] = remaining
+            else:
+                del centroid[col]
+        self._size -= 1
+
+        if key in self.keys:
+            i = self.keys.index(key)
+            del self.keys[i]
+            del self.scores[i]
+
+    def rescore(self):
+        """Re-score the members against the current section and IDF"""
+        self.scores = [self._score(*self.ranker.unit_tf(key), include_self=True) for key in self.keys]
+
+    def _score(self, cols, unit, include_self):
+        """Mean IDF-weighted similarity to the other sentences of the section"""
+        others = self._size - 1 if include_self else self._size
+        if others <= 0:
+            return 0.0
+        centroid = self._centroid
+        summed = np.fromiter((centroid.get(col, 0.0) for col in cols.tolist()), dtype=np.float64, count=len(cols))
+        if include_self:
+            summed -= unit
+        idf = self.ranker.idf(cols)
+        return float((unit * idf * idf * summed).sum()) / others
+
+
+def _keys_of(sentences):
+    """Sentence ids for store-backed sections, otherwise the sentences themselves"""
+    keys = getattr(sentences, 'ids', None)
+    return sentences if keys is None else keys
+
+
+def rank_topics(topics, ranker=None):
+    """Fit one ranker over every sentence in the topics dict"""
+    if ranker is None:
+        ranker = SentenceRanker()
+    for content in topics.values():
+        for sentences in content.values():
+            ranker.add_many(sentences)
+    return ranker
@@ -0,0 +1,110 @@
+import re
+
+# Never end a sentence: "Carlill v. Carbolic", "e.g. a display"
+ABBREVIATIONS = frozenset("""
+v vs e.g i.e cf viz mr mrs ms dr prof hon rt sr jr al approx esp ibid
+""".split())
+
+# Only abbreviations in front of a number: "s. 2", "ss. 1-3", "para. 14", "No. 5", "art. 6(1)"
+NUMBER_ABBREVIATIONS = frozenset("""
+s ss no nos art arts para paras reg regs sch ch pt p pp vol sec cl r rr fig n
+""".split())
+
+# Continue the sentence before a lowercase word, number or bracket: "Smoke Ball Co. [1893]" vs "... Co. The court"
+CAPITAL_ABBREVIATIONS = frozenset("""
+co ltd inc plc bros etc
+""".split())
+
+# Capitalized words that start a new sentence after a lone capital: "Plan B. The", "Vitamin C. It"
+# (any other capitalized word reads as a name after an initial: "A. Smith")
+SENTENCE_STARTERS = frozenset("""
+a about after all also although an and another as at because before both but by can could did do does
+each every finally first for from further here how however if in is it its let many most my next no
+not now of on once one or our second since so some such that the their then there therefore these
+they this those thus to today under unless we what when where whether which while who why with yes
+you your
+""".split())
+
+
+def _not_after(words):
+    # One fixed-width, case-insensitive lookbehind per word
+    return ''.join(rf'(?<!\b(?i:{re.escape(word)}))' for word in sorted(words))
+
+
+def _not_word(words):
+    # Capitalized form only: a starter in the middle of a name is rare
+    if not words:
+        return ''
+    return '(?!(?:' + '|'.join(re.escape(word.capitalize()) for word in sorted(words)) + r')\b)'
+
+
+def compile_boundaries(abbreviations, number_abbreviations=(), capital_abbreviations=(), sentence_starters=()):
+    """Regex matching sentence ends, with the abbreviation lexicon compiled in.
+
+    A match is a run of terminators, optional closing quotes/brackets and
+    then whitespace or the end of the text. A lone period is not a match:
+    - after one of `abbreviations`;
+    - after a capital initial when another initial or a capitalized word
+      other than one of `sentence_starters` follows ("A. Smith", "J. R.
+      Smith", but not "Plan B. The next step"); "I" always ends one;
+    - after a number abbreviation when a number follows ("s. 2", "art. 6(1)");
+    - after a company abbreviation or dotted acronym when a lowercase word,
+      number or bracket follows ("Co. [1893]", "Q.B. 256", "M.R. in").
+    Every check is a fixed-width lookaround, so one finditer decides all
+    boundaries without Python-level backtracking.
+    """
+    period = (
+        _not_after(abbreviations)
+        + rf'(?:(?<![\s(\[\"\'][A-HJ-Z])(?<!^[A-HJ-Z])|(?!\.\s+(?:[A-Z]\.|{_not_word(sentence_starters)}[A-Z])))'
+        + rf'(?:(?!\.\s+[\d(])|{_not_after(number_abbreviations)})'
+        + rf'(?:(?!\.\s+[a-z\d(\[])|{_not_after(capital_abbreviations)}(?<![A-Za-z]\.[A-Za-z]))'
+        + r'\.'
+    )
+    # The leading lookahead lets the engine skip ordinary characters before trying any lookbehind
+    return re.compile(rf'(?=[.!?])(?:[!?]|{period})[.!?]*["\')\]]*(?=\s|$)')
+
+
+def _normalize(words):
+    return frozenset(word.lower().rstrip('.') for word in words)
+
+
+class SentenceSegmenter:
+    """Single-pass sentence splitter that knows legal abbreviations and citations.
+
+    The abbreviation lexicons are compiled into one regex when the
+    segmenter is built, so splitting is a single linear finditer over the
+    text. Lexicons can be replaced or extended per instance.
+    """
+
+    def __init__(self, abbreviations=ABBREVIATIONS, number_abbreviations=NUMBER_ABBREVIATIONS,
+                 capital_abbreviations=CAPITAL_ABBREVIATIONS, extra_abbreviations=(),
+                 sentence_starters=SENTENCE_STARTERS):
+        self.abbreviations = _normalize((*abbreviations, *extra_abbreviations))
+        self.number_abbreviations = _normalize(number_abbreviations)
+        self.capital_abbreviations = _normalize(capital_abbreviations)
+        self.sentence_starters = _normalize(sentence_starters)
+        self.boundaries = compile_boundaries(self.abbreviations, self.number_abbreviations,
+                                             self.capital_abbreviations, self.sentence_starters)
+
+    def spans(self, text):
+        """Yield (start, end) of every sentence; the terminating punctuation is left out"""
+        start = 0
+        for match in self.boundaries.finditer(text):
+            end = match.start()
+            if end > start:
+                yield start, end
+            start = match.end()
+        if start < len(text):
+            yield start, len(text)
+
+    def split(self, text):
+        """Sentences, stripped, empty ones dropped"""
+        sentences = []
+        for start, end in self.spans(text):
+            sentence = text[start:end].strip()
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+
+DEFAULT_SEGMENTER = SentenceSegmenter()
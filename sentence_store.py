@@ -0,0 +1,254 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+
+SECTIONS = ('definitions', 'rules', 'cases', 'examples', 'exceptions')
+
+
+class SentenceRecord:
+    """Metadata for one classified sentence occurrence"""
+    __slots__ = ('id', 'offset', 'keywords', 'section', 'score')
+
+    def __init__(self, id, offset, keywords, section, score=None):
+        self.id = id
+        self.offset = offset        # character offset in the cleaned source text
+        self.keywords = keywords    # tuple of matched topic keywords
+        self.section = section      # content type: definitions, rules, ...
+        self.score = score          # LexRank centrality from its latest ranking; None until ranked
+
+
+class SentenceStore:
+    """Packed sentence table with per-topic/section integer index arrays.
+
+    Sentence text is kept in a few large string chunks with a start
+    offset per id, instead of one str object each (~50 bytes of overhead
+    apiece). Sentences added since the last read are joined into a new
+    chunk the next time text is read, so a read never copies text that
+    was already compacted and a growing live store pays O(1) per sentence.
+    Each sentence is stored once no matter how many topics it matches;
+    topics only hold 4-byte ids, and a topic/section array is only
+    created once something is filed under it. Metadata is kept in flat
+    arrays and handed out as SentenceRecord objects on request.
+    """
+
+    def __init__(self, topic_names):
+        self.topic_names = list(topic_names)
+        self._chunks = []                   # compacted sentences, back to back, one str per compaction
+        self._chunk_starts = array('I')     # chunk -> start in the logical buffer
+        self._pending = []                  # sentences added since the last compaction
+        self._starts = array('I')           # id -> start in the logical buffer
+        self._compacted = 0                 # length of _chunks
+        self._length = 0                    # length of _chunks plus _pending
+        self._offsets = array('I')          # id -> offset
+        self._sections = array('B')         # id -> index into SECTIONS
+        self._scores = array('f')           # id -> centrality, NaN until ranked
+        self._keyword_ids = array('I')      # id -> index into _keyword_sets
+        self._keyword_sets = [()]           # distinct matched-keyword tuples
+        self._keyword_lookup = {(): 0}
+        self._index = {}                    # (topic, section) -> array of ids
+
+    def __len__(self):
+        return len(self._starts)
+
+    def add(self, sentence, topics, section, offset=0, keywords=(), order=None):
+        """File a sentence under each of `topics` in `section`; returns its id
+
+        Ids are appended to each topic/section in arrival order, or kept
+        sorted by `order(id)` when given, so a sentence that replaces an
+        earlier one can be filed back where that one was.
+        """
+        sentence_id = len(self._starts)
+        self._starts.append(self._length)
+        self._pending.append(sentence)
+        self._length += len(sentence)
+        self._offsets.append(offset)
+        self._sections.append(SECTIONS.index(section))
+        self._scores.append(_UNRANKED)
+
+        keywords = tuple(keywords)
+        keyword_id = self._keyword_lookup.get(keywords)
+        if keyword_id is None:
+            keyword_id = self._keyword_lookup[keywords] = len(self._keyword_sets)
+            self._keyword_sets.append(keywords)
+        self._keyword_ids.append(keyword_id)
+
+        for topic in topics:
+            ids = self._index.get((topic, section))
+            if ids is None:
+                ids = self._index[(topic, section)] = array('I')
+            if order is None or not ids or order(ids[-1]) <= order(sentence_id):
+                ids.append(sentence_id)
+            else:
+                ids.insert(bisect_right(ids, order(sentence_id), key=order), sentence_id)
+        return sentence_id
+
+    def remove(self, sentence_id, topics, order=None):
+        """Unfile a sentence from `topics`; its id and text stay allocated
+
+        `order` must be the key the sentence was filed with, if any.
+        """
+        section = SECTIONS[self._sections[sentence_id]]
+        for topic in topics:
+            ids = self._index[(topic, section)]
+            if order is None:
+                ids.remove(sentence_id)
+            else:
+                del ids[bisect_left(ids, order(sentence_id), key=order)]
+            if not ids:
+                del self._index[(topic, section)]
+
+    def compact(self):
+        """Join pending sentences into a new text chunk"""
+        if self._pending:
+            self._chunks.append("".join(self._pending))
+            self._chunk_starts.append(self._compacted)
+            self._compacted = self._length
+            self._pending = []
+
+    def sentence(self, sentence_id):
+        return self.texts((sentence_id,))[0]
+
+    def texts(self, ids):
+        """Sentence text for each id"""
+        self.compact()
+        chunks, chunk_starts, starts, count = self._chunks, self._chunk_starts, self._starts, len(self._starts)
+        if len(chunks) == 1:
+            text = chunks[0]
+            return [text[starts[i]:starts[i + 1] if i + 1 < count else self._length] for i in ids]
+        texts = []
+        for i in ids:
+            start = starts[i]
+            end = starts[i + 1] if i + 1 < count else self._length
+            chunk = bisect_right(chunk_starts, start) - 1
+            base = chunk_starts[chunk]
+            texts.append(chunks[chunk][start - base:end - base])
+        return texts
+
+    def record(self, sentence_id):
+        score = self._scores[sentence_id]
+        return SentenceRecord(
+            sentence_id,
+            self._offsets[sentence_id],
+            self._keyword_sets[self._keyword_ids[sentence_id]],
+            SECTIONS[self._sections[sentence_id]],
+            None if score != score else score,
+        )
+
+    def set_scores(self, ids, scores):
+        """Record the ranking score of each id"""
+        for sentence_id, score in zip(ids, scores):
+            self._scores[sentence_id] = score
+
+    def ids(self, topic, section):
+        return self._index.get((topic, section), _NO_IDS)
+
+    def section(self, topic, section):
+        """Sequence view of the sentences filed under topic/section"""
+        return SectionView(self, self.ids(topic, section))
+
+    def entries(self):
+        """(topic, section, ids) for every non-empty topic/section, topics in store order"""
+        for topic in self.topic_names:
+            for section in SECTIONS:
+                ids = self._index.get((topic, section))
+                if ids:
+                    yield topic, section, ids
+
+    def has_topic(self, topic):
+        return any((topic, section) in self._index for section in SECTIONS)
+
+    def topics_view(self):
+        """Read-only view shaped like the old {topic: {section: [sentences]}} dict"""
+        return TopicsView(self)
+
+    def to_dict(self):
+        """Plain, mutable {topic: {section: [sentences]}} copy (non-empty topics only)"""
+        return {topic: {section: self.texts(self.ids(topic, section)) for section in SECTIONS}
+                for topic in self.topic_names if self.has_topic(topic)}
+
+
+_NO_IDS = array('I')
+_UNRANKED = float('nan')
+
+
+class SectionView(Sequence):
+    """Sentences of one topic/section, resolved through the store on access"""
+    __slots__ = ('_store', '_ids')
+
+    def __init__(self, store, ids):
+        self._store = store
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._store.texts(self._ids[index])
+        return self._store.sentence(self._ids[index])
+
+    def __iter__(self):
+        return iter(self._store.texts(self._ids))
+
+    def __eq__(self, other):
+        return list(self) == list(other) if isinstance(other, (Sequence, list)) else NotImplemented
+
+    # Compares equal to lists, which are unhashable, so it must not be hashable either
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+    @property
+    def ids(self):
+        return self._ids
+
+    def set_scores(self, scores):
+        """Write ranking scores, one per sentence in view order, onto the records"""
+        self._store.set_scores(self._ids, scores)
+
+
+class TopicView(Mapping):
+    """{section: SectionView} for one topic; every section key is present"""
+    __slots__ = ('_store', '_topic')
+
+    def __init__(self, store, topic):
+        self._store = store
+        self._topic = topic
+
+    def __getitem__(self, section):
+        if section not in SECTIONS:
+            raise KeyError(section)
+        return self._store.section(self._topic, section)
+
+    def __iter__(self):
+        return iter(SECTIONS)
+
+    def __len__(self):
+        return len(SECTIONS)
+
+
+class TopicsView(Mapping):
+    """{topic: TopicView} containing only topics with at least one sentence.
+
+    Read-only; `to_dict()` returns a mutable copy for callers that edit
+    the result.
+    """
+    __slots__ = ('store',)
+
+    def __init__(self, store):
+        self.store = store
+
+    def to_dict(self):
+        return self.store.to_dict()
+
+    def __getitem__(self, topic):
+        if not self.store.has_topic(topic):
+            raise KeyError(topic)
+        return TopicView(self.store, topic)
+
+    def __iter__(self):
+        return (t for t in self.store.topic_names if self.store.has_topic(t))
+
+    def __len__(self):
+        return sum(1 for _ in self)
@@ -0,0 +1,198 @@
+import os
+import json
+import math
+import argparse
+from typing import Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from resource_budget import machine_key
+from whisper_backends import BACKENDS
+
+# {"default": {...}, "machines": {"<host>/<cpus>": {...}}}; a machine's profile wins over the default
+SETTINGS_PATH = os.environ.get(
+    "NOTEFORGE_SETTINGS", os.path.join(os.path.expanduser("~"), ".noteforge", "settings.json")
+)
+
+
+def live(default, **kwargs):
+    """A field that can be changed while recording"""
+    return Field(default, json_schema_extra={'live': True}, **kwargs)
+
+
+class AudioSettings(BaseModel):
+    sample_rate: Literal[16000] = Field(16000, description="Pipeline sample rate (devices are resampled to it)")
+    frame_ms: Literal[10, 20, 30] = Field(20, description="VAD frame length (ms)")
+    max_queued_frames: int = live(500, ge=50, le=10000, description="Frames buffered before audio is dropped")
+
+
+class VadSettings(BaseModel):
+    aggressiveness: int = live(2, ge=0, le=3, description="WebRTC VAD aggressiveness (0-3)")
+    silence_ms: int = live(500, ge=100, le=5000, description="Silence that ends a sentence (ms)")
+    min_segment_s: float = live(1.0, ge=0.1, le=10.0, description="Shortest sentence sent to Whisper (s)")
+    vosk_idle_ms: Optional[int] = live(1000, ge=200, description="Pause Vosk after this much silence (ms, empty = never)")
+    preroll_ms: int = live(300, ge=0, le=2000, description="Audio replayed into Vosk when speech resumes (ms)")
+
+
+class ModelSettings(BaseModel):
+    vosk_model_path: str = Field("model", description="Vosk model folder")
+    whisper_model_size: str = Field("base", description="Whisper model size")
+    whisper_backend: str = Field("openai-whisper", description="Whisper runtime")
+    stream_features: bool = Field(True, description="Compute log-mel features during speech")
+
+    @field_validator('whisper_backend')
+    @classmethod
+    def known_backend(cls, value):
+        if value not in BACKENDS:
+            raise ValueError(f"must be one of {', '.join(BACKENDS)}")
+        return value
+
+
+class WhisperSettings(BaseModel):
+    # The gate is opt-in (like the server's --skip-confident). Turning it on or off waits for the
+    # next recording; the thresholds apply live
+    skip_confidence: Optional[float] = live(None, ge=0.0, le=1.0,
+                                            description="Skip Whisper above this Vosk word confidence, e.g. 0.85 (empty = never)")
+    skip_avg_confidence: float = live(0.93, ge=0.0, le=1.0, description="...and above this average confidence")
+    language: str = Field("english", description="Decode language, or 'auto'")
+    languages: Tuple[str, ...] = Field(("english", "vietnamese"), description="Candidates for 'auto'")
+
+
+class MetricsSettings(BaseModel):
+    enabled: bool = live(True, description="Serve live metrics on localhost")
+    port: int = live(9464, ge=1024, le=65535, description="Metrics port (http://127.0.0.1:<port>/metrics)")
+    snapshot_s: float = live(15.0, ge=1.0, le=3600.0, description="Seconds between JSON metrics snapshots")
+
+
+class Settings(BaseModel):
+    """Everything HybridTranscriberApp used to hard-code.
+
+    Fields marked live (see `is_live`) are pushed into a running
+    recording by `HybridTranscriberApp.apply_settings`; the rest take
+    effect when the next recording starts.
+    """
+    audio: AudioSettings = AudioSettings()
+    vad: VadSettings = VadSettings()
+    models: ModelSettings = ModelSettings()
+    whisper: WhisperSettings = WhisperSettings()
+    metrics: MetricsSettings = MetricsSettings()
+
+    @classmethod
+    def load(cls, path=SETTINGS_PATH, machine=None):
+        """This machine's profile, else the default profile, else built-in defaults"""
+        profiles = read_profiles(path)
+        data = profiles.get('machines', {}).get(machine or machine_key()) or profiles.get('default')
+        if not data:
+            return cls()
+        try:
+            return cls.model_validate(data)
+        except ValidationError as e:
+            print(f"Ignoring invalid settings in {path}: {e}")
+            return cls()
+
+    def save(self, path=SETTINGS_PATH, machine=None, default=False):
+        """Store as this machine's profile (or as the default for every machine)"""
+        profiles = read_profiles(path)
+        if default:
+            profiles['default'] = self.model_dump(mode='json')
+        else:
+            profiles.setdefault('machines', {})[machine or machine_key()] = self.model_dump(mode='json')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(profiles, f, indent=2)
+        os.replace(tmp, path)
+
+    def changes(self, other):
+        """'section.field' names whose value differs in `other`"""
+        changed = []
+        for section in type(self).model_fields:
+            mine, theirs = getattr(self, section), getattr(other, section)
+            changed.extend(f"{section}.{name}" for name in type(mine).model_fields
+                           if getattr(mine, name) != getattr(theirs, name))
+        return changed
+
+    @classmethod
+    def is_live(cls, name):
+        section, field = name.split(".")
+        extra = cls.model_fields[section].annotation.model_fields[field].json_schema_extra or {}
+        return extra.get('live', False)
+
+    def segmenter_options(self, frame_ms=None):
+        """Keyword arguments for SpeechSegmenter (and its configure())
+
+        Durations become frame counts at `frame_ms`, which defaults to
+        audio.frame_ms; a running segmenter must pass its own frame size,
+        since a new one only applies from the next recording.
+        """
+        frame_ms = frame_ms or self.audio.frame_ms
+        vad = self.vad
+        return {
+            'vad_mode': vad.aggressiveness,
+            'silence_frames': math.ceil(vad.silence_ms / frame_ms),
+            'min_segment_s': vad.min_segment_s,
+            'vosk_idle_frames': None if vad.vosk_idle_ms is None else math.ceil(vad.vosk_idle_ms / frame_ms),
+            'preroll_frames': math.ceil(vad.preroll_ms / frame_ms),
+        }
+
+    def with_value(self, name, value):
+        """Copy with one 'section.field' changed, validated"""
+        data = self.model_dump()
+        section, _, field = name.partition(".")
+        if section not in data or field not in data[section]:
+            raise KeyError(name)
+        data[section][field] = value
+        return type(self).model_validate(data)
+
+
+def read_profiles(path=SETTINGS_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def parse_value(text):
+    """CLI value: JSON when it parses ("null", "0.9", "[...]"), else the raw string"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or change NoteForge settings")
+    parser.add_argument("--path", default=SETTINGS_PATH)
+    parser.add_argument("--default", action="store_true", help="Use the default profile instead of this machine's")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("show", help="Print the effective settings for this machine")
+    set_ = sub.add_parser("set", help="Change one value, e.g. vad.silence_ms 700")
+    set_.add_argument("name")
+    set_.add_argument("value")
+    sub.add_parser("reset", help="Restore built-in defaults")
+    args = parser.parse_args()
+
+    machine = "default" if args.default else None
+    settings = Settings.load(args.path, machine)
+    if args.command == "show":
+        print(f"# {'default profile' if args.default else machine_key()} ({args.path})")
+        print(json.dumps(settings.model_dump(mode='json'), indent=2))
+    elif args.command == "set":
+        try:
+            settings = settings.with_value(args.name, parse_value(args.value))
+        except KeyError:
+            raise SystemExit(f"Unknown setting '{args.name}'")
+        except ValidationError as e:
+            raise SystemExit(str(e))
+        settings.save(args.path, default=args.default)
+        section, field = args.name.split(".")
+        print(f"{args.name} = {getattr(getattr(settings, section), field)!r}")
+    elif args.command == "reset":
+        Settings().save(args.path, default=args.default)
+        print("Settings reset to defaults")
+
+
+if __name__ == "__main__":
+    main()
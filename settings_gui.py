@@ -0,0 +1,154 @@
+import typing
+import customtkinter as ctk
+from tkinter import messagebox
+from pydantic import ValidationError
+
+from resource_budget import machine_key
+from settings import Settings, SETTINGS_PATH
+from whisper_backends import BACKENDS
+
+SECTION_TITLES = {'audio': "Audio", 'vad': "Speech Detection", 'models': "Models", 'whisper': "Whisper",
+                  'metrics': "Metrics"}
+
+
+class SettingsWindow(ctk.CTkToplevel):
+    """Form over every Settings field, saved as this machine's profile.
+
+    `on_apply(settings)` runs after saving (the transcriber passes its
+    apply_settings) and may return the names that only take effect when
+    the next recording starts.
+    """
+
+    def __init__(self, master=None, settings=None, on_apply=None, path=SETTINGS_PATH):
+        super().__init__(master)
+
+        self.title("NoteForge - Settings")
+        self.geometry("640x720")
+        self.attributes("-topmost", True)
+
+        self.path = path
+        self.settings = settings or Settings.load(path)
+        self.on_apply = on_apply
+        self.inputs = {}        # "section.field" -> callable returning the entered value
+        self.form = None
+        self.status_var = ctk.StringVar(value=f"Profile: {machine_key()}")
+
+        self.create_widgets()
+        self.focus()
+
+    def create_widgets(self):
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        ctk.CTkLabel(self, text="⚙️ Settings", font=("Segoe UI", 20, "bold")).grid(row=0, column=0, pady=(15, 5))
+        self.build_form(self.settings)
+
+        footer = ctk.CTkFrame(self, fg_color="transparent")
+        footer.grid(row=2, column=0, padx=20, pady=(5, 15), sticky="ew")
+        ctk.CTkLabel(footer, text="● applies while recording; the rest from the next recording",
+                     text_color="gray").pack(anchor="w")
+        ctk.CTkLabel(footer, textvariable=self.status_var, text_color="gray", wraplength=580,
+                     justify="left").pack(anchor="w", pady=(0, 8))
+
+        ctk.CTkButton(footer, text="Close", command=self.destroy, width=90).pack(side="right", padx=5)
+        ctk.CTkButton(footer, text="💾 Save & Apply", command=self.save_and_apply,
+                      fg_color="#27AE60", hover_color="#229954").pack(side="right", padx=5)
+        ctk.CTkButton(footer, text="Reset to Defaults", command=self.reset, fg_color="transparent",
+                      border_width=1).pack(side="left", padx=5)
+
+    def build_form(self, settings):
+        if self.form is not None:
+            self.form.destroy()
+        self.inputs = {}
+        self.form = ctk.CTkScrollableFrame(self)
+        self.form.grid(row=1, column=0, padx=20, pady=5, sticky="nsew")
+        self.form.grid_columnconfigure(1, weight=1)
+
+        row = 0
+        for section in Settings.model_fields:
+            ctk.CTkLabel(self.form, text=SECTION_TITLES.get(section, section.title()),
+                         font=("Segoe UI", 15, "bold")).grid(row=row, column=0, columnspan=2, sticky="w", pady=(12, 4))
+            row += 1
+            values = getattr(settings, section)
+            for name, field in type(values).model_fields.items():
+                key = f"{section}.{name}"
+                label = (field.description or name) + ("  ●" if Settings.is_live(key) else "")
+                ctk.CTkLabel(self.form, text=label, anchor="w", justify="left",
+                             wraplength=320).grid(row=row, column=0, sticky="w", padx=10, pady=3)
+                self.make_input(key, field.annotation, getattr(values, name)).grid(
+                    row=row, column=1, sticky="ew", padx=10, pady=3)
+                row += 1
+
+    def make_input(self, key, annotation, value):
+        choices = list(BACKENDS) if key == 'models.whisper_backend' else None
+        if typing.get_origin(annotation) is typing.Literal:
+            choices = list(typing.get_args(annotation))
+
+        if annotation is bool:
+            var = ctk.BooleanVar(value=value)
+            widget = ctk.CTkSwitch(self.form, text="", variable=var)
+            self.inputs[key] = var.get
+        elif choices:
+            widget = ctk.CTkOptionMenu(self.form, values=[str(c) for c in choices])
+            widget.set(str(value))
+            self.inputs[key] = lambda: next(c for c in choices if str(c) == widget.get())
+        else:
+            widget = ctk.CTkEntry(self.form)
+            widget.insert(0, format_value(value))
+            self.inputs[key] = lambda: parse_value(widget.get(), annotation)
+        return widget
+
+    def collect(self):
+        """Settings from the form; raises ValidationError"""
+        data = self.settings.model_dump()
+        for key, read in self.inputs.items():
+            section, field = key.split(".")
+            data[section][field] = read()
+        return Settings.model_validate(data)
+
+    def save_and_apply(self):
+        try:
+            settings = self.collect()
+        except ValidationError as e:
+            messagebox.showerror("Invalid settings", format_errors(e), parent=self)
+            return
+        try:
+            settings.save(self.path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save settings: {e}", parent=self)
+            return
+
+        self.settings = settings
+        pending = self.on_apply(settings) if self.on_apply else []
+        status = f"Saved for {machine_key()}."
+        if pending:
+            status += " From the next recording: " + ", ".join(pending)
+        self.status_var.set(status)
+
+    def reset(self):
+        """Show the built-in defaults; nothing changes until they are saved"""
+        self.build_form(Settings())
+        self.status_var.set("Defaults loaded - Save & Apply to keep them")
+
+
+def format_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, tuple):
+        return ", ".join(value)
+    return str(value)
+
+
+def parse_value(text, annotation):
+    """Entry text -> value for pydantic: empty means None for optional fields, tuples are comma-separated"""
+    text = text.strip()
+    args = typing.get_args(annotation)
+    if not text and type(None) in args:
+        return None
+    if typing.get_origin(annotation) is tuple:
+        return tuple(part.strip() for part in text.split(",") if part.strip())
+    return text
+
+
+def format_errors(error):
+    return "\n".join(f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors())
@@ -0,0 +1,133 @@
+import numpy as np
+
+try:
+    import whisper
+except ImportError:
+    whisper = None
+
+# Whisper's front end: 25 ms Hann windows every 10 ms, 30 s input windows
+SAMPLE_RATE = 16000
+N_FFT = 400
+HOP_LENGTH = 160
+N_SAMPLES = 30 * SAMPLE_RATE
+N_FRAMES = N_SAMPLES // HOP_LENGTH
+LOG_FLOOR = -10.0       # log10 of the 1e-10 clamp, i.e. any all-zero (padding) frame
+
+_WINDOW = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)).astype(np.float32)   # periodic Hann
+_FILTERS = {}
+
+
+def slaney_mel_filters(n_mels, sample_rate=SAMPLE_RATE, n_fft=N_FFT):
+    """Slaney-style mel filterbank (librosa's default), the one Whisper ships"""
+    def hz_to_mel(f):
+        f = np.asarray(f, dtype=np.float64)
+        mel = f / (200.0 / 3)
+        log_region = f >= 1000.0
+        return np.where(log_region, 15.0 + np.log(np.maximum(f, 1e-10) / 1000.0) / (np.log(6.4) / 27.0), mel)
+
+    def mel_to_hz(m):
+        m = np.asarray(m, dtype=np.float64)
+        f = m * (200.0 / 3)
+        return np.where(m >= 15.0, 1000.0 * np.exp((np.log(6.4) / 27.0) * (m - 15.0)), f)
+
+    fft_freqs = np.linspace(0, sample_rate / 2, n_fft // 2 + 1)
+    mel_points = mel_to_hz(np.linspace(hz_to_mel(0.0), hz_to_mel(sample_rate / 2), n_mels + 2))
+    widths = np.diff(mel_points)
+    ramps = mel_points[:, None] - fft_freqs[None, :]
+    lower = -ramps[:-2] / widths[:-1, None]
+    upper = ramps[2:] / widths[1:, None]
+    weights = np.maximum(0, np.minimum(lower, upper))
+    weights *= (2.0 / (mel_points[2:] - mel_points[:-2]))[:, None]
+    return weights.astype(np.float32)
+
+
+def mel_filters(n_mels=80):
+    """Whisper's own filterbank when it is installed, else an identical NumPy one"""
+    if n_mels not in _FILTERS:
+        if whisper is not None:
+            _FILTERS[n_mels] = whisper.audio.mel_filters("cpu", n_mels).numpy()
+        else:
+            _FILTERS[n_mels] = slaney_mel_filters(n_mels)
+    return _FILTERS[n_mels]
+
+
+def _log_mel_frames(filters, windows):
+    spectrum = np.abs(np.fft.rfft(windows * _WINDOW, axis=1)) ** 2
+    return np.log10(np.maximum(filters @ spectrum.T, 1e-10))
+
+
+def _normalize(log_spec):
+    log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+    return ((log_spec + 4.0) / 4.0).astype(np.float32)
+
+
+def log_mel_batch(audio, n_mels=80):
+    """Whisper's transcribe() front end in one go: pad with 30 s of zeros, STFT, keep one window.
+
+    Reference for LogMelStream; this is the work that used to run after
+    the segment closed.
+    """
+    audio = np.concatenate((np.asarray(audio, dtype=np.float32), np.zeros(N_SAMPLES, dtype=np.float32)))
+    padded = np.pad(audio, N_FFT // 2, mode='reflect')
+    count = len(audio) // HOP_LENGTH                  # torch.stft frames minus the dropped last one
+    index = np.arange(count)[:, None] * HOP_LENGTH + np.arange(N_FFT)[None, :]
+    log_spec = _log_mel_frames(mel_filters(n_mels), padded[index])
+    return _normalize(log_spec)[:, :N_FRAMES]
+
+
+class LogMelStream:
+    """Whisper log-mel features computed while the speaker is still talking.
+
+    Feed 20 ms frames as they arrive; each one completes two 10 ms mel
+    frames. `finish()` only has to compute the last couple of frames that
+    straddle the end of speech. The 30 s of zero padding Whisper appends
+    is never transformed: its frames are the constant log floor and are
+    pre-filled. Segments too long for one 30 s window return None.
+    """
+
+    def __init__(self, n_mels=80):
+        self.n_mels = n_mels
+        self.filters = mel_filters(n_mels)
+        self.audio = np.zeros(N_SAMPLES + N_FFT, dtype=np.float32)   # zero tail = Whisper's padding
+        self.log_spec = np.full((n_mels, N_FRAMES), LOG_FLOOR, dtype=np.float32)
+        self.samples = 0
+        self.next_frame = 0
+        self.overflow = False
+
+    @property
+    def limit(self):
+        # Past this, frames beyond the first window would see speech and change the max
+        return N_SAMPLES - N_FFT // 2
+
+    def feed(self, pcm):
+        """Add int16 PCM bytes"""
+        if self.overflow:
+            return
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        if self.samples + len(samples) > self.limit:
+            self.overflow = True
+            return
+        self.audio[self.samples:self.samples + len(samples)] = samples
+        self.samples += len(samples)
+        # Frame t is complete once samples up to t*HOP + N_FFT/2 have arrived
+        self._compute_until((self.samples - N_FFT // 2) // HOP_LENGTH + 1)
+
+    def _compute_until(self, end):
+        end = min(end, N_FRAMES)
+        start = self.next_frame
+        if end <= start or self.samples <= N_FFT // 2:
+            return
+        starts = np.arange(start, end) * HOP_LENGTH - N_FFT // 2
+        index = starts[:, None] + np.arange(N_FFT)[None, :]
+        # Reflect the first half window like torch.stft(center=True)
+        index = np.abs(index)
+        self.log_spec[:, start:end] = _log_mel_frames(self.filters, self.audio[index])
+        self.next_frame = end
+
+    def finish(self):
+        """Normalized (n_mels, 3000) features for the segment, or None if it is over 30 s"""
+        if self.overflow or self.samples <= N_FFT // 2:
+            return None
+        # Frames whose window still overlaps the end of speech; the rest is padding
+        self._compute_until((self.samples + N_FFT // 2) // HOP_LENGTH + 1)
+        return _normalize(self.log_spec)
@@ -1,25 +1,55 @@
-import os
 import re
-from datetime import datetime
-from collections import defaultdict
+import threading
+from array import array
 from pptx import Presentation
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_LEFT
-import nltk
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
+from note_export import (
+    SECTION_LIMITS, build_note_document, case_citation_runs, render_text, export_document, write_pdf
+)
+from sentence_ranking import CandidatePool, SentenceRanker, rank_topics
+from sentence_store import SectionView, SentenceStore
+from sentence_segmenter import DEFAULT_SEGMENTER
 
-class LectureNoteGenerator:
+class OperationCancelled(Exception):
+    """Raised inside process_file when its cancellation token is set"""
+
+
+class CancellationToken:
+    """Thread-safe flag a caller sets to stop a running process_file"""
+    
     def __init__(self):
+        self._event = threading.Event()
+    
+    def cancel(self):
+        self._event.set()
+    
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+    
+    def check(self):
+        if self._event.is_set():
+            raise OperationCancelled()
+
+
+class LectureNoteGenerator:
+    # Sentences classified between cancellation checks
+    CANCEL_CHECK_INTERVAL = 500
+    # Re-rank a clean live section once the corpus (and so its IDF) has grown this much since it was ranked
+    RERANK_GROWTH = 0.25
+    # Live sections keep this many times their limit as ranking candidates
+    CANDIDATE_FACTOR = 4
+    
+    def __init__(self, rank_sentences=True, segmenter=None):
         self.file_path = None
         self.file_type = None
         
+        # Abbreviation/citation-aware splitting ("Carlill v. Carbolic", "s. 2")
+        self.segmenter = segmenter or DEFAULT_SEGMENTER
+        
+        # Keep the most central sentences per section instead of the first N
+        self.rank_sentences = rank_sentences
+        
         # Legal topic keywords for detection
         self.topic_keywords = {
             'Offer and Acceptance': ['offer', 'acceptance', 'invitation to treat', 'postal rule', 'unilateral contract'],
@@ -30,9 +60,16 @@ class LectureNoteGenerator:
             'Capacity': ['capacity', 'minor', 'mental incapacity', 'intoxication'],
             'Privity of Contract': ['privity', 'third party', 'rights of third parties']
         }
+        
+        self._reset_live_state()
     
-    def process_file(self, file_path, progress_callback=None):
-        """Main entry point for generating lecture notes"""
+    def process_file(self, file_path, progress_callback=None, cancel_token=None):
+        """Main entry point for generating lecture notes
+        
+        If `cancel_token` is given it is checked between stages and every
+        CANCEL_CHECK_INTERVAL sentences; OperationCancelled is raised once
+        it has been set.
+        """
         self.file_path = file_path
         self.file_type = self._detect_file_type()
         
@@ -45,26 +82,195 @@ class LectureNoteGenerator:
         else:
             raw_content = self._extract_text_content()
         
+        if cancel_token:
+            cancel_token.check()
         if progress_callback:
             progress_callback("Analyzing topics...", 0.4)
         
         # Organize by topics
-        topics = self._organize_by_topics(raw_content)
+        topics = self._organize_by_topics(raw_content, cancel_token=cancel_token)
         
+        if cancel_token:
+            cancel_token.check()
         if progress_callback:
             progress_callback("Formatting notes...", 0.7)
         
-        # Format as study guide
-        formatted_notes = self._format_as_study_guide(topics)
+        # Build the render tree once and format it as a study guide
+        document = self._build_document(topics, cancel_token=cancel_token)
+        formatted_notes = render_text(document)
         
         if progress_callback:
             progress_callback("Complete!", 1.0)
         
         return {
             'notes': formatted_notes,
-            'topics': topics
+            'topics': topics,
+            'document': document
         }
     
+    def classify_file(self, file_path, cancel_token=None):
+        """Extract and classify one file without ranking or rendering; returns its SentenceStore"""
+        self.file_path = file_path
+        self.file_type = self._detect_file_type()
+        if self.file_type == 'powerpoint':
+            raw_content = self._extract_powerpoint_content()
+        else:
+            raw_content = self._extract_text_content()
+        return self._organize_by_topics(raw_content, cancel_token=cancel_token).store
+    
+    # --- Live (incremental) notes ---
+    # Finalized transcription segments are classified as they arrive, so the
+    # study guide can be rendered at any moment without re-reading earlier
+    # text. Each sentence is cleaned, classified and appended once, and
+    # offered to a bounded CandidatePool per section; rendering only
+    # re-ranks the pools of sections that changed since the previous render,
+    # so the cost per sentence stays flat however long the lecture runs.
+    
+    def start_live_session(self, source="Live transcription"):
+        """Reset state for a new incremental session"""
+        self.file_path = source
+        self.file_type = 'live'
+        self._reset_live_state(source)
+    
+    def _reset_live_state(self, source="Live transcription"):
+        self._live_source = source
+        self._live_store = self._new_store()
+        self._live_offset = 0
+        self._live_ranker = SentenceRanker()
+        self._live_pools = {}       # (topic, section) -> CandidatePool
+        self._live_selected = {}    # (topic, section) -> chosen sentences
+        self._live_ranked_at = {}   # (topic, section) -> ranker corpus size when it was last ranked
+        self._live_dirty = set()    # (topic, section) changed since last render
+        self._live_count = 0
+        self._live_segments = []    # (raw text, offset, sentence ids) per segment, for correct_segment
+        self._live_segment_of = array('I')  # sentence id -> index of the segment it came from
+    
+    def add_segment(self, text):
+        """Feed one finalized transcription segment (may hold several sentences)"""
+        segment = len(self._live_segments)
+        offset = self._live_offset
+        cleaned = self._clean_transcript(text)
+        ids = self._add_live_sentences(cleaned, offset, segment)
+        self._live_segments.append((text, offset, ids))
+        self._live_offset += len(cleaned) + 1
+        return len(ids)
+    
+    def correct_segment(self, old_text, new_text):
+        """Replace the latest segment equal to `old_text`; returns False if there is none
+        
+        Only that segment's sentences are withdrawn and the corrected text
+        filed in their place, at the same position in each section. Later
+        offsets are not shifted, so a correction that lengthens its segment
+        can overlap the offsets of the next one.
+        """
+        segments = self._live_segments
+        for i in range(len(segments) - 1, -1, -1):
+            if segments[i][0] == old_text:
+                break
+        else:
+            return False
+        _, offset, old_ids = segments[i]
+        for sentence_id in old_ids:
+            self._withdraw_live_sentence(sentence_id)
+        ids = self._add_live_sentences(self._clean_transcript(new_text), offset, i)
+        segments[i] = (new_text, offset, ids)
+        return True
+    
+    def add_sentence(self, sentence, offset=None, segment=None):
+        """Classify a single finalized sentence into the live topic state; returns its id"""
+        if offset is None:
+            offset = self._live_offset
+            self._live_offset += len(sentence) + 1
+        if segment is None:
+            # Files it after every segment received so far
+            segment = len(self._live_segments)
+        self._live_segment_of.append(segment)
+        sentence_id, detected_topics, content_type = self._file_sentence(
+            sentence, self._live_store, offset, order=self._live_position
+        )
+        if self.rank_sentences:
+            self._live_ranker.add(sentence, sentence_id)
+        limit = SECTION_LIMITS[content_type]
+        for topic in detected_topics:
+            key = (topic, content_type)
+            self._live_dirty.add(key)
+            if self.rank_sentences:
+                pool = self._live_pools.get(key)
+                if pool is None:
+                    pool = self._live_pools[key] = CandidatePool(self._live_ranker, limit * self.CANDIDATE_FACTOR)
+                pool.offer(sentence_id)
+        self._live_count += 1
+        return sentence_id
+    
+    def _add_live_sentences(self, cleaned, offset, segment):
+        ids = array('I')
+        for start, sentence in self._iter_sentence_spans(cleaned):
+            ids.append(self.add_sentence(sentence, offset=offset + start, segment=segment))
+        return ids
+    
+    def _withdraw_live_sentence(self, sentence_id):
+        """Take a sentence back out of the live store, its pools and the ranker"""
+        store = self._live_store
+        detected_topics, _ = self._sentence_topics(store.sentence(sentence_id), store)
+        content_type = store.record(sentence_id).section
+        store.remove(sentence_id, detected_topics, order=self._live_position)
+        for topic in detected_topics:
+            key = (topic, content_type)
+            self._live_dirty.add(key)
+            if self.rank_sentences:
+                self._live_pools[key].discard(sentence_id)
+        if self.rank_sentences:
+            self._live_ranker.remove(sentence_id)
+        self._live_count -= 1
+    
+    def _live_position(self, sentence_id):
+        """Sort key keeping live sections in transcript order across corrections"""
+        return self._live_segment_of[sentence_id], sentence_id
+    
+    @property
+    def live_sentence_count(self):
+        return self._live_count
+    
+    def live_topics(self):
+        """Non-empty live topics, in the same shape process_file returns"""
+        return self._live_store.topics_view()
+    
+    def build_live_document(self):
+        """Render tree for the live session, re-ranking only changed or stale sections
+        
+        A section is re-ranked when it changed, or when the corpus has grown
+        by RERANK_GROWTH since it was ranked: IDF weights drift as the
+        lecture goes on, so an untouched section's choice goes stale too.
+        Either way only the section's candidate pool is ranked.
+        """
+        corpus = len(self._live_ranker)
+        stale = {key for key, size in self._live_ranked_at.items() if corpus > size * (1 + self.RERANK_GROWTH)}
+        for key in self._live_dirty | stale:
+            topic, section = key
+            limit = SECTION_LIMITS[section]
+            if self.rank_sentences:
+                pool = self._live_pools[key]
+                if key in stale:
+                    pool.rescore()
+                candidates = array('I', sorted(pool.keys, key=self._live_position))
+                self._live_selected[key] = self._live_ranker.select(SectionView(self._live_store, candidates), limit)
+                self._live_ranked_at[key] = corpus
+            else:
+                self._live_selected[key] = self._live_store.section(topic, section)[:limit]
+        self._live_dirty.clear()
+        
+        selected = {}
+        for topic, content in self.live_topics().items():
+            selected[topic] = {
+                section: self._live_selected.get((topic, section), [])
+                for section in content
+            }
+        return build_note_document(selected, self._live_source)
+    
+    def render_live_notes(self):
+        """Up-to-date study guide text for the live session"""
+        return render_text(self.build_live_document())
+    
     def _detect_file_type(self):
         """Detect if file is PowerPoint or text"""
         return 'powerpoint' if self.file_path.endswith('.pptx') else 'text'
@@ -121,53 +327,84 @@ class LectureNoteGenerator:
         
         return text.strip()
     
-    def _organize_by_topics(self, text):
-        """Organize content by legal topics"""
-        # Split into sentences
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
-        
-        # Initialize topic structure
-        topics = {}
-        for topic_name in self.topic_keywords.keys():
-            topics[topic_name] = {
-                'definitions': [],
-                'rules': [],
-                'cases': [],
-                'examples': [],
-                'exceptions': []
-            }
+    def _iter_sentence_spans(self, text):
+        """Yield (offset, sentence) for every sentence worth keeping"""
+        for start, end in self.segmenter.spans(text):
+            raw = text[start:end]
+            sentence = raw.strip()
+            if len(sentence) > 20:
+                yield start + len(raw) - len(raw.lstrip()), sentence
+    
+    def _split_sentences(self, text):
+        """Split cleaned text into sentences worth keeping"""
+        return [sentence for _, sentence in self._iter_sentence_spans(text)]
+    
+    def _new_store(self):
+        """Empty compact topic store, topics in keyword order"""
+        return SentenceStore(self.topic_keywords.keys())
+    
+    def _file_sentence(self, sentence, store, offset=0, order=None):
+        """Classify one sentence and file it under its topic(s); returns its id and where it went"""
+        detected_topics, keywords = self._sentence_topics(sentence, store)
         
-        # Classify each sentence
-        for sentence in sentences:
-            # Detect which topic this sentence belongs to
-            detected_topics = self._detect_topics(sentence)
-            
-            # Classify content type
-            content_type = self._classify_content_type(sentence)
-            
-            # Add to appropriate topic(s)
-            for topic in detected_topics:
-                if topic in topics:
-                    topics[topic][content_type].append(sentence)
+        # Classify content type
+        content_type = self._classify_content_type(sentence)
         
-        # Remove empty topics
-        topics = {k: v for k, v in topics.items() if any(v.values())}
+        sentence_id = store.add(sentence, detected_topics, content_type, offset, keywords, order=order)
+        return sentence_id, detected_topics, content_type
+    
+    def _sentence_topics(self, sentence, store):
+        """Topics a sentence is filed under, and the keywords that matched"""
+        matches = self._match_topics(sentence)
+        if matches:
+            return [topic for topic, _ in matches], [k for _, matched in matches for k in matched]
+        # If no topic detected, assign to first topic (general)
+        return [store.topic_names[0]], []
+    
+    def _organize_by_topics(self, text, cancel_token=None):
+        """Organize content by legal topics
         
-        return topics
+        Returns a read-only {topic: {section: sentences}} view over a
+        compact SentenceStore (reachable as `.store`); empty topics are
+        left out. `.to_dict()` gives a plain, mutable copy.
+        """
+        store = self._new_store()
+        
+        # Classify each sentence
+        for i, (offset, sentence) in enumerate(self._iter_sentence_spans(text)):
+            if cancel_token and i % self.CANCEL_CHECK_INTERVAL == 0:
+                cancel_token.check()
+            self._file_sentence(sentence, store, offset)
+        
+        return store.topics_view()
     
-    def _detect_topics(self, sentence):
-        """Detect which topics a sentence relates to"""
+    def _match_topics(self, sentence):
+        """(topic, matched keywords) for every topic whose keywords appear"""
         sentence_lower = sentence.lower()
-        detected = []
+        matches = []
         
         for topic, keywords in self.topic_keywords.items():
-            if any(keyword in sentence_lower for keyword in keywords):
-                detected.append(topic)
+            matched = [keyword for keyword in keywords if keyword in sentence_lower]
+            if matched:
+                matches.append((topic, matched))
+        
+        return matches
+    
+    def _detect_topics(self, sentence):
+        """Detect which topics a sentence relates to"""
+        detected = [topic for topic, _ in self._match_topics(sentence)]
         
         # If no topic detected, assign to first topic (general)
         return detected if detected else [list(self.topic_keywords.keys())[0]]
     
+    def topic_of(self, sentence):
+        """First matching topic, or None when no keyword matches"""
+        sentence_lower = sentence.lower()
+        for topic, keywords in self.topic_keywords.items():
+            if any(keyword in sentence_lower for keyword in keywords):
+                return topic
+        return None
+    
     def _classify_content_type(self, sentence):
         """Classify sentence as definition, rule, case, example, or exception"""
         sentence_lower = sentence.lower()
@@ -197,120 +434,40 @@ class LectureNoteGenerator:
     
     def _format_as_study_guide(self, topics):
         """Format organized topics as a study guide"""
-        lines = []
-        
-        # Header
-        lines.append("=" * 70)
-        lines.append("LECTURE NOTES - STUDY GUIDE")
-        lines.append("=" * 70)
-        lines.append(f"Source: {os.path.basename(self.file_path)}")
-        lines.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-        lines.append("")
-        lines.append("Organized by legal topics for effective studying.")
-        lines.append("")
-        
-        # Process each topic
-        for topic_name, content in topics.items():
-            lines.append("")
-            lines.append("=" * 70)
-            lines.append(f"TOPIC: {topic_name.upper()}")
-            lines.append("=" * 70)
-            lines.append("")
-            
-            # Definitions
-            if content['definitions']:
-                lines.append("DEFINITIONS:")
-                lines.append("-" * 40)
-                for definition in content['definitions'][:5]:  # Limit to 5
-                    lines.append(f"• {definition}")
-                lines.append("")
-            
-            # Legal Rules
-            if content['rules']:
-                lines.append("LEGAL RULES & PRINCIPLES:")
-                lines.append("-" * 40)
-                for rule in content['rules'][:10]:  # Limit to 10
-                    lines.append(f"• {rule}")
-                lines.append("")
-            
-            # Key Cases
-            if content['cases']:
-                lines.append("KEY CASES:")
-                lines.append("-" * 40)
-                for case in content['cases'][:8]:  # Limit to 8
-                    # Format case name in bold
-                    case_formatted = self._format_case_citation(case)
-                    lines.append(f"• {case_formatted}")
-                lines.append("")
-            
-            # Exceptions
-            if content['exceptions']:
-                lines.append("EXCEPTIONS & SPECIAL RULES:")
-                lines.append("-" * 40)
-                for exception in content['exceptions'][:5]:
-                    lines.append(f"• {exception}")
-                lines.append("")
-            
-            # Examples
-            if content['examples']:
-                lines.append("PRACTICAL EXAMPLES:")
-                lines.append("-" * 40)
-                for example in content['examples'][:5]:
-                    lines.append(f"• {example}")
-                lines.append("")
-        
-        # Study tips
-        lines.append("")
-        lines.append("=" * 70)
-        lines.append("STUDY TIPS")
-        lines.append("=" * 70)
-        lines.append("• Review each topic's definitions first")
-        lines.append("• Memorize key case names and principles")
-        lines.append("• Understand exceptions to general rules")
-        lines.append("• Practice applying rules to examples")
-        lines.append("")
-        
-        return '\n'.join(lines)
+        return render_text(self._build_document(topics))
     
-    def _format_case_citation(self, text):
-        """Format case citation with bold name"""
-        # Extract case name
-        match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+v\.?\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', text)
+    def _build_document(self, topics, cancel_token=None):
+        """Build the shared render tree used by the text view and every exporter"""
+        select = rank_topics(topics).select if self.rank_sentences else None
         
-        if match:
-            case_name = f"{match.group(1)} v {match.group(2)}"
+        if cancel_token:
+            # Check once per section before it is ranked
+            inner = select or (lambda sentences, limit: sentences[:limit])
             
-            # Extract year if present
-            year_match = re.search(r'\((\d{4})\)', text)
-            if year_match:
-                case_name += f" ({year_match.group(1)})"
-            
-            # Replace in original text
-            return text.replace(match.group(0), f"**{case_name}**")
+            def select(sentences, limit):
+                cancel_token.check()
+                return inner(sentences, limit)
         
-        return text
+        return build_note_document(topics, self.file_path, select=select)
+    
+    def _format_case_citation(self, text):
+        """Format case citation with bold name"""
+        return ''.join(f"**{t}**" if bold else t for t, bold in case_citation_runs(text))
+    
+    def _document_for(self, data):
+        """Reuse the tree from process_file, or rebuild it from the topics"""
+        document = data.get('document')
+        if document is None:
+            document = self._build_document(data.get('topics', {}))
+        return document
+    
+    def export(self, data, *filenames):
+        """Export lecture notes to one or more files (.pdf, .md, .html, .docx, .txt)"""
+        export_document(self._document_for(data), *filenames)
     
     def export_to_pdf(self, data, filename):
         """Export lecture notes to PDF"""
-        doc = SimpleDocTemplate(filename, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Parse the notes text
-        notes_text = data.get('notes', '')
-        lines = notes_text.split('\n')
-        
-        for line in lines:
-            if line.startswith('TOPIC:'):
-                story.append(Spacer(1, 12))
-                story.append(Paragraph(line, styles['Heading1']))
-            elif line.startswith(('DEFINITIONS:', 'LEGAL RULES:', 'KEY CASES:', 'EXCEPTIONS:', 'EXAMPLES:')):
-                story.append(Paragraph(f"<b>{line}</b>", styles['Heading2']))
-            elif line.strip():
-                story.append(Paragraph(line, styles['Normal']))
-                story.append(Spacer(1, 4))
-        
-        doc.build(story)
+        write_pdf(self._document_for(data), filename)
 
 # For backward compatibility
 ConceptualAssistant = LectureNoteGenerator
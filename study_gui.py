@@ -1,15 +1,24 @@
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 import threading
+import queue
 import os
 
 # Import Logic
 try:
-    from study_assistant import ConceptualAssistant
+    from study_assistant import ConceptualAssistant, CancellationToken, OperationCancelled
 except ImportError:
     ConceptualAssistant = None
 
+try:
+    from transcript_index import TranscriptIndex
+except ImportError:
+    TranscriptIndex = None
+
 class StudyAssistantGUI(ctk.CTkToplevel):
+    # Notes are inserted into the textbox this many characters at a time
+    RENDER_CHUNK_CHARS = 20000
+
     def __init__(self, master=None):
         super().__init__(master)
         
@@ -20,6 +29,13 @@ class StudyAssistantGUI(ctk.CTkToplevel):
         self.assistant = None
         self.processed_data = None
         
+        # Worker -> Tk thread channel: ("progress", (msg, value)), ("done", results),
+        # ("cancelled", None) or ("error", message)
+        self.progress_queue = queue.Queue()
+        self.cancel_token = None
+        self.render_job = None
+        self.worker = None
+        
         # Initialize assistant immediately (no heavy model loading)
         if ConceptualAssistant:
             self.assistant = ConceptualAssistant()
@@ -69,7 +85,10 @@ class StudyAssistantGUI(ctk.CTkToplevel):
         self.btn_process = ctk.CTkButton(footer, text="📝 Generate Lecture Notes", command=self.start_processing, fg_color="#27AE60", hover_color="#229954")
         self.btn_process.pack(side="right", padx=10, pady=10)
         
-        self.btn_export = ctk.CTkButton(footer, text="💾 Export PDF", command=self.export_pdf, state="disabled")
+        self.btn_cancel = ctk.CTkButton(footer, text="✖ Cancel", command=self.cancel_processing, state="disabled", width=90, fg_color="#C0392B", hover_color="#A93226")
+        self.btn_cancel.pack(side="right", padx=10)
+        
+        self.btn_export = ctk.CTkButton(footer, text="💾 Export Notes", command=self.export_notes, state="disabled")
         self.btn_export.pack(side="right", padx=10)
 
         self.loaded_filepath = None
@@ -101,25 +120,86 @@ class StudyAssistantGUI(ctk.CTkToplevel):
         self.status_var.set("Generating lecture notes...")
         self.progress_bar.set(0)
         self.btn_process.configure(state="disabled")
+        self.btn_cancel.configure(state="normal")
+        self.stop_rendering()
         
-        threading.Thread(target=self.run_pipeline, daemon=True).start()
+        self.cancel_token = CancellationToken()
+        self.worker = threading.Thread(target=self.run_pipeline, args=(self.cancel_token,), daemon=True)
+        self.worker.start()
+        self.after(50, self.poll_progress)
 
-    def run_pipeline(self):
-        if not self.assistant: return
+    def cancel_processing(self):
+        if self.cancel_token:
+            self.cancel_token.cancel()
+            self.status_var.set("Cancelling...")
+            self.btn_cancel.configure(state="disabled")
+
+    def run_pipeline(self, cancel_token):
+        """Worker thread: never touches Tk widgets, only the progress queue"""
+        if not self.assistant:
+            self.progress_queue.put(("error", "missing logic module"))
+            return
         
         def update_status(msg, progress=0):
-            self.status_var.set(msg)
-            self.progress_bar.set(progress)
+            self.progress_queue.put(("progress", (msg, progress)))
 
         try:
             # Use process_file which handles parsing
-            results = self.assistant.process_file(self.loaded_filepath, progress_callback=update_status)
-            self.processed_data = results
-            self.after(0, self.display_results)
+            results = self.assistant.process_file(self.loaded_filepath, progress_callback=update_status, cancel_token=cancel_token)
+            self.index_results(results)
+            self.progress_queue.put(("done", results))
+        except OperationCancelled:
+            self.progress_queue.put(("cancelled", None))
         except Exception as e:
-            self.status_var.set(f"Error: {e}")
             print(f"Pipeline Error: {e}")
-            self.after(0, lambda: self.btn_process.configure(state="normal"))
+            self.progress_queue.put(("error", str(e)))
+
+    def index_results(self, results):
+        """Add the source transcript and generated notes to the search index (worker thread)"""
+        if not TranscriptIndex:
+            return
+        try:
+            with TranscriptIndex() as index:
+                if self.assistant.file_type == 'text':
+                    index.index_transcript(self.loaded_filepath, topic_for=self.assistant.topic_of)
+                index.index_notes(self.loaded_filepath, results.get('topics', {}))
+        except Exception as e:
+            print(f"Index Error: {e}")
+
+    def poll_progress(self):
+        """Drain the progress queue on the Tk thread until the job finishes"""
+        try:
+            while True:
+                msg_type, content = self.progress_queue.get_nowait()
+                
+                if msg_type == "progress":
+                    msg, progress = content
+                    self.status_var.set(msg)
+                    self.progress_bar.set(progress)
+                elif msg_type == "done":
+                    self.processed_data = content
+                    self.display_results()
+                    return
+                elif msg_type == "cancelled":
+                    self.finish_processing("Cancelled.")
+                    return
+                elif msg_type == "error":
+                    self.finish_processing(f"Error: {content}")
+                    return
+        except queue.Empty:
+            pass
+        
+        if self.worker is not None and not self.worker.is_alive() and self.progress_queue.empty():
+            # The worker ended without reporting back; stop polling instead of spinning forever
+            self.finish_processing("Error: processing stopped unexpectedly")
+            return
+        self.after(50, self.poll_progress)
+
+    def finish_processing(self, status):
+        self.cancel_token = None
+        self.btn_process.configure(state="normal")
+        self.btn_cancel.configure(state="disabled")
+        self.status_var.set(status)
 
     def display_results(self):
         data = self.processed_data
@@ -127,24 +207,55 @@ class StudyAssistantGUI(ctk.CTkToplevel):
         if not data or "error" in data:
             error_msg = data.get("error", "Unknown error") if data else "No data"
             messagebox.showerror("Processing Error", error_msg)
-            self.btn_process.configure(state="normal")
-            self.status_var.set("Error occurred.")
+            self.finish_processing("Error occurred.")
             return
 
-        # Display the formatted lecture notes
+        # Display the formatted lecture notes a slice at a time so the window stays responsive
         self.notes_box.delete("1.0", "end")
-        self.notes_box.insert("1.0", data.get('notes', 'No notes generated'))
-        
         self.btn_export.configure(state="normal")
-        self.btn_process.configure(state="normal")
-        self.status_var.set("Lecture notes generated successfully!")
+        self.status_var.set("Rendering notes...")
+        self.render_chunks(data.get('notes', 'No notes generated'), 0)
 
-    def export_pdf(self):
+    def render_chunks(self, text, start):
+        if self.cancel_token and self.cancel_token.cancelled:
+            self.render_job = None
+            self.finish_processing("Cancelled (partial notes shown).")
+            return
+        
+        end = start + self.RENDER_CHUNK_CHARS
+        if end < len(text):
+            # Break on a line boundary when there is one nearby
+            newline = text.rfind("\n", start, end)
+            if newline > start:
+                end = newline + 1
+        
+        self.notes_box.insert("end", text[start:end])
+        
+        if end < len(text):
+            self.progress_bar.set(end / len(text))
+            self.render_job = self.after(1, self.render_chunks, text, end)
+        else:
+            self.render_job = None
+            self.progress_bar.set(1.0)
+            self.finish_processing("Lecture notes generated successfully!")
+
+    def stop_rendering(self):
+        if self.render_job:
+            self.after_cancel(self.render_job)
+            self.render_job = None
+
+    def export_notes(self):
         if not self.processed_data: return
-        path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF", "*.pdf")])
+        path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF", "*.pdf"), ("Markdown", "*.md"), ("HTML", "*.html"), ("Word Document", "*.docx")]
+        )
         if path:
-            self.assistant.export_to_pdf(self.processed_data, path)
-            messagebox.showinfo("Export", f"Saved to {path}")
+            try:
+                self.assistant.export(self.processed_data, path)
+                messagebox.showinfo("Export", f"Saved to {path}")
+            except Exception as e:
+                messagebox.showerror("Export Error", f"Failed to export: {e}")
 
 if __name__ == "__main__":
     app = StudyAssistantGUI()
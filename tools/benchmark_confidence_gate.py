@@ -0,0 +1,129 @@
+"""Measure how many Whisper calls the Vosk confidence gate saves, and what it costs in accuracy.
+
+Runs a folder of recordings through the VAD/Vosk segmenter, decodes every
+segment with Whisper once, then replays the skip decision for each
+threshold: confident segments keep Vosk's draft, the rest use Whisper.
+Each recording needs a reference transcript next to it (lecture1.wav +
+lecture1.txt); word error rate is computed against it.
+
+    python tools/benchmark_confidence_gate.py recordings/ --thresholds 0.7 0.8 0.85 0.9 0.95
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_pipeline import SpeechSegmenter, ConfidenceGate, normalize_text
+from whisper_backends import BACKENDS, DEFAULT_BACKEND, create_backend, pcm_to_float
+from audio_resample import SAMPLE_RATE, load_wav
+
+FRAME_DURATION_MS = 20
+FRAME_BYTES = int(SAMPLE_RATE * FRAME_DURATION_MS / 1000) * 2
+
+
+def word_errors(reference, hypothesis):
+    """Word-level Levenshtein distance"""
+    ref, hyp = normalize_text(reference).split(), normalize_text(hypothesis).split()
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def segment_recording(vosk_model, path):
+    segmenter = SpeechSegmenter(vosk_model, os.path.basename(path), SAMPLE_RATE, FRAME_DURATION_MS)
+    pcm = load_wav(path)
+    segments = []
+    for offset in range(0, len(pcm) - FRAME_BYTES + 1, FRAME_BYTES):
+        _, segment = segmenter.process_frame(pcm[offset:offset + FRAME_BYTES], offset / 2 / SAMPLE_RATE)
+        if segment:
+            segments.append(segment)
+    _, segment = segmenter.flush()
+    if segment:
+        segments.append(segment)
+    return segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Whisper skip policy for confident Vosk drafts")
+    parser.add_argument("corpus", help="Folder of .wav recordings with matching .txt references")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.8, 0.85, 0.9, 0.95],
+                        help="Minimum per-word confidence to skip Whisper")
+    parser.add_argument("--avg-margin", type=float, default=0.08,
+                        help="Average confidence must be this much above the per-word threshold")
+    parser.add_argument("--vosk-model", default="model")
+    parser.add_argument("--whisper-model", default="base")
+    parser.add_argument("--backend", choices=list(BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument("--language", default="english")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    import vosk
+
+    recordings = [p for p in sorted(glob.glob(os.path.join(args.corpus, "*.wav")))
+                  if os.path.exists(os.path.splitext(p)[0] + ".txt")]
+    if not recordings:
+        sys.exit(f"No .wav files with .txt references in {args.corpus}")
+
+    vosk.SetLogLevel(-1)
+    vosk_model = vosk.Model(args.vosk_model)
+    whisper_model = create_backend(args.backend, args.whisper_model).load()
+
+    # (reference, [(segment, whisper_text)]) per recording
+    corpus = []
+    for path in recordings:
+        with open(os.path.splitext(path)[0] + ".txt", encoding="utf-8") as f:
+            reference = f.read()
+        decoded = []
+        for segment in segment_recording(vosk_model, path):
+            text = whisper_model.transcribe(pcm_to_float(segment.audio), args.language)
+            decoded.append((segment, text))
+        print(f"{os.path.basename(path)}: {len(decoded)} segments")
+        corpus.append((reference, decoded))
+
+    def evaluate(gate):
+        errors = words = calls = total = 0
+        for reference, decoded in corpus:
+            hypothesis = []
+            for segment, text in decoded:
+                total += 1
+                if gate and gate.is_confident(segment):
+                    hypothesis.append(segment.draft)
+                else:
+                    calls += 1
+                    hypothesis.append(text)
+            e, n = word_errors(reference, " ".join(hypothesis))
+            errors += e
+            words += n
+        return {'segments': total, 'whisper_calls': calls,
+                'saved': round(1 - calls / total, 4) if total else 0.0,
+                'wer': round(errors / words, 4) if words else 0.0}
+
+    results = {'recordings': len(recordings), 'baseline': evaluate(None), 'thresholds': []}
+    vosk_only = evaluate(ConfidenceGate(0.0, 0.0, min_words=0))
+    results['vosk_only'] = vosk_only
+
+    print(f"\n{'threshold':>10} {'calls':>7} {'saved':>7} {'WER':>7} {'dWER':>7}")
+    base_wer = results['baseline']['wer']
+    print(f"{'whisper':>10} {results['baseline']['whisper_calls']:>7} {'0%':>7} {base_wer:>7.2%} {'':>7}")
+    for threshold in args.thresholds:
+        row = evaluate(ConfidenceGate(threshold, min(1.0, threshold + args.avg_margin)))
+        row['threshold'] = threshold
+        results['thresholds'].append(row)
+        print(f"{threshold:>10.2f} {row['whisper_calls']:>7} {row['saved']:>7.0%} {row['wer']:>7.2%} {row['wer'] - base_wer:>+7.2%}")
+    print(f"{'vosk only':>10} {0:>7} {'100%':>7} {vosk_only['wer']:>7.2%} {vosk_only['wer'] - base_wer:>+7.2%}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Session language detection vs. language ID on every segment.
+
+The recording is cut into fixed-length segments and decoded through
+WhisperWorker's language path twice: once with a session LanguageTracker
+(detect on the first seconds, cache, re-check when due) and once with
+per-segment detection. Reports language-ID calls, total time, segments
+per second, how often the language flipped and the languages assigned.
+
+    python tools/benchmark_language_detection.py lecture_vi_en.wav --model base --segment 4
+"""
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_pipeline import LanguageTracker
+from whisper_backends import BACKENDS, DEFAULT_BACKEND, SAMPLE_RATE, create_backend, pcm_to_float
+from audio_resample import load_wav
+
+
+def run(model, segments, tracker):
+    detect_s = 0.0
+    languages = []
+    start = time.perf_counter()
+    for audio in segments:
+        before = time.perf_counter()
+        language = tracker.language_for(model, audio)
+        detect_s += time.perf_counter() - before
+        model.transcribe(audio, language)
+        tracker.report(model.last_confidence)
+        languages.append(language)
+    total_s = time.perf_counter() - start
+    flips = sum(1 for a, b in zip(languages, languages[1:]) if a != b)
+    return {
+        'detections': tracker.detections,
+        'detect_s': detect_s,
+        'total_s': total_s,
+        'segments_per_s': len(segments) / total_s,
+        'flips': flips,
+        'languages': Counter(languages),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark session vs per-segment language detection")
+    parser.add_argument("wav", help="16 kHz mono recording (ideally mixing the candidate languages)")
+    parser.add_argument("--backend", choices=list(BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--segment", type=float, default=4.0, help="Segment length in seconds")
+    parser.add_argument("--languages", nargs="+", default=["english", "vietnamese"])
+    args = parser.parse_args()
+
+    audio = pcm_to_float(load_wav(args.wav))
+    step = int(args.segment * SAMPLE_RATE)
+    segments = [audio[i:i + step] for i in range(0, len(audio), step) if len(audio) - i >= SAMPLE_RATE // 2]
+
+    model = create_backend(args.backend, args.model).load()
+    model.transcribe(segments[0], None)  # warm-up
+
+    print(f"{len(segments)} segments of {args.segment:.1f}s, {args.backend} {args.model}")
+    print(f"{'mode':<12} {'lang ID':>8} {'ID time':>9} {'total':>9} {'seg/s':>7} {'flips':>6}  languages")
+    for mode, per_segment in (("session", False), ("per-segment", True)):
+        result = run(model, segments, LanguageTracker(args.languages, per_segment=per_segment))
+        languages = ", ".join(f"{lang}={n}" for lang, n in result['languages'].most_common())
+        print(f"{mode:<12} {result['detections']:>8} {result['detect_s']:>8.2f}s {result['total_s']:>8.2f}s "
+              f"{result['segments_per_s']:>7.2f} {result['flips']:>6}  {languages}")
+
+
+if __name__ == "__main__":
+    main()
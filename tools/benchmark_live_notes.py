@@ -0,0 +1,92 @@
+"""Per-sentence cost of live lecture notes as the lecture grows.
+
+Feeds synthetic transcript segments to a LectureNoteGenerator live
+session, renders the study guide every --render-every segments and
+corrects a recent segment every --correct-every segments, the way the
+app does while recording. Each row covers one window of --window
+sentences; with incremental notes the time per sentence, per render and
+per correction should stay flat from the first window to the last.
+
+    python tools/benchmark_live_notes.py --sentences 100000 --window 10000
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from study_assistant import LectureNoteGenerator
+
+CUES = ['is defined as', 'must', 'should', 'for example', 'such as', 'however', 'unless',
+        'the court held in Smith v Jones that', 'the principle is that']
+KEYWORDS = ['offer', 'acceptance', 'postal rule', 'consideration', 'past consideration', 'estoppel',
+            'legal relations', 'commercial', 'certainty', 'agreement to agree', 'capacity', 'minor',
+            'privity', 'third party', 'contract', 'party', 'breach', 'damages', 'remedy']
+
+
+def synthetic_segments(rng, vocab_size=20000):
+    """Endless lecture-shaped segments of one to three sentences"""
+    words = np.array([f"word{i}" for i in range(vocab_size)])
+    weights = 1.0 / np.arange(1, vocab_size + 1)
+    weights /= weights.sum()
+    while True:
+        sentences = []
+        for _ in range(rng.integers(1, 4)):
+            filler = ' '.join(rng.choice(words, size=rng.integers(6, 20), p=weights))
+            sentences.append(f"The {rng.choice(KEYWORDS)} {rng.choice(CUES)} {filler}")
+        yield '. '.join(sentences) + '.'
+
+
+def run(total, window, render_every, correct_every, rank, seed):
+    rng = np.random.default_rng(seed)
+    generator = LectureNoteGenerator(rank_sentences=rank)
+    generator.start_live_session("Benchmark lecture")
+    segments = synthetic_segments(rng)
+    recent = []
+
+    print(f"{'sentences':>10} {'feed (us/sent)':>15} {'render (ms)':>12} {'correct (ms)':>13}")
+    count = 0
+    segment_count = 0
+    while count < total:
+        feed = render = correct = 0.0
+        renders = corrections = 0
+        target = min(total, count + window)
+        while count < target:
+            text = next(segments)
+            start = time.perf_counter()
+            count += generator.add_segment(text)
+            feed += time.perf_counter() - start
+            segment_count += 1
+            recent = (recent + [text])[-10:]
+
+            if segment_count % render_every == 0:
+                start = time.perf_counter()
+                generator.render_live_notes()
+                render += time.perf_counter() - start
+                renders += 1
+
+            if segment_count % correct_every == 0:
+                old = recent[rng.integers(len(recent))]
+                new = next(segments)
+                start = time.perf_counter()
+                if generator.correct_segment(old, new):
+                    recent[recent.index(old)] = new
+                    corrections += 1
+                correct += time.perf_counter() - start
+
+        print(f"{count:>10} {feed / window * 1e6:>15.1f} {render / max(renders, 1) * 1e3:>12.2f} "
+              f"{correct / max(corrections, 1) * 1e3:>13.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark incremental live lecture notes")
+    parser.add_argument("--sentences", type=int, default=50000)
+    parser.add_argument("--window", type=int, default=5000)
+    parser.add_argument("--render-every", type=int, default=10, help="Render after this many segments")
+    parser.add_argument("--correct-every", type=int, default=25, help="Correct a recent segment this often")
+    parser.add_argument("--no-rank", action="store_true", help="Keep the first sentences instead of ranking")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.sentences, args.window, args.render_every, args.correct_every, not args.no_rank, args.seed)
@@ -0,0 +1,293 @@
+"""Benchmark and profile the LectureNoteGenerator pipeline stage by stage.
+
+Generates synthetic transcripts (100 KB up to 500 MB) and PowerPoint decks,
+times each stage, records peak traced memory and writes the results as
+JSON. Timings come from a pass with tracemalloc and cProfile off; peak
+memory and profiles are measured in separate passes over the same input,
+so timings are comparable whether or not memory is tracked. With --baseline the run fails (exit code 1) when a stage is slower
+than the stored baseline by more than --threshold.
+
+    python tools/benchmark_pipeline.py --sizes 100K 1M 10M --output bench.json
+    python tools/benchmark_pipeline.py --sizes 100K 1M --save-baseline baseline.json
+    python tools/benchmark_pipeline.py --sizes 100K 1M --baseline baseline.json
+    python tools/benchmark_pipeline.py --sizes 1M --profile profiles/
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import cProfile
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from study_assistant import LectureNoteGenerator
+from note_export import render_text, write_pdf
+
+SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+SENTENCE_TEMPLATES = [
+    "An offer is defined as an expression of willingness to contract on certain terms",
+    "The postal rule means that acceptance is complete as soon as the letter is posted",
+    "In Carlill v Carbolic Smoke Ball (1893) the court held that an advert can be a unilateral offer",
+    "Consideration must be sufficient but it need not be adequate",
+    "Past consideration is not good consideration unless it was requested",
+    "However promissory estoppel can only be used as a shield not sword",
+    "For example a display of goods in a shop window is an invitation to treat",
+    "In domestic agreements there is a presumption against intention to create legal relations",
+    "An agreement to agree is void for lack of certainty of terms",
+    "A minor lacks capacity to enter most contracts except for necessaries",
+    "The doctrine of privity means a third party cannot enforce the contract",
+    "In Balfour v Balfour the court found no intention in a domestic arrangement",
+    "A counter offer destroys the original offer and must itself be accepted",
+    "Silence cannot amount to acceptance unless the offeree has clearly agreed to it",
+]
+
+FILLERS = ["um", "uh", "you know", "basically", "I mean", "so", "okay so", "like"]
+
+
+def parse_size(text):
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def format_size(num_bytes):
+    for suffix, factor in (('G', 1024 ** 3), ('M', 1024 ** 2), ('K', 1024)):
+        if num_bytes >= factor and num_bytes % factor == 0:
+            return f"{num_bytes // factor}{suffix}"
+    return str(num_bytes)
+
+
+def generate_transcript(path, size, seed=0):
+    """Write a conversational lecture transcript of roughly `size` bytes, 1 MB at a time"""
+    rng = random.Random(seed)
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < size:
+            parts = []
+            chunk_len = 0
+            while chunk_len < min(1024 ** 2, size - written):
+                sentence = rng.choice(SENTENCE_TEMPLATES)
+                if rng.random() < 0.5:
+                    words = sentence.split()
+                    words.insert(rng.randrange(len(words)), rng.choice(FILLERS))
+                    sentence = ' '.join(words)
+                piece = f"{sentence} {rng.randrange(10000)}. "
+                parts.append(piece)
+                chunk_len += len(piece)
+            chunk = ''.join(parts)
+            f.write(chunk)
+            written += len(chunk)
+
+
+def generate_pptx(path, slides, seed=0):
+    from pptx import Presentation
+
+    rng = random.Random(seed)
+    prs = Presentation()
+    layout = prs.slide_layouts[1]
+    for i in range(slides):
+        slide = prs.slides.add_slide(layout)
+        slide.shapes.title.text = f"Lecture point {i + 1}"
+        body = slide.placeholders[1].text_frame
+        body.text = rng.choice(SENTENCE_TEMPLATES)
+        for _ in range(4):
+            body.add_paragraph().text = rng.choice(SENTENCE_TEMPLATES) + "."
+        slide.notes_slide.notes_text_frame.text = ' '.join(rng.choice(SENTENCE_TEMPLATES) + "." for _ in range(3))
+    prs.save(path)
+
+
+class StageTimer:
+    """Runs each stage and records one measurement per stage.
+
+    mode 'time' records wall time, 'memory' peak traced memory (tracemalloc
+    must be running) and 'profile' dumps a cProfile file per stage into
+    `profile_dir`. Only one is measured per pass because tracing and
+    profiling both slow the code they observe.
+    """
+
+    def __init__(self, label, mode='time', profile_dir=None):
+        self.label = label
+        self.mode = mode
+        self.profile_dir = profile_dir
+        self.stages = {}
+
+    def run(self, name, func, *args):
+        if self.mode == 'memory':
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            result = func(*args)
+            record = {'peak_bytes': tracemalloc.get_traced_memory()[1] - base}
+        elif self.mode == 'profile':
+            profiler = cProfile.Profile()
+            result = profiler.runcall(func, *args)
+            path = os.path.join(self.profile_dir, f"{self.label}_{name}.prof")
+            profiler.dump_stats(path)
+            record = {'profile': path}
+        else:
+            start = time.perf_counter()
+            result = func(*args)
+            record = {'seconds': round(time.perf_counter() - start, 6)}
+        self.stages[name] = record
+        return result
+
+
+def run_passes(bench, path, label, work_dir, args):
+    """Time every stage, then measure memory and profiles in separate passes; merged per stage"""
+    stages = bench(path, label, work_dir, StageTimer(label))
+    if not args.no_memory:
+        tracemalloc.start()
+        try:
+            memory = bench(path, label, work_dir, StageTimer(label, 'memory'))
+        finally:
+            tracemalloc.stop()
+        for name, record in memory.items():
+            stages[name].update(record)
+    if args.profile:
+        for name, record in bench(path, label, work_dir, StageTimer(label, 'profile', args.profile)).items():
+            stages[name].update(record)
+
+    for name, record in stages.items():
+        peak = f" {record['peak_bytes'] / 1024 ** 2:>9.1f} MB peak" if 'peak_bytes' in record else ""
+        print(f"  {name:<10} {record['seconds']:>9.3f}s{peak}")
+    return stages
+
+
+def classify(generator, sentences):
+    store = generator._new_store()
+    for sentence in sentences:
+        generator._file_sentence(sentence, store)
+    return store.topics_view()
+
+
+def bench_transcript(path, label, work_dir, timer):
+    generator = LectureNoteGenerator()
+    generator.file_path = path
+
+    def read():
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    raw = timer.run('extract', read)
+    text = timer.run('clean', generator._clean_transcript, raw)
+    del raw
+    sentences = timer.run('split', generator._split_sentences, text)
+    del text
+    topics = timer.run('classify', classify, generator, sentences)
+    del sentences
+    notes_doc = timer.run('format', generator._build_document, topics)
+    timer.run('render', render_text, notes_doc)
+    timer.run('pdf', write_pdf, notes_doc, os.path.join(work_dir, f"{label}.pdf"))
+    return timer.stages
+
+
+def bench_pptx(path, label, work_dir, timer):
+    generator = LectureNoteGenerator()
+    generator.file_path = path
+
+    text = timer.run('extract', generator._extract_powerpoint_content)
+    sentences = timer.run('split', generator._split_sentences, text)
+    topics = timer.run('classify', classify, generator, sentences)
+    notes_doc = timer.run('format', generator._build_document, topics)
+    timer.run('render', render_text, notes_doc)
+    timer.run('pdf', write_pdf, notes_doc, os.path.join(work_dir, f"{label}.pdf"))
+    return timer.stages
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Return a list of human-readable regressions against the baseline"""
+    previous = {run['input']: run['stages'] for run in baseline.get('runs', [])}
+    regressions = []
+    for run in results['runs']:
+        old_stages = previous.get(run['input'])
+        if not old_stages:
+            continue
+        for stage, record in run['stages'].items():
+            old = old_stages.get(stage)
+            if not old:
+                continue
+            before, after = old['seconds'], record['seconds']
+            if after > before * (1 + threshold) and after - before > min_delta:
+                regressions.append(f"{run['input']}/{stage}: {before:.3f}s -> {after:.3f}s (+{(after / before - 1) * 100 if before else float('inf'):.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lecture note pipeline")
+    parser.add_argument("--sizes", nargs="+", default=["100K", "1M", "10M"],
+                        help="Synthetic transcript sizes, e.g. 100K 1M 10M 100M 500M")
+    parser.add_argument("--slides", type=int, nargs="*", default=[50, 500],
+                        help="Synthetic PowerPoint deck sizes (slides)")
+    parser.add_argument("--work-dir", help="Where synthetic inputs are generated and kept between runs")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Compare against this JSON results file")
+    parser.add_argument("--save-baseline", help="Also write the results here as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown per stage before failing (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="Ignore regressions smaller than this many seconds")
+    parser.add_argument("--profile", metavar="DIR", help="Dump a cProfile .prof file per stage into DIR")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass (faster, no peak memory)")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or os.path.join(tempfile.gettempdir(), "noteforge_bench")
+    os.makedirs(work_dir, exist_ok=True)
+    if args.profile:
+        os.makedirs(args.profile, exist_ok=True)
+
+    results = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'memory_tracked': not args.no_memory,
+        'profiled': bool(args.profile),
+        'runs': [],
+    }
+
+    for size_text in args.sizes:
+        size = parse_size(size_text)
+        label = f"transcript_{format_size(size)}"
+        path = os.path.join(work_dir, f"{label}.txt")
+        if not os.path.exists(path) or os.path.getsize(path) < size:
+            print(f"Generating {path}...")
+            generate_transcript(path, size)
+        print(f"{label} ({os.path.getsize(path) / 1024 ** 2:.1f} MB)")
+        results['runs'].append({'input': label, 'kind': 'text', 'bytes': os.path.getsize(path),
+                                'stages': run_passes(bench_transcript, path, label, work_dir, args)})
+
+    for slides in args.slides:
+        label = f"deck_{slides}"
+        path = os.path.join(work_dir, f"{label}.pptx")
+        if not os.path.exists(path):
+            print(f"Generating {path}...")
+            generate_pptx(path, slides)
+        print(f"{label} ({slides} slides)")
+        results['runs'].append({'input': label, 'kind': 'powerpoint', 'bytes': os.path.getsize(path),
+                                'stages': run_passes(bench_pptx, path, label, work_dir, args)})
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
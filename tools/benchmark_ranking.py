@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentence_ranking import SentenceRanker
+
+VOCAB = [
+    'offer', 'acceptance', 'consideration', 'estoppel', 'contract', 'party', 'promise',
+    'court', 'held', 'rule', 'postal', 'invitation', 'treat', 'benefit', 'detriment',
+    'intention', 'legal', 'relations', 'capacity', 'minor', 'privity', 'third', 'term',
+    'certainty', 'agreement', 'breach', 'damages', 'remedy', 'equitable', 'doctrine',
+    'revocation', 'counter', 'communication', 'silence', 'performance', 'unilateral',
+]
+
+
+def synthetic_sentences(count, seed=0):
+    """Zipf-distributed word salad with some repeats, roughly lecture-shaped"""
+    rng = np.random.default_rng(seed)
+    extra = [f"term{i}" for i in range(5000)]
+    words = np.array(VOCAB + extra)
+    weights = 1.0 / np.arange(1, len(words) + 1)
+    weights /= weights.sum()
+
+    sentences = []
+    for i in range(count):
+        if sentences and rng.random() < 0.05:
+            # Lecturers repeat themselves
+            sentences.append(sentences[rng.integers(len(sentences))] + " again")
+            continue
+        length = rng.integers(8, 30)
+        sentences.append(' '.join(rng.choice(words, size=length, p=weights)))
+    return sentences
+
+
+def run(sizes, sections, limit):
+    print(f"{'sentences':>10} {'sections':>9} {'fit (s)':>9} {'rank (s)':>9} {'total (s)':>10}")
+    for size in sizes:
+        sentences = synthetic_sentences(size)
+
+        start = time.perf_counter()
+        ranker = SentenceRanker()
+        ranker.add_many(sentences)
+        fitted = time.perf_counter()
+
+        chunk = max(1, size // sections)
+        for i in range(0, size, chunk):
+            ranker.select(sentences[i:i + chunk], limit)
+        done = time.perf_counter()
+
+        print(f"{size:>10} {sections:>9} {fitted - start:>9.3f} {done - fitted:>9.3f} {done - start:>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark TF-IDF/LexRank sentence ranking")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--sections", type=int, default=1,
+                        help="Split the sentences into this many sections (1 = worst case)")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    run(args.sizes, args.sections, args.limit)
@@ -0,0 +1,117 @@
+"""Throughput and accuracy of sentence splitting on legal transcripts.
+
+Compares the old regex split, SentenceSegmenter and NLTK's punkt on
+synthetic transcripts full of case names ("Carlill v. Carbolic"),
+abbreviations ("e.g.") and statutory references ("s. 2"). Since the
+generator knows where every sentence ends, it also reports how many
+sentences each method recovers intact and how many fragments the
+20-character filter would drop.
+
+    python tools/benchmark_sentence_split.py --sizes 1M 10M 50M
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentence_segmenter import SentenceSegmenter
+
+try:
+    import nltk
+except ImportError:
+    nltk = None
+
+SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2}
+
+SENTENCES = [
+    "In Carlill v. Carbolic Smoke Ball Co. [1893] 1 Q.B. 256 the court held that an advert can be a unilateral offer",
+    "A display of goods, e.g. in a shop window, is an invitation to treat",
+    "Under s. 2 of the Act the contract must be in writing",
+    "The postal rule means that acceptance is complete as soon as the letter is posted",
+    "Consideration must be sufficient but it need not be adequate, i.e. it need only have some value",
+    "See Lord Denning M.R. in Central London Property Trust Ltd. v. High Trees House Ltd. [1947] K.B. 130",
+    "Past consideration is not good consideration unless it was requested",
+    "The rule in art. 6(1) applies to every party to the agreement",
+    "Is silence ever enough to amount to acceptance",
+    "A minor lacks capacity to enter most contracts except for necessaries",
+]
+
+
+def parse_size(text):
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def generate(size, seed=0):
+    """Transcript of about `size` characters and the sentences it was built from"""
+    rng = random.Random(seed)
+    parts, truth, length = [], [], 0
+    while length < size:
+        sentence = rng.choice(SENTENCES)
+        end = "?" if sentence.startswith("Is ") else "."
+        parts.append(sentence + end)
+        truth.append(sentence)
+        length += len(sentence) + 2
+    return " ".join(parts), truth
+
+
+def regex_split(text):
+    return [m.group(0).strip() for m in re.finditer(r'[^.!?]+', text)]
+
+
+def punkt_splitter():
+    if nltk is None:
+        return None, "not installed"
+    for resource in ('tokenizers/punkt_tab/english/', 'tokenizers/punkt/english.pickle'):
+        try:
+            nltk.data.find(resource)
+            return nltk.sent_tokenize, "english model"
+        except LookupError:
+            continue
+    # No downloaded model: untrained punkt (no learned abbreviations)
+    from nltk.tokenize.punkt import PunktSentenceTokenizer
+    return PunktSentenceTokenizer().tokenize, "untrained"
+
+
+def strip_terminator(sentence):
+    return sentence.rstrip('.!?').strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sentence splitting")
+    parser.add_argument("--sizes", nargs="+", default=["1M", "10M"], help="Transcript sizes, e.g. 100K 1M 10M")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    punkt, punkt_note = punkt_splitter()
+    methods = [("regex", regex_split), ("segmenter", SentenceSegmenter().split)]
+    if punkt:
+        methods.append((f"punkt ({punkt_note})", punkt))
+    else:
+        print(f"punkt skipped: nltk {punkt_note}")
+
+    print(f"{'size':>6} {'method':<24} {'MB/s':>8} {'found':>9} {'intact':>7} {'dropped<20':>11}")
+    for size_text in args.sizes:
+        text, truth = generate(parse_size(size_text))
+        expected = set(truth)
+        for name, split in methods:
+            best = float('inf')
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                sentences = split(text)
+                best = min(best, time.perf_counter() - start)
+            cleaned = [strip_terminator(s) for s in sentences]
+            intact = sum(1 for s in cleaned if s in expected) / len(truth)
+            dropped = sum(1 for s in cleaned if len(s) <= 20)
+            print(f"{size_text:>6} {name:<24} {len(text) / best / 1024 ** 2:>8.1f} {len(sentences):>9} "
+                  f"{intact:>6.0%} {dropped:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compare Vosk CPU time with and without silence gating.
+
+Runs a recording through SpeechSegmenter twice (every frame fed to Vosk,
+then gated) and reports the CPU seconds each pass took (best of
+--repeats), the CPU time gating saved, frames Vosk actually saw and whether
+the drafts changed. --pause inserts stretches of quiet room noise between
+utterances to mimic a lecturer writing on the board.
+
+    python tools/benchmark_silence_gate.py lecture.wav --pause 8
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_pipeline import SpeechSegmenter
+from audio_resample import SAMPLE_RATE, load_wav
+
+FRAME_DURATION_MS = 20
+FRAME_BYTES = int(SAMPLE_RATE * FRAME_DURATION_MS / 1000) * 2
+
+
+def add_pauses(pcm, pause_s, every_s=10.0, noise_level=60, seed=0):
+    """Insert `pause_s` of low-level noise after every `every_s` of audio"""
+    rng = np.random.default_rng(seed)
+    audio = np.frombuffer(pcm, dtype=np.int16)
+    step = int(every_s * SAMPLE_RATE)
+    pause = int(pause_s * SAMPLE_RATE)
+    pieces = []
+    for start in range(0, len(audio), step):
+        pieces.append(audio[start:start + step])
+        pieces.append(rng.normal(0, noise_level, pause).astype(np.int16))
+    return np.concatenate(pieces).tobytes()
+
+
+def run(vosk_model, pcm, vosk_idle_frames):
+    segmenter = SpeechSegmenter(vosk_model, "bench", SAMPLE_RATE, FRAME_DURATION_MS,
+                                vosk_idle_frames=vosk_idle_frames)
+    drafts = []
+    start = time.process_time()
+    for offset in range(0, len(pcm) - FRAME_BYTES + 1, FRAME_BYTES):
+        events, _ = segmenter.process_frame(pcm[offset:offset + FRAME_BYTES], offset / 2 / SAMPLE_RATE)
+        drafts.extend(text for msg_type, text in events if msg_type == "draft")
+    events, _ = segmenter.flush()
+    drafts.extend(text for msg_type, text in events if msg_type == "draft")
+    return time.process_time() - start, segmenter.frames_to_vosk, segmenter.frames_seen, drafts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Vosk silence gating")
+    parser.add_argument("wav")
+    parser.add_argument("--vosk-model", default="model")
+    parser.add_argument("--idle-frames", type=int, default=50, help="Non-speech frames before Vosk is paused")
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds of quiet inserted every 10 s of audio")
+    parser.add_argument("--repeats", type=int, default=3, help="Passes per mode; the fastest is reported")
+    args = parser.parse_args()
+
+    import vosk
+    vosk.SetLogLevel(-1)
+    model = vosk.Model(args.vosk_model)
+
+    pcm = load_wav(args.wav)
+    if args.pause:
+        pcm = add_pauses(pcm, args.pause)
+    duration = len(pcm) / 2 / SAMPLE_RATE
+    print(f"{args.wav}: {duration:.0f} s of audio")
+
+    results, cpu_time = {}, {}
+    for label, idle in (("ungated", None), ("gated", args.idle_frames)):
+        runs = [run(model, pcm, idle) for _ in range(max(1, args.repeats))]
+        cpu = min(r[0] for r in runs)
+        _, fed, seen, drafts = runs[0]
+        results[label], cpu_time[label] = drafts, cpu
+        print(f"  {label:<8} {cpu:>8.2f} s CPU ({cpu / duration:>6.1%} of real time), "
+              f"Vosk fed {fed}/{seen} frames ({fed / seen:.0%})")
+
+    saved = cpu_time["ungated"] - cpu_time["gated"]
+    print(f"  gating saved {saved:.2f} s CPU ({saved / cpu_time['ungated']:.0%} of ungated)"
+          if cpu_time["ungated"] else "  no CPU time measured")
+
+    same = " ".join(results["ungated"]).split() == " ".join(results["gated"]).split()
+    print(f"  drafts {'identical' if same else 'differ'} "
+          f"({len(' '.join(results['ungated']).split())} vs {len(' '.join(results['gated']).split())} words)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Latency saved per utterance by computing Whisper's log-mel during speech.
+
+For each utterance length, compares the feature work left after the
+segment closes: the batch front end (pad 30 s, full STFT, as transcribe()
+does) against LogMelStream.finish(). The per-frame cost of streaming,
+paid on the Vosk thread while the speaker talks, is shown too. With
+openai-whisper installed its own log_mel_spectrogram is timed as well.
+
+    python tools/benchmark_streaming_mel.py --lengths 1 2 4 8 15 25
+    python tools/benchmark_streaming_mel.py --wav lecture.wav --lengths 3 6 12
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaming_features import LogMelStream, log_mel_batch, N_SAMPLES, SAMPLE_RATE, whisper
+
+FRAME_BYTES = int(SAMPLE_RATE * 0.02) * 2
+
+
+def best_of(repeats, func, *args):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def stream(pcm):
+    features = LogMelStream()
+    start = time.perf_counter()
+    for offset in range(0, len(pcm), FRAME_BYTES):
+        features.feed(pcm[offset:offset + FRAME_BYTES])
+    feed_s = time.perf_counter() - start
+    start = time.perf_counter()
+    mel = features.finish()
+    return feed_s, time.perf_counter() - start, mel
+
+
+def whisper_front_end(audio):
+    mel = whisper.log_mel_spectrogram(audio, padding=N_SAMPLES)
+    return whisper.pad_or_trim(mel, 3000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming log-mel features")
+    parser.add_argument("--lengths", type=float, nargs="+", default=[1, 2, 4, 8, 15, 25], help="Utterance seconds")
+    parser.add_argument("--wav", help="Cut utterances from this recording instead of synthetic audio")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.wav:
+        from audio_resample import load_wav
+        source = np.frombuffer(load_wav(args.wav), dtype=np.int16)
+    else:
+        rng = np.random.default_rng(0)
+        n = int(max(args.lengths) * SAMPLE_RATE)
+        source = (rng.normal(0, 3000, n) * np.sin(np.arange(n) / 2000)).astype(np.int16)
+
+    header = f"{'utterance':>9} {'batch':>9} {'finish':>9} {'saved':>9} {'stream/frame':>13} {'max diff':>9}"
+    if whisper:
+        header += f" {'whisper':>9}"
+    print(header)
+    for seconds in args.lengths:
+        pcm = source[:int(seconds * SAMPLE_RATE)]
+        audio = pcm.astype(np.float32) / 32768.0
+
+        batch_s, reference = best_of(args.repeats, log_mel_batch, audio)
+        runs = [stream(pcm.tobytes()) for _ in range(args.repeats)]
+        feed_s = min(r[0] for r in runs)
+        finish_s = min(r[1] for r in runs)
+        mel = runs[-1][2]
+        if mel is None:
+            print(f"{seconds:>8.1f}s  longer than one Whisper window, not streamed")
+            continue
+
+        frames = max(1, len(pcm) * 2 // FRAME_BYTES)
+        line = (f"{seconds:>8.1f}s {batch_s * 1000:>7.1f}ms {finish_s * 1000:>7.2f}ms "
+                f"{(batch_s - finish_s) * 1000:>7.1f}ms {feed_s / frames * 1e6:>10.0f}us "
+                f"{np.abs(mel - reference).max():>9.1e}")
+        if whisper:
+            whisper_s, _ = best_of(args.repeats, whisper_front_end, audio)
+            line += f" {whisper_s * 1000:>7.1f}ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Compare Whisper backends: load time, real-time factor and peak memory.
+
+Each backend runs in its own subprocess so peak RSS is not shared. The
+recording is cut into fixed-length segments (like VAD segments) and
+transcribed one at a time, as WhisperWorker does. RTF is processing time
+divided by audio duration; below 1.0 is faster than real time.
+
+    python tools/benchmark_whisper_backends.py lecture.wav --model base --output backends.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from whisper_backends import BACKENDS, SAMPLE_RATE, create_backend, pcm_to_float
+from audio_resample import load_wav
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def peak_rss_mb():
+    if resource:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # KB on Linux, bytes on macOS
+        return peak / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+    if psutil:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024 ** 2
+    return None
+
+
+def measure(backend_name, wav, model_size, segment_s, language, threads):
+    """Runs in the child process; returns one result record"""
+    audio = pcm_to_float(load_wav(wav))
+    step = int(segment_s * SAMPLE_RATE)
+    segments = [audio[i:i + step] for i in range(0, len(audio), step)]
+    duration = len(audio) / SAMPLE_RATE
+
+    start = time.perf_counter()
+    backend = create_backend(backend_name, model_size, threads=threads).load()
+    load_s = time.perf_counter() - start
+
+    # Warm-up so one-off initialisation is not billed to the first segment
+    backend.transcribe(segments[0], language)
+
+    start = time.perf_counter()
+    texts = [backend.transcribe(segment, language) for segment in segments]
+    single_s = time.perf_counter() - start
+
+    rss = peak_rss_mb()
+    return {
+        'backend': backend_name,
+        'model': model_size,
+        'audio_seconds': round(duration, 2),
+        'segments': len(segments),
+        'load_seconds': round(load_s, 3),
+        'rtf': round(single_s / duration, 4),
+        'peak_rss_mb': round(rss, 1) if rss is not None else None,
+        'words': sum(len(text.split()) for text in texts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Whisper inference backends")
+    parser.add_argument("wav")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--segment-s", type=float, default=8.0, help="Length of each transcribed segment")
+    parser.add_argument("--language", default="english")
+    parser.add_argument("--threads", type=int, default=0, help="Inference threads (0 = backend default)")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.wav, args.model, args.segment_s, args.language, args.threads)))
+        return
+
+    results = {'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+               'runs': []}
+    print(f"{'backend':<16} {'load':>7} {'RTF':>7} {'peak RSS':>10}")
+    for name in args.backends:
+        if not BACKENDS[name].available():
+            print(f"{name:<16} not installed, skipped")
+            continue
+        command = [sys.executable, os.path.abspath(__file__), args.wav, "--child", name, "--model", args.model,
+                   "--segment-s", str(args.segment_s), "--language", args.language, "--threads", str(args.threads)]
+        proc = subprocess.run(command, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{name:<16} failed: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode}")
+            continue
+        run = json.loads(proc.stdout.strip().splitlines()[-1])
+        results['runs'].append(run)
+        rss = f"{run['peak_rss_mb']:.0f} MB" if run['peak_rss_mb'] is not None else "n/a"
+        print(f"{name:<16} {run['load_seconds']:>6.1f}s {run['rtf']:>7.3f} {rss:>10}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Check that the shipped models.json can be installed on a clean checkout.
+
+Each check prints OK or FAIL:
+
+- every pinned SHA-256 is a 64-digit hex digest, and Whisper URLs carry it;
+- `prefetch` (without --allow-unverified) of the unpinned defaults succeeds from a mirror of stand-in
+  archives (pinned ones need the real files, which are checked by digest).
+
+    python tools/check_model_manifest.py
+"""
+import os
+import re
+import sys
+import zipfile
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_manager import MANIFEST_PATH, ModelManager
+
+DIGEST = re.compile(r'[0-9a-f]{64}')
+
+
+def check(name, ok, detail=""):
+    print(f"{'OK  ' if ok else 'FAIL'} {name}" + (f" ({detail})" if detail else ""))
+    return ok
+
+
+def write_stand_in(entry, mirror):
+    """An archive (or folder) with the right name and shape for `entry`"""
+    if entry.kind == 'faster-whisper':
+        folder = os.path.join(mirror, os.path.basename(entry.path))
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, "model.bin"), 'wb') as f:
+            f.write(b"stand-in")
+    elif entry.filename.endswith(".zip"):
+        with zipfile.ZipFile(os.path.join(mirror, entry.filename), 'w') as zf:
+            zf.writestr(f"{os.path.splitext(entry.filename)[0]}/README", "stand-in")
+    else:
+        with open(os.path.join(mirror, entry.filename), 'wb') as f:
+            f.write(b"stand-in")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the model manifest installs on a clean checkout")
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    args = parser.parse_args()
+
+    manager = ModelManager(args.manifest)
+    entries = list(manager.entries.values())
+    pinned = [e for e in entries if e.sha256]
+    bad_digests = [e.name for e in pinned if not DIGEST.fullmatch(e.sha256)
+                   or (e.kind == 'whisper' and e.sha256 not in (e.url or ""))]
+
+    unpinned_defaults = [e for e in manager.defaults() if not e.sha256 and e.kind != 'faster-whisper']
+    with tempfile.TemporaryDirectory() as tmp:
+        mirror, root = os.path.join(tmp, "mirror"), os.path.join(tmp, "root")
+        os.makedirs(mirror)
+        for entry in unpinned_defaults:
+            write_stand_in(entry, mirror)
+        clean = ModelManager(args.manifest, mirror=mirror, root=root)
+        failures = clean.prefetch([e.name for e in unpinned_defaults], progress=False)
+
+    results = [
+        check("pinned digests well-formed", not bad_digests, ", ".join(bad_digests) or f"{len(pinned)} pinned"),
+        check("prefetch of unpinned defaults succeeds", not failures,
+              ", ".join(failures) or ", ".join(e.name for e in unpinned_defaults)),
+    ]
+    if not all(results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Exercise RecordingSession start/stop against a fake microphone and Whisper.
+
+A fake PyAudio plays synthetic speech (a voiced tone, then a pause) so
+the real capture, VAD and scheduler code runs without a device, and a
+fake model takes a fixed time per segment. Each check prints OK or FAIL:
+
+- states go idle -> warming -> recording -> draining -> stopped;
+- stop joins every thread, closes each stream and terminates PortAudio;
+- an idle worker exits as soon as it is woken, not after a poll timeout;
+- queued segments are finished within the drain timeout, the rest dropped;
+- a Stop immediately followed by Start never leaves two pipelines alive;
+- a mic that fails to open still releases PortAudio and stops cleanly;
+- host overflows are counted without dropping the buffers that report them;
+- closing mid-decode frees the model only once the worker has exited.
+
+    python tools/check_session_lifecycle.py
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audio_pipeline
+from audio_pipeline import (CaptureSource, FairSegmentScheduler, WhisperWorker, RecordingSession,
+                            WARMING, RECORDING, DRAINING, STOPPED)
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+
+
+def synthetic_speech(speech_s=1.5, pause_s=1.0):
+    """One utterance: a 140 Hz voiced tone with harmonics, then silence"""
+    t = np.arange(int(SAMPLE_RATE * speech_s)) / SAMPLE_RATE
+    voiced = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 15)) * 6000
+    return np.concatenate([voiced, np.zeros(int(SAMPLE_RATE * pause_s))]).astype(np.int16).tobytes()
+
+
+class FakeStream:
+    """Calls `callback` from its own thread, like PortAudio, every `pacing` seconds"""
+
+    def __init__(self, pacing, frames, callback, overflow_every=0):
+        self.pacing = pacing
+        self.frames = frames
+        self.callback = callback
+        self.overflow_every = overflow_every
+        self.audio = synthetic_speech()
+        self.pos = 0
+        self.delivered = 0
+        self.closed = False
+        self.active = threading.Event()
+        self.active.set()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        size = self.frames * 2
+        while self.active.is_set():
+            time.sleep(self.pacing)
+            if self.pos + size > len(self.audio):
+                self.pos = 0
+            data = self.audio[self.pos:self.pos + size]
+            self.pos += size
+            self.delivered += 1
+            overflow = self.overflow_every and self.delivered % self.overflow_every == 0
+            self.callback(data, self.frames, {}, FakePyAudio.paInputOverflow if overflow else 0)
+
+    def stop_stream(self):
+        self.active.clear()
+        self.thread.join()
+
+    def close(self):
+        self.closed = True
+
+
+class FakePyAudio:
+    """Stands in for the pyaudio module and its PyAudio class"""
+    paInt16 = 8
+    paInputOverflow = 2
+    paContinue = 0
+
+    def __init__(self, pacing=0.005, fail_open=False):
+        self.pacing = pacing
+        self.fail_open = fail_open
+        self.overflow_every = 0
+        self.instances = []
+
+    def PyAudio(self):
+        instance = FakePortAudio(self)
+        self.instances.append(instance)
+        return instance
+
+
+class FakePortAudio:
+    def __init__(self, module):
+        self.module = module
+        self.streams = []
+        self.terminated = False
+
+    def get_default_input_device_info(self):
+        return {'defaultSampleRate': SAMPLE_RATE, 'maxInputChannels': 1}
+
+    def open(self, **kwargs):
+        if self.module.fail_open:
+            raise OSError("device unavailable")
+        stream = FakeStream(self.module.pacing, kwargs['frames_per_buffer'], kwargs['stream_callback'],
+                            self.module.overflow_every)
+        self.streams.append(stream)
+        return stream
+
+    def terminate(self):
+        self.terminated = True
+
+
+class FakeModel:
+    n_mels = None
+    last_confidence = -0.2
+
+    def __init__(self, decode_s):
+        self.decode_s = decode_s
+        self.decoded = 0
+
+    def transcribe(self, audio, language=None):
+        time.sleep(self.decode_s)
+        self.decoded += 1
+        return f"sentence {self.decoded}"
+
+
+class Harness:
+    """One session over `mics` fake microphones"""
+
+    def __init__(self, mics=1, decode_s=0.05, load_s=0.1):
+        self.events = []
+        self.model = FakeModel(decode_s)
+        self.load_s = load_s
+        self.scheduler = FairSegmentScheduler()
+        self.session = RecordingSession(self.scheduler, self.emit)
+        self.sources = [CaptureSource(None, f"Mic{i}", None, self.scheduler, self.emit, self.session.capturing,
+                                      SAMPLE_RATE, FRAME_MS) for i in range(mics)]
+        self.worker = WhisperWorker(self.load_model, self.scheduler, self.emit, self.session.transcribing)
+
+    def emit(self, msg_type, content, source=None):
+        self.events.append((msg_type, content, source))
+
+    def load_model(self):
+        time.sleep(self.load_s)
+        return self.model
+
+    def start(self):
+        self.session.start(self.sources, self.worker)
+        return self
+
+    def states(self):
+        return [content for msg_type, content, _ in self.events if msg_type == "session"]
+
+    def finals(self):
+        return sum(1 for msg_type, _, _ in self.events if msg_type == "final")
+
+    def wait_for(self, predicate, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return predicate()
+
+
+def check(name, ok, detail=""):
+    print(f"{'OK  ' if ok else 'FAIL'} {name}" + (f" ({detail})" if detail else ""))
+    return ok
+
+
+def check_states_and_release(fake):
+    h = Harness(mics=2).start()
+    h.wait_for(lambda: h.finals() >= 2)
+    stopped = h.session.stop()
+    streams = [s for p in fake.instances for s in p.streams]
+    return all([
+        check("state order", h.states() == [WARMING, RECORDING, DRAINING, STOPPED], " -> ".join(h.states())),
+        check("threads joined", stopped and not h.session.busy()),
+        check("streams closed", streams and all(s.closed for s in streams), f"{len(streams)} streams"),
+        check("PortAudio terminated", all(p.terminated for p in fake.instances)),
+        check("one capture_stats per mic", sum(1 for e in h.events if e[0] == "capture_stats") == 2),
+    ])
+
+
+def check_idle_wakeup():
+    h = Harness()
+    h.session.start([], h.worker)
+    h.wait_for(lambda: h.session.state == RECORDING)
+    time.sleep(0.2)     # the worker is now blocked in scheduler.get
+    start = time.perf_counter()
+    h.session.stop()
+    elapsed = time.perf_counter() - start
+    return check("idle worker wakes at once", elapsed < 0.2 and not h.session.busy(), f"{elapsed * 1000:.0f} ms")
+
+
+def check_drain(drain_timeout, decode_s, backlog):
+    h = Harness(decode_s=decode_s).start()
+    h.wait_for(lambda: h.session.state == RECORDING)
+    for i in range(backlog):
+        audio = synthetic_speech(1.2, 0.0)
+        h.scheduler.put(audio_pipeline.Segment("Mic0", audio, i, i + 1.2))
+    start = time.perf_counter()
+    h.session.stop(drain_timeout=drain_timeout)
+    elapsed = time.perf_counter() - start
+    bound = drain_timeout + decode_s + 0.5
+    return check(f"drain within {drain_timeout:g} s", elapsed < bound and not h.session.busy(),
+                 f"{elapsed:.2f} s, {h.model.decoded} decoded, {h.session.abandoned} dropped")
+
+
+def check_quick_restart(rounds):
+    ok = True
+    for _ in range(rounds):
+        first = Harness().start()
+        first.session.stop(drain_timeout=0.2)
+        second = Harness().start()
+        overlap = first.session.busy()
+        second.wait_for(lambda: second.session.state == RECORDING)
+        second.session.stop(drain_timeout=0.2)
+        ok &= not overlap and not second.session.busy()
+    return check(f"stop/start x{rounds} without overlap", ok)
+
+
+def check_mic_failure(fake):
+    fake.fail_open = True
+    try:
+        h = Harness().start()
+        h.wait_for(lambda: any(e[0] == "error" for e in h.events))
+        stopped = h.session.stop()
+    finally:
+        fake.fail_open = False
+    return check("failed mic releases PortAudio and stops",
+                 stopped and fake.instances[-1].terminated and h.states()[-1] == STOPPED)
+
+
+def check_overflows(fake):
+    fake.overflow_every = 10
+    try:
+        h = Harness().start()
+        h.wait_for(lambda: h.sources[0].stats['overflows'] >= 5)
+        h.session.stop()
+    finally:
+        fake.overflow_every = 0
+    stream = fake.instances[-1].streams[-1]
+    stats = h.sources[0].stats
+    return check("overflows counted, no buffer lost",
+                 stats['overflows'] == stream.delivered // 10 and stats['frames'] + stats['dropped_frames'] >= stream.delivered - 1,
+                 f"{stats['overflows']} overflows, {stats['frames']}/{stream.delivered} frames")
+
+
+def check_close_mid_decode():
+    h = Harness(decode_s=1.0).start()
+    h.wait_for(lambda: h.session.state == RECORDING)
+    released = []
+    h.worker.on_exit = lambda: released.append(h.worker.thread.is_alive())
+    h.scheduler.put(audio_pipeline.Segment("Mic0", synthetic_speech(1.2, 0.0), 0, 1.2))
+    time.sleep(0.2)     # the segment is now being decoded
+    stopped = h.session.stop(drain_timeout=0, join_timeout=0.2)
+    early = bool(released)
+    h.wait_for(lambda: released)
+    return check("close mid-decode releases after the worker exits",
+                 not stopped and not early and released == [True] and h.wait_for(lambda: not h.session.busy()),
+                 f"stop returned {stopped}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the recording session lifecycle with fake audio")
+    parser.add_argument("--rounds", type=int, default=5, help="Quick stop/start repetitions")
+    args = parser.parse_args()
+
+    fake = FakePyAudio()
+    audio_pipeline.pyaudio = fake
+    before = threading.active_count()
+
+    results = [
+        check_states_and_release(fake),
+        check_idle_wakeup(),
+        check_drain(drain_timeout=5.0, decode_s=0.05, backlog=5),
+        check_drain(drain_timeout=0.3, decode_s=0.2, backlog=20),
+        check_quick_restart(args.rounds),
+        check_mic_failure(fake),
+        check_overflows(fake),
+        check_close_mid_decode(),
+        check("no leftover threads", threading.active_count() == before,
+              f"{threading.active_count() - before} alive"),
+    ]
+    if not all(results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+import websockets
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_resample import SAMPLE_RATE, load_wav
+
+
+async def replay(uri, wav_path, chunk_ms=100, realtime=True):
+    """Stream a WAV file to the server and print every event; returns the final texts"""
+    pcm = load_wav(wav_path)
+    chunk_bytes = int(SAMPLE_RATE * chunk_ms / 1000) * 2
+    finals = []
+
+    async with websockets.connect(uri, max_size=None) as ws:
+        ready = json.loads(await ws.recv())
+        print(json.dumps(ready))
+        if ready.get("type") != "ready":
+            raise ConnectionRefusedError(ready.get("message", "Stream rejected by server"))
+
+        async def receive():
+            async for message in ws:
+                event = json.loads(message)
+                print(json.dumps(event))
+                if event.get("type") == "final":
+                    finals.append(event["text"])
+                if event.get("type") == "done":
+                    return
+
+        receiver = asyncio.create_task(receive())
+        for start in range(0, len(pcm), chunk_bytes):
+            await ws.send(pcm[start:start + chunk_bytes])
+            if realtime:
+                await asyncio.sleep(chunk_ms / 1000)
+        # A little trailing silence so the last utterance closes on its own
+        await ws.send(b"\0" * SAMPLE_RATE)
+        await ws.send(json.dumps({"type": "end"}))
+        await receiver
+
+    return finals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a WAV file against the transcription server")
+    parser.add_argument("wav")
+    parser.add_argument("--uri", default="ws://127.0.0.1:8765")
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--fast", action="store_true", help="Send as fast as possible instead of in real time")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.wav):
+        sys.exit(f"File not found: {args.wav}")
+    try:
+        finals = asyncio.run(replay(args.uri, args.wav, args.chunk_ms, not args.fast))
+    except ConnectionRefusedError as e:
+        sys.exit(f"Rejected: {e}")
+    print(f"\n{len(finals)} final segment(s):")
+    for text in finals:
+        print(f"  {text}")
@@ -0,0 +1,295 @@
+import os
+import re
+import sqlite3
+import hashlib
+import argparse
+from datetime import datetime
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    "NOTEFORGE_INDEX", os.path.join(os.path.expanduser("~"), ".noteforge", "transcripts.db")
+)
+
+# "[HH:MM:SS] text" lines written by HybridTranscriberApp
+TIMESTAMP_LINE = re.compile(r'^\[(\d{1,2}:\d{2}:\d{2})\]\s*(.*)$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    session TEXT,
+    content_hash TEXT,
+    indexed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    position INTEGER,
+    timestamp TEXT,
+    topic TEXT,
+    section TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_document ON segments(document_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text, topic, content='segments', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS segments_ai AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts(rowid, text, topic) VALUES (new.id, new.text, new.topic);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_ad AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts(segments_fts, rowid, text, topic) VALUES ('delete', old.id, old.text, old.topic);
+END;
+"""
+
+
+class SearchHit:
+    __slots__ = ('path', 'kind', 'session', 'timestamp', 'topic', 'section', 'text', 'snippet', 'score')
+
+    def __init__(self, path, kind, session, timestamp, topic, section, text, snippet, score):
+        self.path = path
+        self.kind = kind
+        self.session = session
+        self.timestamp = timestamp
+        self.topic = topic
+        self.section = section
+        self.text = text
+        self.snippet = snippet
+        self.score = score
+
+
+class TranscriptIndex:
+    """Local full-text index (SQLite FTS5) over saved transcripts and generated notes.
+
+    Documents are keyed by path and re-indexed only when their content
+    changes. Connections are per-thread, so open one in the thread that
+    uses it.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DEFAULT_INDEX_PATH
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Indexing ---
+
+    def index_segments(self, path, kind, segments, session=None):
+        """Replace the indexed content of one document.
+
+        `segments` is an iterable of (text, timestamp, topic, section) tuples.
+        Returns False (and does nothing) if the content is unchanged.
+        """
+        segments = [s for s in segments if s[0] and s[0].strip()]
+        digest = hashlib.sha256()
+        for segment in segments:
+            digest.update(repr(segment).encode('utf-8'))
+        content_hash = digest.hexdigest()
+
+        path = os.path.abspath(path)
+        session = session or os.path.splitext(os.path.basename(path))[0]
+
+        with self.conn:
+            row = self.conn.execute("SELECT id, content_hash FROM documents WHERE path = ?", (path,)).fetchone()
+            if row and row[1] == content_hash:
+                return False
+
+            if row:
+                doc_id = row[0]
+                self.conn.execute("DELETE FROM segments WHERE document_id = ?", (doc_id,))
+                self.conn.execute(
+                    "UPDATE documents SET kind = ?, session = ?, content_hash = ?, indexed_at = ? WHERE id = ?",
+                    (kind, session, content_hash, datetime.now().isoformat(timespec='seconds'), doc_id)
+                )
+            else:
+                doc_id = self.conn.execute(
+                    "INSERT INTO documents (path, kind, session, content_hash, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                    (path, kind, session, content_hash, datetime.now().isoformat(timespec='seconds'))
+                ).lastrowid
+
+            self.conn.executemany(
+                "INSERT INTO segments (document_id, position, timestamp, topic, section, text) VALUES (?, ?, ?, ?, ?, ?)",
+                ((doc_id, i, ts, topic, section, text.strip()) for i, (text, ts, topic, section) in enumerate(segments))
+            )
+        return True
+
+    def index_transcript(self, path, text=None, session=None, topic_for=None):
+        """Index a transcript saved by the transcriber, one segment per line"""
+        if text is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        return self.index_segments(path, 'transcript', parse_transcript(text, topic_for), session)
+
+    def index_notes(self, source_path, topics, session=None):
+        """Index the classified sentences of a generated study guide"""
+        segments = []
+        for topic, sections in topics.items():
+            for section, sentences in sections.items():
+                for sentence in sentences:
+                    segments.append((sentence, None, topic, section))
+        session = session or os.path.splitext(os.path.basename(source_path))[0]
+        return self.index_segments(os.path.abspath(source_path) + "#notes", 'notes', segments, session)
+
+    def remove(self, path):
+        with self.conn:
+            self.conn.execute("DELETE FROM documents WHERE path = ?", (os.path.abspath(path),))
+
+    # --- Querying ---
+
+    def search(self, query, limit=20, phrase=False, kind=None, session=None):
+        """Ranked (BM25) matches with highlighted snippets.
+
+        Plain queries match all words; `phrase=True` matches the exact
+        phrase. "Quoted phrases", AND/OR/NOT between terms and prefix*
+        keep their FTS5 meaning; everything else is quoted, so ordinary
+        input can't be a syntax error.
+        """
+        match = to_match_query(query, phrase)
+        if not match:
+            return []
+        try:
+            return self._search(match, limit, kind, session)
+        except sqlite3.OperationalError:
+            # Last resort for anything to_match_query let through: search the words as one phrase
+            match = to_match_query(query, phrase=True)
+            return self._search(match, limit, kind, session)
+
+    def _search(self, match, limit, kind, session):
+        sql = """
+            SELECT d.path, d.kind, d.session, s.timestamp, s.topic, s.section, s.text,
+                   snippet(segments_fts, 0, '[', ']', '…', 12), bm25(segments_fts) AS score
+            FROM segments_fts
+            JOIN segments s ON s.id = segments_fts.rowid
+            JOIN documents d ON d.id = s.document_id
+            WHERE segments_fts MATCH ?
+        """
+        params = [match]
+        if kind:
+            sql += " AND d.kind = ?"
+            params.append(kind)
+        if session:
+            sql += " AND d.session = ?"
+            params.append(session)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+
+        return [SearchHit(*row) for row in self.conn.execute(sql, params)]
+
+    def stats(self):
+        documents = self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        segments = self.conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {'documents': documents, 'segments': segments}
+
+
+MATCH_TOKEN = re.compile(r'"[^"]*"|[^\s"]+')
+OPERATORS = ('AND', 'OR', 'NOT')
+
+
+def to_match_query(query, phrase=False):
+    """FTS5 MATCH expression for user input.
+
+    Words are quoted so punctuation ("s. 2", "art. 6(1)") can't break the
+    syntax. Complete "phrases" and a trailing * (prefix search) are kept.
+    AND/OR/NOT are operators only between two terms; elsewhere (a lone
+    "NOT", "NOT offer") they are searched as words.
+    """
+    query = query.strip()
+    if not query:
+        return ''
+    if phrase:
+        return '"' + query.replace('"', '""') + '"'
+
+    items = []      # (is_operator, text)
+    for token in MATCH_TOKEN.findall(query):
+        if token in OPERATORS:
+            items.append((True, token))
+        elif token.startswith('"') and token.endswith('"') and len(token) > 2:
+            items.append((False, token))
+        else:
+            words = re.findall(r'\w+', token)
+            prefix = token.rstrip('"').endswith('*')
+            for i, word in enumerate(words):
+                star = '*' if prefix and i == len(words) - 1 else ''
+                items.append((False, f'"{word}"{star}'))
+
+    terms = []
+    for i, (is_operator, text) in enumerate(items):
+        if is_operator:
+            between_terms = (terms and not terms[-1][0]
+                             and i + 1 < len(items) and not items[i + 1][0])
+            terms.append((True, text) if between_terms else (False, f'"{text}"'))
+        else:
+            terms.append((False, text))
+    return ' '.join(text for _, text in terms)
+
+
+def parse_transcript(text, topic_for=None):
+    """Turn transcriber output into (text, timestamp, topic, section) segments.
+
+    Draft lines are skipped; their final version follows them.
+    """
+    segments = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('[Draft]'):
+            continue
+        match = TIMESTAMP_LINE.match(line)
+        timestamp, content = (match.group(1), match.group(2)) if match else (None, line)
+        if content:
+            topic = topic_for(content) if topic_for else None
+            segments.append((content, timestamp, topic, None))
+    return segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search saved transcripts and notes")
+    parser.add_argument("--db", default=DEFAULT_INDEX_PATH, help="Index database path")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="Index transcript files or folders of .txt files")
+    add.add_argument("paths", nargs="+")
+
+    search = sub.add_parser("search", help="Ranked search")
+    search.add_argument("query")
+    search.add_argument("--phrase", action="store_true", help="Match the exact phrase")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--kind", choices=["transcript", "notes"])
+    search.add_argument("--session")
+
+    sub.add_parser("stats", help="Show index size")
+    args = parser.parse_args()
+
+    with TranscriptIndex(args.db) as index:
+        if args.command == "add":
+            files = []
+            for path in args.paths:
+                if os.path.isdir(path):
+                    for root, _, names in os.walk(path):
+                        files.extend(os.path.join(root, n) for n in names if n.endswith('.txt'))
+                else:
+                    files.append(path)
+            changed = sum(1 for f in files if index.index_transcript(f))
+            print(f"Indexed {changed} changed file(s), {len(files) - changed} unchanged.")
+        elif args.command == "search":
+            for hit in index.search(args.query, limit=args.limit, phrase=args.phrase, kind=args.kind, session=args.session):
+                where = hit.session + (f" {hit.timestamp}" if hit.timestamp else "") + (f" [{hit.topic}]" if hit.topic else "")
+                print(f"{where}: {hit.snippet}")
+        elif args.command == "stats":
+            stats = index.stats()
+            print(f"{stats['documents']} documents, {stats['segments']} segments")
+
+
+if __name__ == "__main__":
+    main()
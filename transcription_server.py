@@ -0,0 +1,315 @@
+import os
+import json
+import uuid
+import asyncio
+import argparse
+import threading
+
+import websockets
+from websockets.exceptions import ConnectionClosed
+
+from audio_pipeline import SpeechSegmenter, FairSegmentScheduler, WhisperWorker, ConfidenceGate, LanguageTracker
+
+try:
+    import vosk
+except ImportError:
+    vosk = None
+
+from whisper_backends import BACKENDS, DEFAULT_BACKEND, create_backend
+from resource_budget import CoreBudget
+from model_manager import ModelManager
+from streaming_features import LogMelStream
+from pipeline_metrics import MetricsRegistry, MetricsServer, PipelineCollector, process_collector
+
+SAMPLE_RATE = 16000
+FRAME_DURATION_MS = 20
+FRAME_BYTES = int(SAMPLE_RATE * FRAME_DURATION_MS / 1000) * 2
+
+
+class StreamSession:
+    """One client connection: its own VAD/Vosk segmenter and outgoing event queue.
+
+    Timestamps in events are seconds of audio received on this stream.
+    """
+
+    def __init__(self, server, websocket):
+        self.id = uuid.uuid4().hex[:12]
+        self.server = server
+        self.websocket = websocket
+        self.segmenter = SpeechSegmenter(server.vosk_model, self.id, SAMPLE_RATE, FRAME_DURATION_MS,
+                                         feature_stream=server.feature_stream)
+        self.outbox = asyncio.Queue()
+        self.buffer = bytearray()
+        self.samples_received = 0
+        self.pending = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.has_room = asyncio.Event()     # cleared while max_stream_pending segments wait for Whisper
+        self.has_room.set()
+
+    def send(self, event):
+        self.outbox.put_nowait(event)
+
+    async def send_loop(self):
+        while True:
+            event = await self.outbox.get()
+            if event is None:
+                return
+            await self.websocket.send(json.dumps(event))
+
+    def _process(self, data):
+        """Worker thread: reframe PCM into 20 ms frames and run VAD/Vosk"""
+        self.buffer.extend(data)
+        events, segments = [], []
+        offset = 0
+        while len(self.buffer) - offset >= FRAME_BYTES:
+            frame = bytes(self.buffer[offset:offset + FRAME_BYTES])
+            offset += FRAME_BYTES
+            self.samples_received += FRAME_BYTES // 2
+            frame_events, segment = self.segmenter.process_frame(frame, self.samples_received / SAMPLE_RATE)
+            events.extend(frame_events)
+            if segment:
+                segments.append(segment)
+        del self.buffer[:offset]
+        return events, segments
+
+    async def feed(self, data):
+        events, segments = await asyncio.to_thread(self._process, data)
+        for msg_type, text in events:
+            self.send({"type": msg_type, "text": text})
+        for segment in segments:
+            self._submit(segment)
+
+    async def finish(self, timeout):
+        """Flush buffered speech and wait (bounded) for its final results"""
+        events, segment = self.segmenter.flush()
+        for msg_type, text in events:
+            self.send({"type": msg_type, "text": text})
+        if segment:
+            self._submit(segment)
+        try:
+            await asyncio.wait_for(self.idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.send({"type": "error", "reason": "timeout", "message": "Gave up waiting for final results"})
+
+    def _submit(self, segment):
+        self.pending += 1
+        self.idle.clear()
+        if self.pending >= self.server.max_stream_pending:
+            self.has_room.clear()
+        self.server.scheduler.put(segment)
+
+    def segment_done(self, segment, text):
+        """Called on the event loop once Whisper has handled one of our segments"""
+        if text:
+            self.send({"type": "final", "text": text, "start": round(segment.start, 2), "end": round(segment.end, 2)})
+        self.pending -= 1
+        if self.pending < self.server.max_stream_pending:
+            self.has_room.set()
+        if self.pending <= 0:
+            self.pending = 0
+            self.idle.set()
+
+
+class TranscriptionServer:
+    """Serves the VAD/Vosk/Whisper pipeline to thin clients over WebSocket.
+
+    Clients stream 16 kHz mono int16 PCM as binary messages and receive
+    JSON events: ready, partial, draft, final, correction, language, done and error. Send
+    {"type": "end"} to finish a stream and wait for the remaining finals.
+    All sessions share one warm Whisper model through a fair scheduler.
+
+    New streams are refused while `max_pending` segments are queued. A
+    connected stream with `max_stream_pending` segments of its own waiting
+    is not read from until Whisper catches up, which pushes back on the
+    client through the socket; after `finish_timeout` seconds of that it is
+    closed as overloaded.
+    """
+
+    def __init__(self, vosk_model, whisper_model, max_streams=4, max_pending=32,
+                 language="english", finish_timeout=60.0, gate=None, budget=None, languages=None,
+                 max_stream_pending=None):
+        self.vosk_model = vosk_model
+        self.whisper_model = whisper_model
+        self.max_streams = max_streams
+        self.max_pending = max_pending
+        self.max_stream_pending = max_stream_pending or max(1, max_pending // max_streams)
+        self.finish_timeout = finish_timeout
+
+        # Stream Whisper's log-mel features during speech when the backend can take them
+        n_mels = whisper_model.n_mels if whisper_model is not None else None
+        self.feature_stream = (lambda: LogMelStream(n_mels)) if n_mels else None
+
+        self.sessions = {}
+        self.scheduler = FairSegmentScheduler()
+        self.running = threading.Event()
+        self.loop = None
+        # "auto": each stream's language is detected once among `languages` and re-checked periodically
+        tracker = None
+        if language == "auto":
+            language, tracker = None, (lambda: LanguageTracker(languages or ("english", "vietnamese")))
+        self.worker = WhisperWorker(lambda: self.whisper_model, self.scheduler, self._emit, self.running,
+                                    language=language, on_done=self._segment_done, gate=gate,
+                                    budget=budget, language_tracker=tracker)
+
+    def metrics_registry(self):
+        """Whisper queue, RTF, segment rate and process metrics (streams have no capture queues)"""
+        registry = MetricsRegistry()
+        registry.register(process_collector)
+        registry.register(PipelineCollector(lambda: ((), self.scheduler, self.worker)))
+        return registry
+
+    def _emit(self, msg_type, content, source):
+        # Finals are delivered through _segment_done; only errors, corrections and language changes here
+        if msg_type == "error":
+            print(f"Server Error: {content}")
+        elif msg_type == "correction":
+            session = self.sessions.get(source)
+            if session and self.loop:
+                draft, text = content
+                self.loop.call_soon_threadsafe(session.send, {"type": "correction", "draft": draft, "text": text})
+        elif msg_type == "language":
+            session = self.sessions.get(source)
+            if session and self.loop:
+                code, probability = content
+                self.loop.call_soon_threadsafe(session.send, {"type": "language", "language": code,
+                                                              "probability": round(probability, 3)})
+
+    def _segment_done(self, segment, text):
+        """Whisper thread -> event loop hand-off"""
+        session = self.sessions.get(segment.source)
+        if session and self.loop:
+            self.loop.call_soon_threadsafe(session.segment_done, segment, text)
+
+    def overloaded(self):
+        return len(self.sessions) >= self.max_streams or self.scheduler.pending() >= self.max_pending
+
+    async def handle(self, websocket):
+        if self.overloaded():
+            await websocket.send(json.dumps({
+                "type": "error", "reason": "overloaded",
+                "message": f"Server busy ({len(self.sessions)}/{self.max_streams} streams)"
+            }))
+            await websocket.close(code=1013, reason="Server overloaded, try again later")
+            return
+
+        session = StreamSession(self, websocket)
+        self.sessions[session.id] = session
+        self.scheduler.add_source(session.id)
+        sender = asyncio.create_task(session.send_loop())
+        session.send({"type": "ready", "session": session.id, "sample_rate": SAMPLE_RATE})
+
+        try:
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    if not await self.wait_for_room(session):
+                        session.send(None)
+                        await sender
+                        await websocket.close(code=1013, reason="Stream backlog full, try again later")
+                        return
+                    await session.feed(message)
+                    continue
+                try:
+                    command = json.loads(message)
+                except ValueError:
+                    session.send({"type": "error", "reason": "bad_message", "message": "Expected JSON or PCM bytes"})
+                    continue
+                if command.get("type") == "end":
+                    break
+
+            await session.finish(self.finish_timeout)
+            session.send({"type": "done"})
+            session.send(None)
+            await sender
+        except ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            self.sessions.pop(session.id, None)
+            self.scheduler.remove_source(session.id)
+            self.worker.forget(session.id)
+
+    async def wait_for_room(self, session):
+        """Hold off reading this stream while its backlog is full; False if it stayed full too long"""
+        if session.has_room.is_set():
+            return True
+        try:
+            await asyncio.wait_for(session.has_room.wait(), self.finish_timeout)
+            return True
+        except asyncio.TimeoutError:
+            session.send({"type": "error", "reason": "overloaded",
+                          "message": f"{session.pending} segments still waiting for Whisper"})
+            return False
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        self.loop = asyncio.get_running_loop()
+        self.running.set()
+        self.worker.start()
+        try:
+            async with websockets.serve(self.handle, host, port, max_size=2 ** 20):
+                print(f"Transcription server listening on ws://{host}:{port}")
+                await asyncio.Future()
+        finally:
+            self.running.clear()
+            self.scheduler.wake()
+
+
+def load_models(vosk_model_path, whisper_model_size, backend=DEFAULT_BACKEND, threads=0):
+    if not vosk or not os.path.exists(vosk_model_path):
+        raise SystemExit(f"Vosk model not found at '{vosk_model_path}'. Please run: python model_manager.py prefetch")
+    try:
+        whisper_backend = create_backend(backend, whisper_model_size, threads=threads)
+    except (ImportError, ValueError) as e:
+        raise SystemExit(f"Whisper backend unavailable: {e}")
+    # Never download while serving; weights come from `model_manager.py prefetch`
+    whisper_backend.model_size = ModelManager().local_path(whisper_backend.model_kind, whisper_model_size)
+    if not whisper_backend.model_size:
+        raise SystemExit(f"Whisper model '{whisper_model_size}' ({backend}) is not downloaded. "
+                         "Please run: python model_manager.py prefetch")
+    print("Loading models...")
+    return vosk.Model(vosk_model_path), whisper_backend.load()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NoteForge streaming transcription server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-streams", type=int, default=4, help="Concurrent client streams")
+    parser.add_argument("--max-pending", type=int, default=32,
+                        help="Reject new streams while this many segments wait for Whisper")
+    parser.add_argument("--max-stream-pending", type=int, default=None,
+                        help="Stop reading a stream while this many of its segments wait (default: max-pending / max-streams)")
+    parser.add_argument("--vosk-model", default="model")
+    parser.add_argument("--whisper-model", default="base")
+    parser.add_argument("--backend", choices=list(BACKENDS), default=DEFAULT_BACKEND, help="Whisper inference runtime")
+    parser.add_argument("--language", default="english",
+                        help="Decode language, or 'auto' to detect it once per stream among --languages")
+    parser.add_argument("--languages", nargs="+", default=["english", "vietnamese"],
+                        help="Candidate languages for --language auto")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Serve Prometheus metrics on 127.0.0.1:<port>/metrics (0 = off)")
+    parser.add_argument("--skip-confident", action="store_true",
+                        help="Skip Whisper for segments Vosk is confident about (re-decoded when idle)")
+    args = parser.parse_args()
+
+    budget = CoreBudget.load()
+    vosk_model, whisper_model = load_models(args.vosk_model, args.whisper_model, args.backend, budget.whisper)
+    gate = ConfidenceGate() if args.skip_confident else None
+    server = TranscriptionServer(vosk_model, whisper_model, args.max_streams, args.max_pending, args.language,
+                                 gate=gate, budget=budget, languages=args.languages,
+                                 max_stream_pending=args.max_stream_pending)
+    metrics_server = None
+    if args.metrics_port:
+        metrics_server = MetricsServer(server.metrics_registry(), args.metrics_port).start()
+        print(f"Metrics: {metrics_server.url}")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if metrics_server:
+            metrics_server.stop()
+
+
+if __name__ == "__main__":
+    main()
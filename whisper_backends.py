@@ -0,0 +1,188 @@
+import gc
+from abc import ABC, abstractmethod
+import numpy as np
+
+try:
+    import whisper
+except ImportError:
+    whisper = None
+
+try:
+    import faster_whisper
+except ImportError:
+    faster_whisper = None
+
+SAMPLE_RATE = 16000
+
+# faster-whisper takes ISO codes where openai-whisper also accepts names
+LANGUAGE_CODES = {
+    'english': 'en', 'vietnamese': 'vi', 'french': 'fr', 'german': 'de', 'spanish': 'es',
+    'chinese': 'zh', 'japanese': 'ja', 'korean': 'ko', 'italian': 'it', 'portuguese': 'pt',
+}
+
+
+def language_code(language):
+    if not language:
+        return None
+    language = language.lower()
+    return LANGUAGE_CODES.get(language, language)
+
+
+def language_name(code):
+    for name, value in LANGUAGE_CODES.items():
+        if value == code:
+            return name.capitalize()
+    return code
+
+
+class WhisperBackend(ABC):
+    """Speech-to-text engine used by WhisperWorker.
+
+    Audio is float32 mono at 16 kHz in [-1, 1]. `load()` must be called
+    once before transcribing; it is slow and may download weights.
+    """
+    name = None
+    module = None
+    model_kind = None       # models.json kind holding this backend's weights
+
+    def __init__(self, model_size="base", device="cpu", threads=0):
+        self.model_size = model_size        # size name, or a local path from ModelManager
+        self.device = device
+        self.threads = threads
+        self.model = None
+        self.last_confidence = None     # average token log-probability of the last transcription
+
+    @classmethod
+    def available(cls):
+        return cls.module is not None
+
+    @abstractmethod
+    def load(self):
+        """Load the weights; returns self"""
+
+    @abstractmethod
+    def transcribe(self, audio, language=None):
+        """Transcribe one segment; returns the stripped text"""
+
+    @property
+    def n_mels(self):
+        """Mel bands of precomputed features this backend accepts (None = audio only)"""
+        return None
+
+    def transcribe_features(self, features, audio, language=None):
+        """Transcribe from precomputed (n_mels, 3000) log-mel features; `audio` is the fallback"""
+        return self.transcribe(audio, language)
+
+    def detect_language(self, audio, features=None):
+        """{language code: probability} for up to 30 s of audio (empty if unsupported)"""
+        return {}
+
+    def release(self):
+        """Free the weights now instead of whenever the garbage collector gets to them"""
+        self.model = None
+        gc.collect()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.model_size!r}, device={self.device!r})"
+
+
+class OpenAIWhisperBackend(WhisperBackend):
+    """Reference PyTorch implementation (openai-whisper)"""
+    name = "openai-whisper"
+    module = whisper
+    model_kind = "whisper"
+
+    def load(self):
+        if self.threads:
+            import torch
+            torch.set_num_threads(self.threads)
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                pass  # only allowed before torch starts any parallel work
+        self.model = whisper.load_model(self.model_size, device=self.device)
+        return self
+
+    def release(self):
+        super().release()
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def transcribe(self, audio, language=None):
+        result = self.model.transcribe(audio, fp16=self.device != "cpu", language=language)
+        segments = result.get("segments") or []
+        self.last_confidence = sum(s['avg_logprob'] for s in segments) / len(segments) if segments else None
+        return result.get("text", "").strip()
+
+    def detect_language(self, audio, features=None):
+        import torch
+        if features is None:
+            features = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), self.model.dims.n_mels)
+        else:
+            features = torch.from_numpy(features)
+        _, probs = self.model.detect_language(features.to(self.model.device))
+        return dict(probs)
+
+    @property
+    def n_mels(self):
+        return self.model.dims.n_mels if self.model else None
+
+    def transcribe_features(self, features, audio, language=None):
+        import torch
+        options = whisper.DecodingOptions(language=language_code(language), fp16=self.device != "cpu",
+                                          without_timestamps=True)
+        result = whisper.decode(self.model, torch.from_numpy(features).to(self.model.device), options)
+        # Same quality checks transcribe() uses before retrying at a higher temperature
+        if result.compression_ratio > 2.4 or result.avg_logprob < -1.0:
+            return self.transcribe(audio, language)
+        self.last_confidence = result.avg_logprob
+        return result.text.strip()
+
+
+class FasterWhisperBackend(WhisperBackend):
+    """CTranslate2 runtime (faster-whisper) with int8 weights, several times faster on CPU"""
+    name = "faster-whisper"
+    module = faster_whisper
+    model_kind = "faster-whisper"
+
+    def __init__(self, model_size="base", device="cpu", threads=0, compute_type="int8", beam_size=5):
+        super().__init__(model_size, device, threads)
+        self.compute_type = compute_type
+        self.beam_size = beam_size
+
+    def load(self):
+        self.model = faster_whisper.WhisperModel(self.model_size, device=self.device,
+                                                 compute_type=self.compute_type, cpu_threads=self.threads)
+        return self
+
+    def transcribe(self, audio, language=None):
+        segments, _ = self.model.transcribe(audio, language=language_code(language), beam_size=self.beam_size)
+        segments = list(segments)
+        self.last_confidence = sum(s.avg_logprob for s in segments) / len(segments) if segments else None
+        return "".join(segment.text for segment in segments).strip()
+
+    def detect_language(self, audio, features=None):
+        # Language ID runs eagerly in transcribe(); the segments generator is never consumed
+        _, info = self.model.transcribe(audio[:SAMPLE_RATE * 30], language=None, beam_size=1)
+        return dict(info.all_language_probs or [(info.language, info.language_probability)])
+
+
+BACKENDS = {backend.name: backend for backend in (OpenAIWhisperBackend, FasterWhisperBackend)}
+DEFAULT_BACKEND = OpenAIWhisperBackend.name
+
+
+def create_backend(name=DEFAULT_BACKEND, model_size="base", **options):
+    """Instantiate (but do not load) a backend by name"""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown Whisper backend '{name}' (choose from {', '.join(BACKENDS)})") from None
+    if not backend_class.available():
+        raise ImportError(f"{name} is not installed")
+    return backend_class(model_size, **options)
+
+
+def pcm_to_float(pcm):
+    """int16 PCM bytes -> float32 samples for the backends"""
+    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0